@@ -13,15 +13,9 @@ import datetime
 import time
 import os
 import io
+import logging
 from bs4 import BeautifulSoup
 import hashlib
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, cm
-from reportlab.lib.utils import ImageReader
 import sqlite3
 from PIL import Image as PILImage
 import matplotlib as mpl
@@ -29,6 +23,23 @@ mpl.use('Agg')  # Usar el backend Agg para evitar problemas con Streamlit
 from mplsoccer import Radar, grid
 import matplotlib.font_manager as fm
 from io import BytesIO
+from data_utils import (
+    read_player_file, build_sidecar, remove_sidecar, iter_player_files,
+    ALL_COMPETITIONS, COMPETITION_FILES, get_competition_options,
+    load_player_dataset, COLUMN_GROUPS, VIZ_METRIC_GROUPS, LOWER_IS_BETTER_METRICS, SCORING_PROFILES,
+    apply_schema, build_column_profile
+)
+from filter_utils import compile_filter_plan, evaluate_filter_plan, MaskCache, PagedView
+from export_utils import EXPORT_FORMATS, make_export
+from index_utils import min_minutes_mask, top_k_rows, SortedColumnIndex
+from sql_utils import create_query_backend
+from report_utils import (
+    ReportPDFCache, PDF_CACHE_DIRNAME, ZIP_EXPORT_DIRNAME, render_report_pdf, render_player_dossier,
+    report_pdf_filename, write_reports_zip, new_reports_zip_path, remove_stale_zips
+)
+from analytics_utils import (
+    PercentileTable, PERCENTILE_MIN_THRESHOLDS, MetricStats, SimilarityIndex, CompositeScorer, stats_for
+)
 
 # Configuración de página
 st.set_page_config(
@@ -53,6 +64,36 @@ for dir_path in [DATA_DIR, REPORTS_DIR, ASSETS_DIR, DB_DIR, FONTS_DIR]:
 # Archivo de base de datos SQLite
 DB_FILE = DB_DIR / "scouting.db"
 
+# Motor de consultas de datos de jugadores: "pandas" (por defecto) o "duckdb"
+QUERY_BACKEND = os.environ.get("CAC_QUERY_BACKEND", "pandas").strip().lower()
+
+# Nivel de los registros de la aplicación (tiempos de carga, exportaciones, caché de PDF...)
+LOG_LEVEL = os.environ.get("CAC_LOG_LEVEL", "INFO").strip().upper()
+
+# Logger de la aplicación
+logger = logging.getLogger("cac_scouting")
+
+# Función para configurar los registros de la aplicación
+def configure_logging(level=LOG_LEVEL):
+    """
+    Configura el logger 'cac_scouting' (y con él los de data_utils, export_utils,
+    sql_utils y report_utils) para que sus registros se muestren en la consola.
+    Streamlit vuelve a ejecutar el script en cada interacción, así que el
+    manejador solo se añade la primera vez.
+
+    Args:
+        level (str): Nivel mínimo de los registros
+    """
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        # Sin propagar a la raíz para no duplicar los registros si se configura
+        logger.propagate = False
+
+configure_logging()
+
 # Función para inicializar la base de datos
 def initialize_database():
     conn = sqlite3.connect(DB_FILE)
@@ -109,6 +150,18 @@ def initialize_database():
     )
     ''')
     
+    # Tabla de perfiles de puntuación compuesta guardados por los usuarios
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scoring_profiles (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL,
+        weights TEXT NOT NULL,
+        created_by INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    ''')
+    
     # Verificar si el usuario admin ya existe
     cursor.execute("SELECT id FROM users WHERE username = 'admin'")
     if not cursor.fetchone():
@@ -567,41 +620,41 @@ def get_news_from_db(limit=10):
 
 # Función mejorada para cargar datos y evitar duplicados
 @st.cache_data(ttl=3600)
-def load_all_player_data():
+def load_all_player_data(parallel=True):
     """
     Carga todos los datos de jugadores de los archivos Excel en la carpeta data,
-    eliminando duplicados.
+    eliminando duplicados. Los archivos se leen en paralelo con un pool de procesos
+    y los tiempos y filas de cada uno se registran en el log.
+    
+    Args:
+        parallel (bool): Si se leen los archivos en paralelo
     
     Returns:
         DataFrame: DataFrame combinado con todos los datos de jugadores
     """
     # Intentar cargar archivos de Excel
     try:
-        excel_files = list(DATA_DIR.glob("*.xlsx"))
+        excel_files = sorted(DATA_DIR.glob("*.xlsx"))
         if not excel_files:
             st.warning("No se encontraron archivos Excel en la carpeta 'data'")
             return pd.DataFrame()
             
-        st.info(f"Archivos Excel encontrados: {[f.name for f in excel_files]}")
+        logger.info("ingesta archivos=%s paralelo=%s", [f.name for f in excel_files], parallel)
         
         dfs = []
-        for file in excel_files:
-            try:
-                df = pd.read_excel(file)
-                # Verificar que el DataFrame tiene las columnas necesarias
-                if 'jugador' not in df.columns or 'equipo' not in df.columns:
-                    st.warning(f"El archivo {file.name} no tiene la estructura esperada (faltan columnas)")
-                    continue
-                
-                # Agregar columna con el nombre del archivo como fuente
-                df['data_source'] = file.name
-                
-                # Mostrar información del DataFrame
-                st.info(f"Archivo {file.name}: {df.shape[0]} jugadores, {df.shape[1]} columnas")
-                
-                dfs.append(df)
-            except Exception as e:
-                st.error(f"Error al cargar el archivo {file.name}: {e}")
+        for file, df, error in iter_player_files(excel_files, parallel=parallel):
+            if error is not None:
+                st.error(f"Error al cargar el archivo {file.name}: {error}")
+                continue
+            
+            # Verificar que el DataFrame tiene las columnas necesarias
+            if 'jugador' not in df.columns or 'equipo' not in df.columns:
+                st.warning(f"El archivo {file.name} no tiene la estructura esperada (faltan columnas)")
+                continue
+            
+            # Agregar columna con el nombre del archivo como fuente
+            df['data_source'] = file.name
+            dfs.append(df)
         
         # Combinar todos los dataframes
         if dfs:
@@ -610,10 +663,12 @@ def load_all_player_data():
             original_count = combined_df.shape[0]
             combined_df = combined_df.drop_duplicates(subset=['jugador', 'equipo'], keep='first')
             
-            # Informar sobre duplicados eliminados
+            # Ajustar los tipos de datos según el registro de esquema
+            combined_df = apply_schema(combined_df)
+            
+            # Registrar los duplicados eliminados
             duplicates_removed = original_count - combined_df.shape[0]
-            if duplicates_removed > 0:
-                st.info(f"Se eliminaron {duplicates_removed} registros duplicados")
+            logger.info("ingesta filas=%d duplicados_eliminados=%d", combined_df.shape[0], duplicates_removed)
             
             return combined_df
         
@@ -641,17 +696,240 @@ def load_specific_data(file_path):
             st.error(f"El archivo {file_path} no existe")
             return pd.DataFrame()
             
-        df = pd.read_excel(file_path)
+        # Se lee desde el sidecar Parquet si sigue siendo válido
+        df = read_player_file(file_path)
         
         # Verificar que el DataFrame tiene las columnas necesarias
         if 'jugador' not in df.columns or 'equipo' not in df.columns:
             st.warning(f"El archivo {file_path.name} no tiene la estructura esperada (faltan columnas)")
         
-        return df
+        # Ajustar los tipos de datos según el registro de esquema
+        return apply_schema(df)
     except Exception as e:
         st.error(f"Error al cargar el archivo {file_path.name}: {e}")
         return pd.DataFrame()
 
+# Función para obtener el conjunto de datos compartido por todas las sesiones
+@st.cache_resource(ttl=3600, show_spinner="Cargando datos de jugadores...")
+def get_player_dataset():
+    """
+    Carga el catálogo de competiciones una sola vez por proceso. Al usar
+    st.cache_resource todas las sesiones reciben el mismo objeto, sin copias.
+    
+    Returns:
+        PlayerDataset: Conjunto de datos compartido (solo lectura)
+    """
+    return load_player_dataset(DATA_DIR)
+
+# Función para obtener la caché de máscaras de filtros compartida entre sesiones
+@st.cache_resource
+def get_mask_cache():
+    """
+    Crea la caché LRU de máscaras por filtro, compartida por todas las sesiones.
+    
+    Returns:
+        MaskCache: Caché de máscaras
+    """
+    return MaskCache(max_entries=512)
+
+# Función para obtener el motor de consultas configurado
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_query_backend(version):
+    """
+    Crea el motor de consultas de QUERY_BACKEND para una versión del conjunto de
+    datos. Con el motor de pandas (o si DuckDB no está disponible) devuelve None.
+    
+    Args:
+        version (str): Versión del conjunto de datos
+    
+    Returns:
+        DuckDBBackend: Motor de consultas, o None
+    """
+    return create_query_backend(QUERY_BACKEND, get_player_dataset(), DATA_DIR)
+
+# Función para obtener las consultas SQL de una competición
+def get_query_view(comp):
+    """
+    Devuelve las consultas del motor configurado restringidas a una competición,
+    alineadas con los datos de load_competition_data.
+    
+    Args:
+        comp (str): Competición seleccionada
+    
+    Returns:
+        SQLView: Consultas de la competición, o None si se usa el motor de pandas
+    """
+    if QUERY_BACKEND == "pandas":
+        return None
+    dataset = get_player_dataset()
+    backend = get_query_backend(dataset.version)
+    return backend.view(comp) if backend is not None else None
+
+# Función para obtener los datos de una competición
+def load_competition_data(comp):
+    """
+    Devuelve los datos de la competición seleccionada a partir del conjunto de datos
+    compartido. "Todas" es el DataFrame combinado y el resto son cortes de filas del
+    mismo; en ningún caso se copian los datos, por lo que no deben modificarse.
+    
+    Args:
+        comp (str): Competición seleccionada
+    
+    Returns:
+        DataFrame: Datos de la competición
+    """
+    dataset = get_player_dataset()
+    
+    if dataset.frame.empty:
+        st.error("No se encontraron los archivos de competición. Por favor, asegúrate de que existen en la carpeta 'data'.")
+        # Intentar cargar cualquier archivo disponible
+        excel_files = list(DATA_DIR.glob("*.xlsx"))
+        if excel_files:
+            st.warning(f"Se cargará un archivo alternativo: {excel_files[0].name}")
+            return load_specific_data(excel_files[0])
+        st.stop()
+    
+    if comp != ALL_COMPETITIONS and comp not in dataset.ranges:
+        st.error(f"Archivo no encontrado: {COMPETITION_FILES[comp]}. Por favor, asegúrate de que existe en la carpeta 'data'.")
+        st.warning("Se cargarán todas las competiciones disponibles")
+    
+    return dataset.view(comp)
+
+# Función para obtener los índices precalculados de una competición
+def get_competition_indexes(comp):
+    """
+    Devuelve los índices (columnas ordenadas y bitmaps) alineados con los datos que
+    devuelve load_competition_data para la misma competición.
+    
+    Args:
+        comp (str): Competición seleccionada
+    
+    Returns:
+        ViewIndexes: Índices de la competición, o None si no hay conjunto de datos
+    """
+    dataset = get_player_dataset()
+    if dataset.frame.empty:
+        return None
+    return dataset.view_indexes(comp)
+
+# Función para obtener el perfil de columnas de una competición
+def get_competition_profile(comp, df):
+    """
+    Devuelve el perfil precalculado de las columnas (tipo, mínimo, máximo, valores
+    distintos...) de los datos de la competición. Si no hay conjunto de datos
+    compartido se calcula sobre el DataFrame recibido.
+    
+    Args:
+        comp (str): Competición seleccionada
+        df (DataFrame): Datos devueltos por load_competition_data
+    
+    Returns:
+        dict: Columna -> perfil
+    """
+    dataset = get_player_dataset()
+    if dataset.frame.empty:
+        return build_column_profile(df)
+    return dataset.column_profile(comp)
+
+# Función para obtener los percentiles precalculados de una competición
+def get_percentile_table(comp, df):
+    """
+    Devuelve la tabla de percentiles por posición y minutos de los datos de la
+    competición. Si no hay conjunto de datos compartido se calcula sobre el
+    DataFrame recibido.
+    
+    Args:
+        comp (str): Competición seleccionada
+        df (DataFrame): Datos devueltos por load_competition_data
+    
+    Returns:
+        PercentileTable: Percentiles precalculados
+    """
+    dataset = get_player_dataset()
+    if dataset.frame.empty:
+        return PercentileTable(df)
+    return dataset.percentile_table(comp)
+
+# Función para obtener las estadísticas de normalización de una competición
+def get_metric_stats(comp, df):
+    """
+    Devuelve las estadísticas (mínimo, máximo, media, desviación y cuantiles) por
+    métrica y posición de los datos de la competición. Si no hay conjunto de datos
+    compartido se calculan sobre el DataFrame recibido.
+    
+    Args:
+        comp (str): Competición seleccionada
+        df (DataFrame): Datos devueltos por load_competition_data
+    
+    Returns:
+        MetricStats: Estadísticas de normalización
+    """
+    dataset = get_player_dataset()
+    if dataset.frame.empty:
+        return MetricStats(df)
+    return dataset.metric_stats(comp)
+
+# Función para obtener el índice de similitud de una competición
+def get_similarity_index(comp, df):
+    """
+    Devuelve el índice de similitud entre jugadores (métricas de VIZ_METRIC_GROUPS
+    estandarizadas) de los datos de la competición. Si no hay conjunto de datos
+    compartido se calcula sobre el DataFrame recibido.
+    
+    Args:
+        comp (str): Competición seleccionada
+        df (DataFrame): Datos devueltos por load_competition_data
+    
+    Returns:
+        SimilarityIndex: Índice de similitud
+    """
+    dataset = get_player_dataset()
+    if dataset.frame.empty:
+        return SimilarityIndex(df, VIZ_METRIC_GROUPS)
+    return dataset.similarity_index(comp)
+
+# Función para obtener la matriz de puntuaciones compuestas de una competición
+def get_composite_scorer(comp, df):
+    """
+    Devuelve las métricas estandarizadas con las que se evalúan los perfiles de
+    puntuación compuesta, construidas una sola vez por versión del conjunto de
+    datos. Si no hay conjunto de datos compartido se calculan sobre el DataFrame
+    recibido.
+    
+    Args:
+        comp (str): Competición seleccionada
+        df (DataFrame): Datos devueltos por load_competition_data
+    
+    Returns:
+        CompositeScorer: Matriz de puntuaciones compuestas
+    """
+    dataset = get_player_dataset()
+    if dataset.frame.empty:
+        return CompositeScorer(df, lower_is_better=LOWER_IS_BETTER_METRICS)
+    return dataset.composite_scorer(comp)
+
+# Función para buscar jugadores por nombre o equipo
+def search_players(df, view_indexes, query, limit=50):
+    """
+    Busca jugadores por nombre o equipo usando el índice de trigramas (sin distinguir
+    mayúsculas ni acentos y tolerando erratas). Sin índice se recorre la columna.
+    
+    Args:
+        df (DataFrame): Datos de la competición
+        view_indexes (ViewIndexes): Índices alineados con df (o None)
+        query (str): Texto a buscar
+        limit (int): Número máximo de jugadores
+    
+    Returns:
+        list: Nombres de los jugadores encontrados
+    """
+    if view_indexes is not None:
+        rows = view_indexes.search_players(query)
+        players = df['jugador'].iloc[rows]
+    else:
+        players = df.loc[df['jugador'].astype(str).str.contains(query, case=False, na=False, regex=False), 'jugador']
+    return list(dict.fromkeys(players.dropna().tolist()))[:limit]
+
 # Función para detectar y eliminar duplicados
 def remove_duplicates(df):
     """
@@ -685,7 +963,7 @@ def remove_duplicates(df):
     return df_cleaned
 
 # Función para preparar los datos para el radar chart
-def prepare_radar_data(df, player_name, metrics):
+def prepare_radar_data(df, player_name, metrics, metric_stats=None):
     """
     Prepara los datos para el radar chart, normalizando los valores.
     
@@ -693,6 +971,7 @@ def prepare_radar_data(df, player_name, metrics):
         df (DataFrame): DataFrame con los datos de los jugadores
         player_name (str): Nombre del jugador
         metrics (list): Lista de métricas a visualizar
+        metric_stats (MetricStats, optional): Estadísticas de normalización de df
     
     Returns:
         tuple: (valores normalizados, métricas disponibles)
@@ -711,6 +990,9 @@ def prepare_radar_data(df, player_name, metrics):
         st.error("Ninguna de las métricas seleccionadas está disponible en los datos")
         return None, None
     
+    # Estadísticas de normalización (mínimo y máximo de cada métrica)
+    stats = stats_for(df, available_metrics, metric_stats)
+    
     # Normalizar valores para el radar chart
     normalized_values = []
     raw_values = []
@@ -722,14 +1004,8 @@ def prepare_radar_data(df, player_name, metrics):
             
             # Normalizar solo si es un valor válido
             if pd.notna(value) and pd.api.types.is_numeric_dtype(df[metric]):
-                min_val = df[metric].min()
-                max_val = df[metric].max()
-                
-                if max_val > min_val:
-                    norm_value = (value - min_val) / (max_val - min_val)
-                    normalized_values.append(norm_value)
-                else:
-                    normalized_values.append(0.5)  # Valor por defecto
+                # Mínimo-máximo de la métrica (0.5 si todos los valores son iguales)
+                normalized_values.append(stats.normalize(metric, value))
             else:
                 normalized_values.append(0)  # Valor por defecto para no numéricos
         except Exception as e:
@@ -741,110 +1017,47 @@ def prepare_radar_data(df, player_name, metrics):
 # Función para generar informe PDF
 def generate_report_pdf(report_data):
     try:
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        report_elements = []
-        
-        # Estilos personalizados
-        title_style = ParagraphStyle(
-            'TitleStyle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            alignment=1,  # Centrado
-            spaceAfter=20
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'SubtitleStyle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=10
-        )
-        
-        normal_style = styles['Normal']
-        
-        # Título del informe
-        report_elements.append(Paragraph(f"INFORME DE SCOUTING - {report_data['player_name']}", title_style))
-        report_elements.append(Spacer(1, 0.25*inch))
-        
-        # Datos del partido
-        match_data = [
-            ["Fecha del partido:", report_data['match_date']],
-            ["Equipo local:", report_data['local_team']],
-            ["Equipo visitante:", report_data['visitor_team']],
-            ["Resultado:", report_data['result']]
-        ]
-        match_table = Table(match_data, colWidths=[2.5*inch, 3*inch])
-        match_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.black),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('BACKGROUND', (1, 0), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        report_elements.append(match_table)
-        report_elements.append(Spacer(1, 0.25*inch))
-        
-        # Datos del jugador
-        player_data = [
-            ["Jugador:", report_data['player_name']],
-            ["Club:", report_data['player_club']],
-            ["Posición:", report_data['position']],
-            ["Valoración general:", f"{report_data['overall_rating']}/10"],
-            ["Titular:", "Sí" if report_data['is_starter'] else "No"],
-            ["Minutos jugados:", f"{report_data['minutes_played']}"]
-        ]
-        player_table = Table(player_data, colWidths=[2.5*inch, 3*inch])
-        player_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.black),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('BACKGROUND', (1, 0), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        report_elements.append(player_table)
-        report_elements.append(Spacer(1, 0.25*inch))
-        
-        # Secciones de análisis
-        sections = [
-            ("ASPECTOS TÉCNICOS", report_data['technical_aspects']),
-            ("ASPECTOS TÁCTICOS", report_data['tactical_aspects']),
-            ("ASPECTOS FÍSICOS", report_data['physical_aspects']),
-            ("ASPECTOS PSICOLÓGICOS", report_data['psychological_aspects']),
-            ("OBSERVACIONES", report_data['observations'])
-        ]
-        
-        for title, content in sections:
-            report_elements.append(Paragraph(title, subtitle_style))
-            report_elements.append(Paragraph(content, normal_style))
-            report_elements.append(Spacer(1, 0.25*inch))
-        
-        # Agregar foto si existe
-        if report_data['photo_path'] and os.path.exists(report_data['photo_path']):
-            try:
-                img = Image(report_data['photo_path'], width=3*inch, height=4*inch)
-                report_elements.append(img)
-            except:
-                report_elements.append(Paragraph("Error al cargar la imagen del jugador", normal_style))
-        
-        # Agregar fecha de generación del informe
-        report_elements.append(Spacer(1, 0.5*inch))
-        report_elements.append(Paragraph(f"Informe generado el {report_data['report_date']}", normal_style))
-        
-        # Construir el PDF
-        doc.build(report_elements)
-        buffer.seek(0)
-        return buffer
+        return render_report_pdf(report_data)
     
     except Exception as e:
         st.error(f"Error al generar el PDF: {e}")
         return None
 
+# Función para obtener la caché de PDF de informes compartida entre sesiones
+@st.cache_resource
+def get_pdf_cache():
+    """
+    Crea la caché en disco de los PDF de informes (en REPORTS_DIR), compartida por
+    todas las sesiones.
+    
+    Returns:
+        ReportPDFCache: Caché de PDF
+    """
+    return ReportPDFCache(REPORTS_DIR / PDF_CACHE_DIRNAME)
+
+# Función para crear la descarga diferida del PDF de un informe
+def report_pdf_download(report_data):
+    """
+    Devuelve una función sin argumentos que obtiene el PDF del informe solo cuando
+    se pulsa el botón de descarga, en lugar de en cada ejecución de la página. El
+    PDF se lee de la caché en disco si ya se generó con el mismo contenido.
+    
+    Args:
+        report_data (dict): Datos del informe (los de la lista bastan)
+    
+    Returns:
+        callable: Función que devuelve el PDF
+    """
+    pdf_cache = get_pdf_cache()
+    
+    def build():
+        pdf_bytes = pdf_cache.get_or_render(report_data, generate_report_pdf)
+        if pdf_bytes is None:
+            raise RuntimeError(f"No se pudo generar el PDF del informe de {report_data['player_name']}")
+        return pdf_bytes
+    
+    return build
+
 # Función para guardar un informe en la base de datos
 def save_report_to_db(report_data):
     conn = sqlite3.connect(DB_FILE)
@@ -891,8 +1104,9 @@ def get_reports_from_db(limit=50, offset=0, player_filter=None):
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
+    # El total de informes sale de la misma consulta (función de ventana)
     query = '''
-    SELECT r.*, u.username as scout_name
+    SELECT r.*, u.username as scout_name, COUNT(*) OVER () as total_reports
     FROM scouting_reports r
     JOIN users u ON r.created_by = u.id
     '''
@@ -909,21 +1123,105 @@ def get_reports_from_db(limit=50, offset=0, player_filter=None):
     cursor.execute(query, params)
     reports = [dict(row) for row in cursor.fetchall()]
     
-    # Contar el total de informes
-    count_query = "SELECT COUNT(*) FROM scouting_reports"
-    count_params = []
+    if reports:
+        total_reports = reports[0]['total_reports']
+    else:
+        # Página fuera de rango: contar aparte
+        count_query = "SELECT COUNT(*) FROM scouting_reports r JOIN users u ON r.created_by = u.id"
+        count_params = []
+        
+        if player_filter:
+            count_query += " WHERE r.player_name LIKE ?"
+            count_params.append(f"%{player_filter}%")
+        
+        cursor.execute(count_query, count_params)
+        total_reports = cursor.fetchone()[0]
+    
+    conn.close()
+    
+    return reports, total_reports
+
+# Función para obtener los informes de una exportación masiva
+def get_reports_for_export(player_filter=None, date_from=None, date_to=None, scout_id=None, player_name=None):
+    """
+    Devuelve en una sola consulta los informes que cumplen los filtros, ordenados
+    por fecha del partido.
+    
+    Args:
+        player_filter (str, optional): Texto contenido en el nombre del jugador
+        player_name (str, optional): Nombre exacto del jugador
+        date_from (date, optional): Fecha del partido mínima
+        date_to (date, optional): Fecha del partido máxima
+        scout_id (int, optional): Id del usuario que creó los informes
+    
+    Returns:
+        list: Datos de los informes
+    """
+    conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    # match_date se guarda como dd/mm/aaaa: se pasa a aaaa-mm-dd para comparar y ordenar
+    iso_date = "substr(r.match_date, 7, 4) || '-' || substr(r.match_date, 4, 2) || '-' || substr(r.match_date, 1, 2)"
+    
+    query = f'''
+    SELECT r.*, u.username as scout_name
+    FROM scouting_reports r
+    JOIN users u ON r.created_by = u.id
+    WHERE 1 = 1
+    '''
+    params = []
+    
+    if player_filter:
+        query += " AND r.player_name LIKE ?"
+        params.append(f"%{player_filter}%")
+    if player_name:
+        query += " AND r.player_name = ?"
+        params.append(player_name)
+    if date_from:
+        query += f" AND {iso_date} >= ?"
+        params.append(date_from.isoformat())
+    if date_to:
+        query += f" AND {iso_date} <= ?"
+        params.append(date_to.isoformat())
+    if scout_id:
+        query += " AND r.created_by = ?"
+        params.append(scout_id)
+    
+    query += f" ORDER BY {iso_date}, r.id"
+    
+    cursor.execute(query, params)
+    reports = [dict(row) for row in cursor.fetchall()]
+    
+    conn.close()
+    return reports
+
+# Función para obtener los jugadores con informes (en caché hasta que cambian los informes o los usuarios)
+@st.cache_data(ttl=3600)
+def get_reported_players(player_filter=None):
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    # Mismo JOIN que get_reports_for_export: solo se ofrecen los informes que el dossier puede leer
+    query = '''
+    SELECT r.player_name, COUNT(*)
+    FROM scouting_reports r
+    JOIN users u ON r.created_by = u.id
+    '''
+    params = []
     
     if player_filter:
-        count_query += " WHERE player_name LIKE ?"
-        count_params.append(f"%{player_filter}%")
+        query += " WHERE r.player_name LIKE ?"
+        params.append(f"%{player_filter}%")
     
-    cursor.execute(count_query, count_params)
-    total_reports = cursor.fetchone()[0]
+    query += " GROUP BY r.player_name ORDER BY r.player_name"
+    
+    cursor.execute(query, params)
+    players = dict(cursor.fetchall())
     
     conn.close()
+    return players
     
-    return reports, total_reports
-
 # Función para obtener un informe específico
 def get_report_by_id(report_id):
     conn = sqlite3.connect(DB_FILE)
@@ -979,24 +1277,38 @@ def generate_comparison_table(player_data, metrics, player_names):
     return comparison_df
 
 # Función para generar ranking de jugadores según métricas
-def generate_player_ranking(player_data, metric, min_minutes=0, position=None, limit=20):
+def generate_player_ranking(player_data, metric, min_minutes=0, position=None, limit=20, sorted_index=None, query_view=None, ascending=False):
     if metric not in player_data.columns:
         st.error(f"La métrica '{metric}' no está disponible en los datos")
         return None
     
-    # Filtrar por minutos jugados
-    filtered_data = player_data[player_data['min'] >= min_minutes].copy()
-    
-    # Filtrar por posición si se especifica
-    if position and position != "Todas":
-        filtered_data = filtered_data[filtered_data['pos'] == position]
-    
-    if filtered_data.empty:
-        st.error("No hay datos que cumplan con los filtros especificados")
-        return None
-    
-    # Ordenar por la métrica seleccionada (descendente)
-    ranked_data = filtered_data.sort_values(by=metric, ascending=False).head(limit)
+    if query_view is not None:
+        # Ranking ejecutado en SQL por el motor configurado
+        ranked_rows = query_view.top_n(metric, limit, min_minutes=min_minutes, position=position, ascending=ascending)
+        if len(ranked_rows) == 0:
+            st.error("No hay datos que cumplan con los filtros especificados")
+            return None
+        ranked_data = player_data.iloc[ranked_rows]
+    else:
+        # Filtrar por minutos jugados (con el índice ordenado si está disponible)
+        mask = min_minutes_mask(player_data, min_minutes, sorted_index)
+        
+        # Filtrar por posición si se especifica
+        if position and position != "Todas":
+            mask &= (player_data['pos'] == position).to_numpy(dtype=bool)
+        
+        if not mask.any():
+            st.error("No hay datos que cumplan con los filtros especificados")
+            return None
+        
+        # Ordenar por la métrica seleccionada (descendente, o ascendente si un valor menor es mejor)
+        if sorted_index is not None and metric in sorted_index and sorted_index.n_rows == len(player_data):
+            # Leer el top directamente del orden precalculado
+            ranked_rows = sorted_index.top_n(metric, limit, mask=mask, ascending=ascending)
+        else:
+            # Selección parcial del top sin ordenar todas las filas
+            ranked_rows = top_k_rows(player_data[metric].to_numpy(dtype=np.float64, na_value=np.nan), limit, mask, ascending)
+        ranked_data = player_data.iloc[ranked_rows]
     
     # Seleccionar columnas para mostrar
     display_columns = ['jugador', 'equipo', 'pos', 'min']
@@ -1007,6 +1319,111 @@ def generate_player_ranking(player_data, metric, min_minutes=0, position=None, l
     
     return ranked_data
 
+# Función para generar un ranking por perfiles de puntuación compuesta
+def generate_profile_ranking(player_data, scorer, profiles, sort_profile, min_minutes=0, position=None, limit=20, sorted_index=None):
+    """
+    Puntúa a todos los jugadores en varios perfiles a la vez y devuelve el top
+    según uno de ellos, con la puntuación de cada perfil en una columna.
+    
+    Args:
+        player_data (DataFrame): Datos de jugadores
+        scorer (CompositeScorer): Matriz de puntuaciones alineada con player_data
+        profiles (dict): Perfil -> {métrica: peso}
+        sort_profile (str): Perfil por el que se ordena
+        min_minutes (int): Mínimo de minutos jugados
+        position (str, optional): Posición
+        limit (int): Número de jugadores
+        sorted_index (SortedColumnIndex, optional): Índice de columnas ordenadas
+    
+    Returns:
+        DataFrame: Ranking, o None si no hay jugadores que cumplan los filtros
+    """
+    mask = min_minutes_mask(player_data, min_minutes, sorted_index)
+    if position and position != "Todas":
+        mask &= (player_data['pos'] == position).to_numpy(dtype=bool)
+    
+    if not mask.any():
+        st.error("No hay datos que cumplan con los filtros especificados")
+        return None
+    
+    scores = scorer.scores(profiles)
+    ranked_rows = top_k_rows(scores[:, list(profiles).index(sort_profile)], limit, mask)
+    
+    ranked_data = player_data.iloc[ranked_rows][['jugador', 'equipo', 'pos', 'min']].copy()
+    for j, profile in enumerate(profiles):
+        ranked_data[profile] = scores[ranked_rows, j].round(2)
+    
+    return ranked_data
+
+# Función para obtener los perfiles de puntuación (predefinidos y guardados, con su creador)
+def get_scoring_profiles():
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT name, weights, created_by FROM scoring_profiles ORDER BY name")
+    rows = cursor.fetchall()
+    
+    conn.close()
+    saved = {name: json.loads(weights) for name, weights, _ in rows}
+    owners = {name: created_by for name, _, created_by in rows}
+    return {**SCORING_PROFILES, **saved}, owners
+
+# Función para guardar un perfil de puntuación
+def save_scoring_profile(name, weights, user_id):
+    try:
+        if name in SCORING_PROFILES:
+            return False, "Ya existe un perfil predefinido con ese nombre"
+        
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        
+        # Solo quien creó un perfil puede sobrescribirlo
+        cursor.execute("SELECT created_by FROM scoring_profiles WHERE name = ?", (name,))
+        existing = cursor.fetchone()
+        if existing and existing[0] != user_id:
+            conn.close()
+            return False, "Ya existe un perfil con ese nombre creado por otro usuario"
+        
+        if existing:
+            cursor.execute(
+                "UPDATE scoring_profiles SET weights = ? WHERE name = ?",
+                (json.dumps(weights), name)
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO scoring_profiles (name, weights, created_by) VALUES (?, ?, ?)",
+                (name, json.dumps(weights), user_id)
+            )
+        
+        conn.commit()
+        conn.close()
+        return True, "Perfil actualizado correctamente" if existing else "Perfil guardado correctamente"
+    
+    except Exception as e:
+        return False, f"Error al guardar el perfil: {e}"
+
+# Función para eliminar un perfil de puntuación guardado
+def delete_scoring_profile(name, user_id, is_admin=False):
+    try:
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        
+        # Solo quien creó el perfil o un administrador pueden eliminarlo
+        if is_admin:
+            cursor.execute("DELETE FROM scoring_profiles WHERE name = ?", (name,))
+        else:
+            cursor.execute("DELETE FROM scoring_profiles WHERE name = ? AND created_by = ?", (name, user_id))
+        deleted = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        if not deleted:
+            return False, "Solo puedes eliminar los perfiles que has creado"
+        return True, "Perfil eliminado correctamente"
+    
+    except Exception as e:
+        return False, f"Error al eliminar el perfil: {e}"
+
 # Función para crear un usuario
 def create_user(username, password, role):
     try:
@@ -1033,7 +1450,8 @@ def create_user(username, password, role):
     except Exception as e:
         return False, f"Error al crear usuario: {e}"
 
-# Función para obtener la lista de usuarios
+# Función para obtener la lista de usuarios (en caché hasta que se crea o elimina uno)
+@st.cache_data(ttl=3600)
 def get_users():
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
@@ -1179,100 +1597,22 @@ def show_database():
     st.write("Aquí puedes filtrar y visualizar datos de jugadores de las diferentes competiciones.")
     
     # Selector de competición
-    comp_options = {
-        "Todas": "wyscout_1ra_2da_RFEF_limpio.xlsx",
-        "1ra RFEF": "wyscout_1ra_RFEF_limpio.xlsx",
-        "2da RFEF": "wyscout_2da_RFEF_limpio.xlsx"
-    }
-    
-    comp = st.selectbox("Competición", list(comp_options.keys()))
+    comp = st.selectbox("Competición", get_competition_options())
     season = st.selectbox("Temporada", ["24/25"])
     
     # Cargar datos según competición seleccionada
-    data_file = comp_options[comp]
-    data_path = DATA_DIR / data_file
-    
-    if not data_path.exists():
-        st.error(f"Archivo no encontrado: {data_file}. Por favor, asegúrate de que existe en la carpeta 'data'.")
-        # Intentar cargar cualquier archivo disponible
-        excel_files = list(DATA_DIR.glob("*.xlsx"))
-        if excel_files:
-            data_path = excel_files[0]
-            st.warning(f"Se cargará un archivo alternativo: {data_path.name}")
-        else:
-            st.stop()
-    
-    # Cargar el dataframe
-    @st.cache_data(ttl=3600)
-    def load_specific_data(file_path):
-        try:
-            df = pd.read_excel(file_path)
-            return df
-        except Exception as e:
-            st.error(f"Error al cargar el archivo: {e}")
-            return pd.DataFrame()
-    
-    df = load_specific_data(data_path)
+    df = load_competition_data(comp)
+    view_indexes = get_competition_indexes(comp)
+    query_view = get_query_view(comp)
     
     if df.empty:
         st.warning("No hay datos disponibles. Por favor, comprueba los archivos en la carpeta 'data'.")
         st.stop()
     
-    # Definir los grupos de columnas
-    column_groups = {
-        "GENERAL": [
-            "jugador", "equipo", "pos", "pos_secun", "pj", "min", 
-            "anio_nac", "edad", "pais_nat", "pasap", "valor_tm",
-            "fin_contrato", "prestamo", "alt_cm", "peso_kg", "pie"
-        ],
-        "FASE DEFENSIVA": [
-            "acc_def/90", "duelos_def/90", "duelos_def_w_pct",
-            "duelos_aer/90", "duelos_aer_w_pct", "entradas/90",
-            "posesion_tras_entrada", "tiros_int/90",
-            "interc/90", "posesion_tras_interc",
-            "faltas/90", "TA", "TA/90", "TR", "TR/90", "duelos/90", "duelos_w_pct"
-        ],
-        "FASE OFENSIVA": [
-            "goles", "goles/90", "goles_exc_pen", "goles_exc_pen/90",
-            "goles_cabeza", "goles_cabeza/90", "remates", "remates/90", 
-            "remates_port_pct", "xg", "xg/90", "goles_conv_pct", "desmarq/90",
-            "desmarq_pct", "duelos_atq/90", "duelos_atq_w_pct",
-            "toques_area_pen/90", "carreras_prog/90", "acel/90",
-            "regates/90", "regates_pct", "centros/90",
-            "centros_prec_pct", "centros_izq/90", "centros_izq_pct",
-            "centros_der/90", "centros_der_pct",
-            "centros_area_peq/90", "centros_ult_terc/90", "acc_atq/90", 
-            "atq_prof/90", "faltas_rec/90"
-        ],
-        "ORGANIZACIÓN": [
-            "asis", "asis/90", "xa", "xa/90", "pases/90", "pases_pct", 
-            "pases_adel/90", "pases_adel_pct", "pases_atras/90", "pases_atras_pct",
-            "pases_lat/90", "pases_lat_pct", "long_media_pases_m", 
-            "long_media_pases_larg_m", "pases_rec/90", "pases_cor_med/90", 
-            "pases_cor_med_pct", "pases_larg/90", "pases_larg_pct",
-            "pases_prog/90", "pases_prog_pct", "pases_larg_rec/90"
-        ],
-        "PASES CLAVES": [
-            "pases_ult_terc/90", "pases_ult_terc_pct",
-            "jugadas_claves/90", "asis_disparo/90",
-            "2da_asis/90", "3ra_asis/90", "pases_area_pen/90",
-            "pases_area_peq_pct", "pases_prof/90", "pases_prof_pct" 
-        ],
-        "PORTERO": [
-            "goles_recibidos", "goles_rec/90",
-            "remates_en_contra", "remates_contra/90",
-            "port_imbat/90", "paradas_pct",
-            "xg_contra", "xg_contra/90",
-            "goles_evitados", "goles_evit/90",
-            "pases_rec_arq/90", "salidas/90",
-            "duelos_aer_portero/90"
-        ],
-        "BALÓN PARADO": [
-            "tiros_libres/90", "tiros_libres_direct/90",
-            "tiros_libre_direc_pct", "corners/90",
-            "penaltis_a_favor", "penaltis_conv_pct"
-        ]
-    }
+    column_profile = get_competition_profile(comp, df)
+    
+    # Grupos de columnas definidos en el registro de esquema
+    column_groups = COLUMN_GROUPS
     
     # Inicializar session_state si no existe
     if '_col_sel' not in st.session_state:
@@ -1332,12 +1672,22 @@ def show_database():
         rpp = st.session_state.rows_per_page_db
         if st.session_state.page * rpp < total:
             st.session_state.page += 1
-    
-    @st.cache_data(ttl=3600, show_spinner=False)
-    def generate_filter_types(df, column_groups):
+
+    def sort_callback():
+        st.session_state.page = 1
+
+    def rows_per_page_callback():
+        # Mantener visible la primera fila de la página actual con el nuevo tamaño
+        old_rpp = st.session_state.rows_per_page_db
+        first_row = (st.session_state.page - 1) * old_rpp
+        st.session_state.rows_per_page_db = st.session_state.rows_per_page_db_selector
+        st.session_state.page = first_row // st.session_state.rows_per_page_db + 1
+    
+    def generate_filter_types(column_profile, column_groups):
         """
-        Genera dinámicamente los tipos de filtros basados en las columnas del DataFrame
-        y la estructura de grupos de columnas existente, con detección automática de formato.
+        Genera dinámicamente los tipos de filtros a partir del perfil precalculado de
+        las columnas y la estructura de grupos de columnas existente, con detección
+        automática de formato. Solo hace búsquedas en diccionarios, sin recorrer datos.
         """
         filter_types = {}
         
@@ -1346,17 +1696,19 @@ def show_database():
             filter_types[group_name] = {}
             
             # Solo incluir columnas que existan en el DataFrame
-            valid_columns = [col for col in columns if col in df.columns]
+            valid_columns = [col for col in columns if col in column_profile]
             
             for col in valid_columns:
+                col_profile = column_profile[col]
+                
                 # Determinar el tipo de filtro basado en el tipo de datos
-                if pd.api.types.is_numeric_dtype(df[col].dtype):
+                if col_profile["kind"] == "numeric":
                     # Para columnas numéricas
-                    min_val = float(df[col].min()) if not pd.isna(df[col].min()) else 0
-                    max_val = float(df[col].max()) if not pd.isna(df[col].max()) else 100
+                    min_val = col_profile["min"] if col_profile["min"] is not None else 0
+                    max_val = col_profile["max"] if col_profile["max"] is not None else 100
                     
                     # Determinar automáticamente formato y step según nombre y valores
-                    column_format, step = determine_format_and_step(col, df[col])
+                    column_format, step = determine_format_and_step(col, col_profile)
                     
                     # Si es necesario redondear los valores límite según el formato
                     if column_format == "%d":  # Si es entero
@@ -1371,21 +1723,19 @@ def show_database():
                         "format": column_format
                     }
                 
-                elif pd.api.types.is_string_dtype(df[col].dtype) or pd.api.types.is_object_dtype(df[col].dtype):
-                    # Para columnas de texto
-                    unique_values = df[col].dropna().unique()
-                    
+                elif col_profile["kind"] == "text":
+                    # Para columnas de texto (o categóricas)
                     # Si hay pocos valores únicos, usar multiselect
-                    if len(unique_values) <= 50:  # umbral arbitrario
+                    if col_profile["cardinality"] <= 50:  # umbral arbitrario
                         filter_types[group_name][col] = {
                             "type": "multiselect",
-                            "options": sorted(unique_values.tolist())
+                            "options": col_profile["unique"]
                         }
                     else:
                         # Para texto con muchos valores únicos, usar búsqueda de texto
                         filter_types[group_name][col] = {"type": "text"}
                 
-                elif pd.api.types.is_bool_dtype(df[col].dtype):
+                elif col_profile["kind"] == "bool":
                     # Para columnas booleanas
                     filter_types[group_name][col] = {"type": "toggle"}
                 
@@ -1396,9 +1746,9 @@ def show_database():
         # Personalizar algunos filtros específicos que necesiten ajustes especiales
         special_cases = {
             "jugador": {"type": "text"},
-            "equipo": {"type": "multiselect", "options": sorted(df["equipo"].dropna().unique().tolist()) if "equipo" in df.columns else []},
-            "pos": {"type": "multiselect", "options": sorted(df["pos"].dropna().unique().tolist()) if "pos" in df.columns else []},
-            "pie": {"type": "multiselect", "options": sorted(df["pie"].dropna().unique().tolist()) if "pie" in df.columns else []}
+            "equipo": {"type": "multiselect", "options": column_profile.get("equipo", {}).get("unique", [])},
+            "pos": {"type": "multiselect", "options": column_profile.get("pos", {}).get("unique", [])},
+            "pie": {"type": "multiselect", "options": column_profile.get("pie", {}).get("unique", [])}
         }
         
         # Aplicar casos especiales
@@ -1409,13 +1759,13 @@ def show_database():
         
         return filter_types
 
-    def determine_format_and_step(column_name, series):
+    def determine_format_and_step(column_name, col_profile):
         """
         Determina automáticamente el formato y step más adecuado para una columna.
         
         Args:
             column_name: Nombre de la columna
-            series: Series de pandas con los datos
+            col_profile: Perfil precalculado de la columna
         
         Returns:
             tuple: (formato, step)
@@ -1436,17 +1786,10 @@ def show_database():
         # Patrones para porcentajes
         percentage_patterns = ['pct', '%', 'porc', 'conv']
         
-        # Analizar también los datos reales
-        has_decimals = False
-        non_integer_values = False
-        
-        # Verificar si la serie contiene valores decimales
-        if not series.empty:
-            sample = series.dropna().head(100)  # Tomar una muestra para análisis
-            has_decimals = any(x != int(x) for x in sample if pd.notna(x))
-            if has_decimals:
-                # Verificar si los decimales son significativos (no solo .0)
-                non_integer_values = any(abs(x - round(x)) > 0.01 for x in sample if pd.notna(x))
+        # Datos reales, analizados sobre toda la columna al construir el perfil
+        has_decimals = col_profile.get("has_decimals", False)
+        # Decimales significativos (no solo .0)
+        non_integer_values = col_profile.get("significant_decimals", False)
         
         # Decisión basada en nombre de columna y datos reales
         if any(pattern in col_lower for pattern in integer_patterns) and not non_integer_values:
@@ -1477,7 +1820,7 @@ def show_database():
         st.subheader("Filtros")
         
         # Generar los filtros dinámicamente
-        filter_types = generate_filter_types(df, column_groups)
+        filter_types = generate_filter_types(column_profile, column_groups)
         
         # Botón para abrir el panel de selección de filtros
         def open_filter_panel():
@@ -1562,11 +1905,15 @@ def show_database():
                             # Obtener valores actuales
                             current_values = temp_filter_values[fname]
                             
+                            # Recuento de jugadores por opción desde el índice de bitmaps
+                            option_counts = view_indexes.bitmap.counts(fname) if view_indexes else {}
+                            
                             # Crear multiselect
                             new_sel = st.multiselect(
                                 f"Seleccionar {fname}",
                                 options=f_info["options"],
                                 default=current_values,
+                                format_func=lambda v, c=option_counts: f"{v} ({c[v]})" if v in c else str(v),
                                 key=f"temp_filter_{fname}"
                             )
                             
@@ -1759,68 +2106,101 @@ def show_database():
                 if not st.session_state.open_filters:
                     filter_panel.empty()
 
-        # Aplicar filtros antes de mostrar el DataFrame
-        df_filtered = df.copy()
-        
-        if st.session_state.active_filters:
-            for filter_name in st.session_state.active_filters:
-                if filter_name not in st.session_state.filter_values:
-                    continue
-                    
-                filter_value = st.session_state.filter_values[filter_name]
-                
-                for category, filters in filter_types.items():
-                    if filter_name in filters:
-                        filter_info = filters[filter_name]
-                        
-                        if filter_name in df_filtered.columns:
-                            if filter_info["type"] == "text" and filter_value:
-                                # Búsqueda de texto con case insensitive
-                                df_filtered = df_filtered[df_filtered[filter_name].astype(str).str.contains(
-                                    filter_value, case=False, na=False)]
-                            
-                            elif filter_info["type"] == "range":
-                                lo, hi = filter_value  # Ya tenemos los valores en session_state
-                                df_filtered = df_filtered[(df_filtered[filter_name] >= lo) & 
-                                                        (df_filtered[filter_name] <= hi)]
-                            
-                            elif filter_info["type"] == "multiselect" and filter_value:
-                                df_filtered = df_filtered[df_filtered[filter_name].isin(filter_value)]
-                            
-                            elif filter_info["type"] == "toggle" and filter_value:
-                                df_filtered = df_filtered[df_filtered[filter_name] == True]
+        # Compilar los filtros activos en un plan y evaluarlo en una sola máscara.
+        # Las filas resultantes se reutilizan mientras el plan no cambie
+        # (cambios de página o de columnas no vuelven a filtrar).
+        filter_plan = compile_filter_plan(
+            st.session_state.active_filters,
+            st.session_state.filter_values,
+            filter_types
+        )
+        data_key = (get_player_dataset().version, comp)
+        plan_key = (data_key, filter_plan)
+        cached_result = st.session_state.get('db_filter_result')
+        if cached_result is None or cached_result[0] != plan_key:
+            if query_view is not None:
+                # Plan traducido a SQL y ejecutado por el motor configurado
+                filtered_rows = query_view.filter_rows(filter_plan)
+            else:
+                # Solo se recalculan las máscaras de los filtros que han cambiado
+                filter_mask = evaluate_filter_plan(
+                    df, filter_plan, mask_cache=get_mask_cache(), data_key=data_key,
+                    indexes=view_indexes
+                )
+                filtered_rows = np.flatnonzero(filter_mask)
+            st.session_state.db_filter_result = (plan_key, filtered_rows)
+        else:
+            filtered_rows = cached_result[1]
 
         # UNA SOLA TABLA
         sel = st.session_state._col_sel
         if not sel:
             st.warning("Selecciona al menos una columna.")
             st.stop()
-        df_sel = df_filtered[sel]
+        
+        # Orden global de todas las filas filtradas (no solo de la página visible)
+        sort_options = [None] + list(df.columns)
+        col_sort, col_dir = st.columns([3, 1])
+        with col_sort:
+            sort_col = st.selectbox(
+                "Ordenar por",
+                sort_options,
+                format_func=lambda c: "Sin ordenar" if c is None else c,
+                key="db_sort_col",
+                on_change=sort_callback
+            )
+        with col_dir:
+            sort_ascending = st.radio(
+                "Sentido",
+                [False, True],
+                format_func=lambda asc: "Ascendente" if asc else "Descendente",
+                key="db_sort_ascending",
+                horizontal=True,
+                on_change=sort_callback
+            )
+        
+        if sort_col is not None:
+            sort_state_key = (plan_key, sort_col, sort_ascending)
+            cached_sort = st.session_state.get('db_sort_result')
+            if cached_sort is None or cached_sort[0] != sort_state_key:
+                # Se recorre el orden precalculado de la columna: solo se reordenan posiciones
+                if view_indexes is not None and view_indexes.sorted.can_sort(sort_col):
+                    sorted_index = view_indexes.sorted
+                else:
+                    sorted_index = SortedColumnIndex(df, columns=[], sort_columns=[sort_col])
+                sorted_rows = sorted_index.sort_rows(sort_col, filtered_rows, ascending=sort_ascending)
+                st.session_state.db_sort_result = (sort_state_key, sorted_rows)
+            else:
+                sorted_rows = cached_sort[1]
+        else:
+            sorted_rows = filtered_rows
+        
+        # Vista paginada: solo se materializan las filas y columnas de la página visible
+        view = PagedView(df, sorted_rows, sel)
 
         # Render de la tabla con paginación
-        total = len(df_sel)
-        page = st.session_state.page
+        total = len(view)
         rpp = st.session_state.rows_per_page_db
+        page = view.clamp_page(st.session_state.page, rpp)
+        st.session_state.page = page
         start, end = (page-1)*rpp, page*rpp
         
         # Mostrar la tabla
-        st.dataframe(df_sel.iloc[start:end], use_container_width=True)        
+        st.dataframe(view.page(page, rpp), use_container_width=True)        
         
-        # Selector de filas por página
-        rows_per_page = st.selectbox(
+        # Selector de filas por página (el callback actualiza el estado antes del
+        # siguiente render, sin necesidad de st.rerun)
+        rpp_options = [20, 30, 40, 50, 75, 100]
+        st.selectbox(
             "Filas por página",
-            options=[20, 30, 40, 50, 75, 100],
-            index=3,  # 3 → valor por defecto 50
-            key="rows_per_page_db_selector"  # Clave única para evitar duplicidad
+            options=rpp_options,
+            index=rpp_options.index(rpp) if rpp in rpp_options else 3,  # 3 → valor por defecto 50
+            key="rows_per_page_db_selector",  # Clave única para evitar duplicidad
+            on_change=rows_per_page_callback
         )
-        
-        # Actualizar el valor en session_state solo si cambia
-        if rows_per_page != st.session_state.rows_per_page_db:
-            st.session_state.rows_per_page_db = rows_per_page
-            st.rerun()
 
         # Información de paginación
-        st.write(f"Página {page} de {(total-1)//rpp+1} — Filas {start+1}–{min(end,total)} de {total}")
+        st.write(f"Página {page} de {view.n_pages(rpp)} — Filas {min(start+1,total)}–{min(end,total)} de {total}")
         
         # Botones de navegación
         prev, _, nxt = st.columns([1,8,1])
@@ -1829,13 +2209,24 @@ def show_database():
         with nxt:
             st.button("Siguiente ▶", on_click=lambda: go_next(total), key="btn_next_db")
         
-        # Botón para exportar datos
-        st.download_button(
-            label="📥 Exportar datos filtrados",
-            data=df_sel.to_csv(index=False).encode('utf-8'),
-            file_name=f"jugadores_filtrados_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        # Botón para exportar datos: el fichero solo se genera al pulsarlo, por bloques
+        col_fmt, col_export = st.columns([1, 3])
+        with col_fmt:
+            export_format = st.selectbox(
+                "Formato",
+                list(EXPORT_FORMATS.keys()),
+                key="db_export_format",
+                label_visibility="collapsed"
+            )
+        extension, mime = EXPORT_FORMATS[export_format]
+        with col_export:
+            st.download_button(
+                label="📥 Exportar datos filtrados",
+                data=(query_view.make_export if query_view is not None else make_export)(view, export_format),
+                file_name=f"jugadores_filtrados_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                mime=mime,
+                key="btn_export_db"
+            )
 
 # Función para mostrar sección de Informes
 def show_reports():
@@ -1851,6 +2242,98 @@ def show_reports():
         # Filtro de búsqueda por jugador
         player_filter = st.text_input("Buscar por nombre de jugador", key="search_reports")
         
+        # Exportación masiva de los informes filtrados en un ZIP de PDF
+        with st.expander("Exportar informes en ZIP"):
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                export_date_from = st.date_input("Partidos desde", value=None, key="export_date_from")
+            
+            with col2:
+                export_date_to = st.date_input("Partidos hasta", value=None, key="export_date_to")
+            
+            with col3:
+                scouts = {user['username']: user['id'] for user in get_users()}
+                export_scout = st.selectbox("Scout", ["Todos"] + list(scouts), key="export_scout")
+            
+            if player_filter:
+                st.caption(f"Solo informes de jugadores que contienen \"{player_filter}\".")
+            
+            if st.button("Generar ZIP", key="btn_generate_reports_zip"):
+                export_reports = get_reports_for_export(
+                    player_filter=player_filter if player_filter else None,
+                    date_from=export_date_from,
+                    date_to=export_date_to,
+                    scout_id=scouts.get(export_scout)
+                )
+                
+                # El ZIP anterior de la sesión se sustituye por el nuevo
+                previous_zip = st.session_state.pop('reports_zip', None)
+                if previous_zip:
+                    Path(previous_zip['path']).unlink(missing_ok=True)
+                
+                if not export_reports:
+                    st.info("No hay informes que cumplan los filtros.")
+                else:
+                    progress_bar = st.progress(0, text="Generando PDF...")
+                    
+                    def update_progress(done, total):
+                        progress_bar.progress(done / total, text=f"Generando PDF... {done}/{total}")
+                    
+                    # Los ZIP antiguos (de esta u otras sesiones) se borran por antigüedad
+                    zip_export_dir = REPORTS_DIR / ZIP_EXPORT_DIRNAME
+                    remove_stale_zips(zip_export_dir)
+                    zip_path = new_reports_zip_path(zip_export_dir)
+                    errors = write_reports_zip(export_reports, zip_path, get_pdf_cache(), progress=update_progress)
+                    progress_bar.empty()
+                    
+                    for report, error in errors:
+                        st.warning(f"No se pudo generar el informe de {report['player_name']} ({report['match_date']}): {error}")
+                    
+                    st.session_state.reports_zip = {
+                        'path': zip_path,
+                        'count': len(export_reports) - len(errors)
+                    }
+            
+            reports_zip = st.session_state.get('reports_zip')
+            if reports_zip and os.path.exists(reports_zip['path']):
+                # El ZIP se lee del disco al pulsar y se conserva para repetir la descarga
+                st.download_button(
+                    label=f"Descargar ZIP ({reports_zip['count']} informes)",
+                    data=lambda: Path(reports_zip['path']).read_bytes(),
+                    file_name=f"informes_{datetime.datetime.now().strftime('%Y%m%d')}.zip",
+                    mime="application/zip",
+                    on_click="ignore",
+                    key="btn_download_reports_zip"
+                )
+        
+        # Dossier con todos los informes de un jugador
+        with st.expander("Dossier de un jugador"):
+            reported_players = get_reported_players(player_filter if player_filter else None)
+            
+            if not reported_players:
+                st.info("No hay jugadores con informes.")
+            else:
+                dossier_player = st.selectbox(
+                    "Jugador",
+                    list(reported_players),
+                    format_func=lambda name: f"{name} ({reported_players[name]} informes)",
+                    key="dossier_player"
+                )
+                
+                # El dossier solo se genera al pulsar el botón
+                def build_dossier(player_name=dossier_player):
+                    return render_player_dossier(get_reports_for_export(player_name=player_name), player_name)
+                
+                st.download_button(
+                    label="Descargar dossier PDF",
+                    data=build_dossier,
+                    file_name=f"dossier_{dossier_player.replace(' ', '_')}.pdf",
+                    mime="application/pdf",
+                    on_click="ignore",
+                    key="btn_download_dossier"
+                )
+        
         # Obtener informes de la base de datos
         page = st.session_state.get('reports_page', 1)
         reports_per_page = 10
@@ -1896,18 +2379,15 @@ def show_reports():
                             st.session_state.view_report_id = report['id']
                             st.rerun()
                         
-                        # Generar PDF
-                        report_data = get_report_by_id(report['id'])
-                        if report_data:
-                            pdf_buffer = generate_report_pdf(report_data)
-                            if pdf_buffer:
-                                st.download_button(
-                                    label="Descargar PDF",
-                                    data=pdf_buffer,
-                                    file_name=f"informe_{report_data['player_name'].replace(' ', '_')}_{report_data['match_date'].replace('/', '-')}.pdf",
-                                    mime="application/pdf",
-                                    key=f"download_report_{report['id']}"
-                                )
+                        # El PDF solo se genera al pulsar el botón, con los datos de la lista
+                        st.download_button(
+                            label="Descargar PDF",
+                            data=report_pdf_download(report),
+                            file_name=report_pdf_filename(report),
+                            mime="application/pdf",
+                            key=f"download_report_{report['id']}",
+                            on_click="ignore"
+                        )
                 
                 st.markdown("---")
             
@@ -1992,15 +2472,14 @@ def show_reports():
                         del st.session_state.view_report_id
                         st.rerun()
                     
-                    # Botón para descargar PDF
-                    pdf_buffer = generate_report_pdf(report_data)
-                    if pdf_buffer:
-                        st.download_button(
-                            label="Descargar PDF",
-                            data=pdf_buffer,
-                            file_name=f"informe_{report_data['player_name'].replace(' ', '_')}_{report_data['match_date'].replace('/', '-')}.pdf",
-                            mime="application/pdf"
-                        )
+                    # Botón para descargar PDF (generado al pulsar)
+                    st.download_button(
+                        label="Descargar PDF",
+                        data=report_pdf_download(report_data),
+                        file_name=report_pdf_filename(report_data),
+                        mime="application/pdf",
+                        on_click="ignore"
+                    )
     
     # Tab 2: Crear nuevo informe
     with tab2:
@@ -2155,16 +2634,16 @@ def show_reports():
                 
                 if report_id:
                     st.success(f"Informe guardado correctamente con ID: {report_id}")
+                    get_reported_players.clear()
                     
-                    # Generar PDF y ofrecer descarga
-                    pdf_buffer = generate_report_pdf(report_data)
-                    if pdf_buffer:
-                        st.download_button(
-                            label="Descargar informe en PDF",
-                            data=pdf_buffer,
-                            file_name=f"informe_{player_name.replace(' ', '_')}_{match_date.strftime('%d-%m-%Y')}.pdf",
-                            mime="application/pdf"
-                        )
+                    # Ofrecer la descarga del PDF (generado al pulsar)
+                    st.download_button(
+                        label="Descargar informe en PDF",
+                        data=report_pdf_download(report_data),
+                        file_name=report_pdf_filename(report_data),
+                        mime="application/pdf",
+                        on_click="ignore"
+                    )
                 else:
                     st.error("Error al guardar el informe. Inténtalo de nuevo.")
 
@@ -2201,29 +2680,11 @@ def show_visualizations():
     st.write("Aquí puedes generar visualizaciones a partir de los datos de los jugadores.")
     
     # Selector de competición
-    comp_options = {
-        "Todas": "wyscout_1ra_2da_RFEF_limpio.xlsx",
-        "1ra RFEF": "wyscout_1ra_RFEF_limpio.xlsx",
-        "2da RFEF": "wyscout_2da_RFEF_limpio.xlsx"
-    }
-    
-    comp = st.selectbox("Competición", list(comp_options.keys()), key="viz_comp")
+    comp = st.selectbox("Competición", get_competition_options(), key="viz_comp")
     
     # Cargar datos según competición seleccionada
-    data_file = comp_options[comp]
-    data_path = DATA_DIR / data_file
-    
-    if not data_path.exists():
-        st.error(f"Archivo no encontrado: {data_file}. Por favor, asegúrate de que existe en la carpeta 'data'.")
-        # Intentar cargar cualquier archivo disponible
-        excel_files = list(DATA_DIR.glob("*.xlsx"))
-        if excel_files:
-            data_path = excel_files[0]
-            st.warning(f"Se cargará un archivo alternativo: {data_path.name}")
-        else:
-            st.stop()
-    
-    df = load_specific_data(data_path)
+    df = load_competition_data(comp)
+    view_indexes = get_competition_indexes(comp)
     
     if df.empty:
         st.warning("No hay datos disponibles. Por favor, comprueba los archivos en la carpeta 'data'.")
@@ -2234,11 +2695,14 @@ def show_visualizations():
         if st.button("Descargar fuentes Roboto (mejora los gráficos)"):
             download_roboto_fonts()
     
+    # Estadísticas de normalización compartidas por todos los radares
+    metric_stats = get_metric_stats(comp, df)
+    
     # Mostrar información del dataset
     st.write(f"Dataset cargado: {df.shape[0]} jugadores, {df.shape[1]} columnas")
     
     # Tabs para diferentes tipos de visualizaciones
-    viz_tabs = st.tabs(["Radar Chart", "Comparativa", "Ranking"])
+    viz_tabs = st.tabs(["Radar Chart", "Comparativa", "Ranking", "Percentiles", "Perfiles"])
     
     # Tab 1: Radar Chart (Mejorado)
     with viz_tabs[0]:
@@ -2249,9 +2713,14 @@ def show_visualizations():
             st.error("El DataFrame no contiene la columna 'jugador'. Por favor, revisa la estructura de los datos.")
             st.stop()
         
-        # Seleccionar jugador
+        # Seleccionar jugador (con buscador por nombre o equipo)
         all_players = sorted(df['jugador'].unique())
-        selected_player = st.selectbox("Seleccionar jugador", all_players, key="radar_player")
+        radar_query = st.text_input("Buscar jugador o equipo", key="radar_search")
+        radar_options = search_players(df, view_indexes, radar_query) if radar_query else all_players
+        if not radar_options:
+            st.info("No se encontraron jugadores para la búsqueda.")
+            radar_options = all_players
+        selected_player = st.selectbox("Seleccionar jugador", radar_options, key="radar_player")
         
         if selected_player:
             # Información del jugador
@@ -2271,24 +2740,7 @@ def show_visualizations():
                     st.write(f"**Edad:** {player_info['edad']}")
         
         # Filtrar métricas por grupos
-        viz_metrics_groups = {
-            "ATAQUE": [
-                "goles/90", "xg/90", "remates/90", "remates_port_pct", 
-                "regates/90", "regates_pct", "toques_area_pen/90"
-            ],
-            "PASES": [
-                "pases/90", "pases_pct", "pases_prog/90", "jugadas_claves/90", 
-                "asis/90", "xa/90", "pases_prof/90"
-            ],
-            "DEFENSA": [
-                "duelos_def/90", "duelos_def_w_pct", "duelos_aer/90", 
-                "duelos_aer_w_pct", "entradas/90", "interc/90"
-            ],
-            "PORTERO": [
-                "paradas_pct", "goles_evit/90", "salidas/90", 
-                "duelos_aer_portero/90"
-            ]
-        }
+        viz_metrics_groups = VIZ_METRIC_GROUPS
         
         # Seleccionar grupo de métricas
         selected_metrics_group = st.selectbox(
@@ -2319,7 +2771,7 @@ def show_visualizations():
                 # Generar y mostrar el radar chart con mplsoccer
                 with st.spinner("Generando radar chart..."):
                     from visualization_utils import generate_mplsoccer_radar
-                    radar_fig = generate_mplsoccer_radar(df, available_metrics, selected_player)
+                    radar_fig = generate_mplsoccer_radar(df, available_metrics, selected_player, metric_stats=metric_stats)
                     if radar_fig:
                         st.pyplot(radar_fig)
                     else:
@@ -2328,7 +2780,7 @@ def show_visualizations():
                 # Generar y mostrar el radar chart con plotly (original)
                 with st.spinner("Generando radar chart..."):
                     from visualization_utils import generate_radar_chart
-                    radar_fig = generate_radar_chart(df, available_metrics, selected_player)
+                    radar_fig = generate_radar_chart(df, available_metrics, selected_player, metric_stats=metric_stats)
                     if radar_fig:
                         st.plotly_chart(radar_fig, use_container_width=True)
                     else:
@@ -2343,13 +2795,80 @@ def show_visualizations():
     with viz_tabs[1]:
         st.subheader("Comparativa de jugadores")
         
+        # Buscador de jugadores similares a uno de referencia
+        with st.expander("Buscar jugadores similares"):
+            similarity_index = get_similarity_index(comp, df)
+            
+            sim_col1, sim_col2, sim_col3 = st.columns(3)
+            with sim_col1:
+                sim_player = st.selectbox("Jugador de referencia", all_players, key="sim_player")
+            with sim_col2:
+                sim_position = st.selectbox(
+                    "Posición de los candidatos",
+                    ["Misma posición", "Todas"] + sorted(df['pos'].dropna().unique()),
+                    key="sim_position"
+                )
+            with sim_col3:
+                sim_min_minutes = st.number_input("Mínimo de minutos jugados", 0, 5000, 500, key="sim_min_minutes")
+            
+            sim_k = st.slider("Número de jugadores similares", 5, 50, 10, key="sim_k")
+            
+            # Peso de cada grupo de métricas en la similitud
+            weight_cols = st.columns(len(similarity_index.groups) or 1)
+            sim_weights = {}
+            for weight_col, group in zip(weight_cols, similarity_index.groups):
+                with weight_col:
+                    sim_weights[group] = st.slider(f"Peso {group}", 0.0, 2.0, 1.0, 0.25, key=f"sim_weight_{group}")
+            
+            if sim_player:
+                position = sim_position
+                if sim_position == "Misma posición":
+                    position = df.loc[df['jugador'] == sim_player, 'pos'].iloc[0]
+                sim_rows, sim_scores = similarity_index.most_similar(
+                    sim_player,
+                    k=sim_k,
+                    group_weights=sim_weights,
+                    position=position,
+                    min_minutes=sim_min_minutes
+                )
+                
+                if sim_rows is None or len(sim_rows) == 0:
+                    st.info("No hay jugadores que cumplan con los filtros especificados.")
+                else:
+                    sim_table = df.iloc[sim_rows][['jugador', 'equipo', 'pos', 'min']].copy()
+                    sim_table['similitud'] = (sim_scores * 100).round(1)
+                    st.dataframe(sim_table, use_container_width=True, hide_index=True)
+                    
+                    # Llevar los jugadores elegidos a la comparativa (y a su radar)
+                    sim_selected = st.multiselect(
+                        "Jugadores a comparar con el de referencia",
+                        sim_table['jugador'].tolist(),
+                        default=sim_table['jugador'].tolist()[:1],
+                        key="sim_selected"
+                    )
+                    
+                    def compare_similar_callback():
+                        st.session_state.comp_players = [sim_player] + [
+                            p for p in st.session_state.get("sim_selected", []) if p != sim_player
+                        ]
+                        st.session_state.comp_search = ""
+                    
+                    st.button("Comparar con el de referencia", on_click=compare_similar_callback, key="btn_compare_similar")
+        
         col1, col2 = st.columns(2)
         
         with col1:
+            # Buscador para acotar la lista de jugadores (se conservan los ya elegidos)
+            comp_query = st.text_input("Buscar jugador o equipo", key="comp_search")
+            comp_options = all_players
+            if comp_query:
+                selected = st.session_state.get("comp_players", [])
+                comp_options = selected + [p for p in search_players(df, view_indexes, comp_query) if p not in selected]
+            
             # Seleccionar jugadores para comparar
             comp_players = st.multiselect(
                 "Seleccionar jugadores para comparar",
-                all_players,
+                comp_options,
                 key="comp_players"
             )
         
@@ -2396,7 +2915,8 @@ def show_visualizations():
                         with st.spinner("Generando radar chart comparativo..."):
                             from visualization_utils import generate_mplsoccer_radar_compare
                             comp_radar_fig = generate_mplsoccer_radar_compare(
-                                df, comp_available_metrics, comp_players[0], comp_players[1]
+                                df, comp_available_metrics, comp_players[0], comp_players[1],
+                                metric_stats=metric_stats
                             )
                             if comp_radar_fig:
                                 st.pyplot(comp_radar_fig)
@@ -2407,7 +2927,8 @@ def show_visualizations():
                         with st.spinner("Generando radar chart comparativo..."):
                             from visualization_utils import generate_advanced_radar_chart
                             comp_radar_fig = generate_advanced_radar_chart(
-                                df, comp_available_metrics, comp_players, normalize=True
+                                df, comp_available_metrics, comp_players, normalize=True,
+                                metric_stats=metric_stats
                             )
                             if comp_radar_fig:
                                 st.plotly_chart(comp_radar_fig, use_container_width=True)
@@ -2421,7 +2942,8 @@ def show_visualizations():
                     with st.spinner("Generando radar chart comparativo..."):
                         from visualization_utils import generate_advanced_radar_chart
                         comp_radar_fig = generate_advanced_radar_chart(
-                            df, comp_available_metrics, comp_players, normalize=True
+                            df, comp_available_metrics, comp_players, normalize=True,
+                            metric_stats=metric_stats
                         )
                         if comp_radar_fig:
                             st.plotly_chart(comp_radar_fig, use_container_width=True)
@@ -2437,10 +2959,15 @@ def show_visualizations():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            # Seleccionar métrica para ranking
+            # Seleccionar métrica para ranking (todas las métricas numéricas de los grupos)
             all_metrics = []
-            for metrics_list in viz_metrics_groups.values():
-                all_metrics.extend([m for m in metrics_list if m in df.columns])
+            for group, metrics_list in COLUMN_GROUPS.items():
+                if group == "GENERAL":
+                    continue
+                all_metrics.extend([
+                    m for m in metrics_list
+                    if m in df.columns and pd.api.types.is_numeric_dtype(df[m].dtype)
+                ])
             
             rank_metric = st.selectbox(
                 "Seleccionar métrica para ranking",
@@ -2472,6 +2999,18 @@ def show_visualizations():
             key="rank_num_players"
         )
         
+        # Sentido del ranking: por defecto los mejores primero según la métrica
+        rank_order = st.radio(
+            "Orden",
+            ["Mejores primero", "De mayor a menor", "De menor a mayor"],
+            horizontal=True,
+            key="rank_order"
+        )
+        if rank_order == "Mejores primero":
+            rank_ascending = rank_metric in LOWER_IS_BETTER_METRICS
+        else:
+            rank_ascending = rank_order == "De menor a mayor"
+        
         # Generar ranking
         if rank_metric:
             ranking_df = generate_player_ranking(
@@ -2479,7 +3018,10 @@ def show_visualizations():
                 rank_metric,
                 min_minutes=min_minutes,
                 position=None if rank_position == "Todas" else rank_position,
-                limit=num_players
+                limit=num_players,
+                sorted_index=view_indexes.sorted if view_indexes else None,
+                query_view=get_query_view(comp),
+                ascending=rank_ascending
             )
             
             if ranking_df is not None:
@@ -2518,6 +3060,195 @@ def show_visualizations():
                     )
                     
                     st.plotly_chart(bar_fig, use_container_width=True)
+    
+    # Tab 4: Percentiles por posición
+    with viz_tabs[3]:
+        st.subheader("Percentiles por posición")
+        
+        percentile_table = get_percentile_table(comp, df)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            pct_player = st.selectbox("Seleccionar jugador", all_players, key="pct_player")
+        
+        with col2:
+            pct_metrics_group = st.selectbox(
+                "Seleccionar grupo de métricas",
+                list(viz_metrics_groups.keys()),
+                key="pct_metrics_group"
+            )
+        
+        with col3:
+            # Solo umbrales precalculados: cada consulta es una búsqueda en la tabla
+            pct_min_minutes = st.selectbox(
+                "Mínimo de minutos jugados",
+                PERCENTILE_MIN_THRESHOLDS,
+                index=PERCENTILE_MIN_THRESHOLDS.index(500),
+                key="pct_min_minutes"
+            )
+        
+        pct_metrics = [m for m in viz_metrics_groups[pct_metrics_group] if m in percentile_table.metrics]
+        
+        if not pct_metrics:
+            st.warning(f"No hay métricas disponibles para el grupo {pct_metrics_group}")
+        else:
+            from visualization_utils import generate_player_percentiles
+            percentile_df, percentile_fig = generate_player_percentiles(
+                df,
+                pct_player,
+                pct_metrics,
+                min_minutes=pct_min_minutes,
+                query_view=get_query_view(comp),
+                percentile_table=percentile_table
+            )
+            
+            if percentile_fig is not None:
+                st.plotly_chart(percentile_fig, use_container_width=True)
+            else:
+                st.info(f"{pct_player} no llega a {pct_min_minutes} minutos en su posición.")
+            
+            # Percentiles de toda una plantilla
+            st.markdown("---")
+            st.subheader("Percentiles de una plantilla")
+            
+            squad_team = st.selectbox("Equipo", sorted(df['equipo'].dropna().unique()), key="pct_team")
+            
+            if view_indexes is not None and 'equipo' in view_indexes.bitmap:
+                squad_rows = np.flatnonzero(view_indexes.bitmap.mask('equipo', [squad_team]))
+            else:
+                squad_rows = np.flatnonzero((df['equipo'] == squad_team).to_numpy(dtype=bool))
+            
+            squad_df = df.iloc[squad_rows][['jugador', 'pos', 'min']].reset_index(drop=True)
+            squad_df[pct_metrics] = percentile_table.squad_percentiles(squad_rows, pct_metrics, pct_min_minutes).round(1)
+            
+            st.dataframe(squad_df, use_container_width=True)
+            
+            st.download_button(
+                label="Descargar percentiles de la plantilla",
+                data=squad_df.to_csv(index=False).encode('utf-8'),
+                file_name=f"percentiles_{squad_team}_{pct_min_minutes}min.csv",
+                mime="text/csv",
+                key="btn_download_squad_percentiles"
+            )
+    
+    # Tab 5: Ranking por perfiles de puntuación compuesta
+    with viz_tabs[4]:
+        st.subheader("Ranking por perfiles")
+        st.write("Cada perfil puntúa a los jugadores con la media ponderada de los z-scores de sus métricas "
+                 "(en las métricas donde un valor menor es mejor, el signo se invierte).")
+        
+        composite_scorer = get_composite_scorer(comp, df)
+        all_profiles, saved_profiles = get_scoring_profiles()
+        
+        profile_names = st.multiselect(
+            "Perfiles",
+            list(all_profiles),
+            default=list(all_profiles)[:2],
+            key="profile_names"
+        )
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            profile_position = st.selectbox(
+                "Filtrar por posición",
+                ["Todas"] + sorted(df['pos'].dropna().unique()),
+                key="profile_position"
+            )
+        
+        with col2:
+            profile_min_minutes = st.number_input(
+                "Mínimo de minutos jugados",
+                0, 5000, 500,
+                key="profile_min_minutes"
+            )
+        
+        with col3:
+            profile_limit = st.number_input(
+                "Número de jugadores",
+                10, 5000, 100,
+                key="profile_limit"
+            )
+        
+        if profile_names:
+            sort_profile = st.selectbox("Ordenar por", profile_names, key="profile_sort")
+            profiles = {name: all_profiles[name] for name in profile_names}
+            
+            profile_ranking = generate_profile_ranking(
+                df,
+                composite_scorer,
+                profiles,
+                sort_profile,
+                min_minutes=profile_min_minutes,
+                position=profile_position,
+                limit=profile_limit,
+                sorted_index=view_indexes.sorted if view_indexes else None
+            )
+            
+            if profile_ranking is not None:
+                st.dataframe(profile_ranking, use_container_width=True)
+                
+                st.download_button(
+                    label="Descargar ranking por perfiles",
+                    data=profile_ranking.to_csv(index=False).encode('utf-8'),
+                    file_name="ranking_perfiles.csv",
+                    mime="text/csv",
+                    key="btn_download_profile_ranking"
+                )
+        else:
+            st.info("Selecciona al menos un perfil.")
+        
+        # Creación y borrado de perfiles guardados
+        with st.expander("Crear o eliminar perfiles"):
+            # Mensaje de la última acción, que se muestra tras recargar la lista de perfiles
+            profile_message = st.session_state.pop('profile_message', None)
+            if profile_message:
+                st.success(profile_message)
+            
+            new_profile_name = st.text_input("Nombre del perfil", key="new_profile_name")
+            new_profile_metrics = st.multiselect(
+                "Métricas del perfil",
+                [m for m in sorted(set(all_metrics)) if m in composite_scorer],
+                key="new_profile_metrics"
+            )
+            
+            new_profile_weights = {}
+            weight_cols = st.columns(3)
+            for i, metric in enumerate(new_profile_metrics):
+                with weight_cols[i % 3]:
+                    new_profile_weights[metric] = st.number_input(
+                        f"Peso {metric}", 0.0, 10.0, 1.0, 0.5, key=f"new_profile_weight_{metric}"
+                    )
+            
+            if st.button("Guardar perfil", key="btn_save_profile"):
+                if not new_profile_name.strip() or not any(w > 0 for w in new_profile_weights.values()):
+                    st.error("Indica un nombre y al menos una métrica con peso mayor que cero.")
+                else:
+                    success, message = save_scoring_profile(
+                        new_profile_name.strip(), new_profile_weights, st.session_state.user_id
+                    )
+                    if success:
+                        st.session_state.profile_message = message
+                        st.rerun()
+                    else:
+                        st.error(message)
+            
+            # Perfiles que el usuario puede eliminar: los suyos, o todos si es administrador
+            is_admin = st.session_state.user_role == "admin"
+            deletable_profiles = [
+                name for name, owner in saved_profiles.items()
+                if is_admin or owner == st.session_state.user_id
+            ]
+            if deletable_profiles:
+                profile_to_delete = st.selectbox("Perfil guardado", deletable_profiles, key="profile_to_delete")
+                if st.button("Eliminar perfil", key="btn_delete_profile"):
+                    success, message = delete_scoring_profile(profile_to_delete, st.session_state.user_id, is_admin)
+                    if success:
+                        st.session_state.profile_message = message
+                        st.rerun()
+                    else:
+                        st.error(message)
 
 # Función para mostrar la sección de Administración
 def show_admin():
@@ -2546,6 +3277,8 @@ def show_admin():
                 success, message = create_user(username, password, role)
                 if success:
                     st.success(message)
+                    get_users.clear()
+                    get_reported_players.clear()
                 else:
                     st.error(message)
         
@@ -2576,6 +3309,9 @@ def show_admin():
                                 success, message = delete_user(user['id'])
                                 if success:
                                     st.success(message)
+                                    get_users.clear()
+                                    # Sus informes dejan de aparecer en los listados con JOIN a users
+                                    get_reported_players.clear()
                                     st.rerun()
                                 else:
                                     st.error(message)
@@ -2609,10 +3345,15 @@ def show_admin():
                     with open(file_path, "wb") as f:
                         f.write(uploaded_file.getbuffer())
                     
+                    # Regenerar el sidecar columnar reutilizando la vista previa ya parseada
+                    with st.spinner("Generando caché columnar..."):
+                        build_sidecar(file_path, df=df_preview)
+                    
                     st.success(f"Archivo guardado correctamente como {file_name}")
                     
                     # Invalidar caché para recargar datos
                     st.cache_data.clear()
+                    get_player_dataset.clear()
             
             except Exception as e:
                 st.error(f"Error al procesar el archivo: {e}")
@@ -2638,8 +3379,10 @@ def show_admin():
                     if st.button("Eliminar", key=f"delete_file_{file.name}"):
                         try:
                             os.remove(file)
+                            remove_sidecar(file)
                             st.success(f"Archivo {file.name} eliminado")
                             st.cache_data.clear()
+                            get_player_dataset.clear()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error al eliminar archivo: {e}")
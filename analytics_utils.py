@@ -0,0 +1,500 @@
+import numpy as np
+import pandas as pd
+
+
+# Umbrales de minutos jugados con percentiles precalculados
+PERCENTILE_MIN_THRESHOLDS = (0, 300, 500, 900, 1500)
+
+
+# Tabla de percentiles precalculados por posición y minutos jugados
+class PercentileTable:
+    """
+    Precalcula, para cada umbral de minutos, el percentil de cada jugador en cada
+    métrica numérica dentro de su posición: el porcentaje de jugadores de su misma
+    posición con al menos esos minutos y un valor menor o igual. Se guardan los
+    recuentos enteros y el tamaño de cada cohorte, de modo que el percentil
+    (recuento / tamaño * 100) es idéntico al cálculo directo y cada consulta es
+    una búsqueda en arrays.
+
+    Las posiciones de fila son posiciones (iloc) del DataFrame indexado.
+
+    Args:
+        df (DataFrame): Datos de jugadores (no se modifica)
+        thresholds (tuple): Umbrales de minutos a precalcular
+    """
+
+    def __init__(self, df, thresholds=PERCENTILE_MIN_THRESHOLDS):
+        self.n_rows = len(df)
+        self.thresholds = tuple(thresholds)
+        self.metrics = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col].dtype)]
+        self._metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+        self._counts = {}
+        self._cohort_sizes = {}
+
+        if self.n_rows == 0 or "pos" not in df.columns or "min" not in df.columns:
+            self._pos = np.empty(0, dtype=object)
+            self._minutes = np.empty(0)
+            self._name_rows = {}
+            return
+
+        self._pos = df["pos"].to_numpy(dtype=object)
+        self._minutes = df["min"].to_numpy(dtype=np.float64)
+        names = pd.Series(np.arange(self.n_rows), index=df["jugador"].to_numpy(dtype=object))
+        self._name_rows = {name: rows.to_numpy() for name, rows in names.groupby(level=0, sort=False)}
+
+        values = df[self.metrics].astype(np.float64)
+        pos_codes = pd.Series(pd.factorize(self._pos)[0])
+        # Los jugadores sin posición (código -1) no forman parte de ninguna cohorte
+        has_pos = pos_codes.to_numpy() >= 0
+        # Los recuentos llegan hasta el tamaño de la mayor cohorte (como mucho n_rows)
+        count_dtype = np.int16 if self.n_rows <= np.iinfo(np.int16).max else np.int32
+        for threshold in self.thresholds:
+            in_cohort = (self._minutes >= threshold) & has_pos
+            # Rango "max" = número de valores de la cohorte menores o iguales (los nulos no cuentan)
+            ranks = values[in_cohort].groupby(pos_codes[in_cohort].to_numpy()).rank(method="max")
+            counts = np.zeros((self.n_rows, len(self.metrics)), dtype=count_dtype)
+            counts[in_cohort] = ranks.fillna(0).to_numpy(dtype=count_dtype)
+            sizes = np.zeros(self.n_rows, dtype=np.int32)
+            cohort_codes = pos_codes[in_cohort].to_numpy()
+            sizes[in_cohort] = np.bincount(cohort_codes)[cohort_codes]
+            counts.flags.writeable = False
+            sizes.flags.writeable = False
+            self._counts[threshold] = counts
+            self._cohort_sizes[threshold] = sizes
+
+    def has_threshold(self, min_minutes):
+        """Indica si el umbral de minutos está precalculado."""
+        return min_minutes in self._counts
+
+    def player_row(self, player_name, min_minutes, position=None):
+        """
+        Busca la fila del jugador dentro de la cohorte, con la misma regla que
+        generate_player_percentiles: la posición indicada o, si no hay, la de la
+        primera fila del jugador, y la primera fila que cumpla los filtros.
+
+        Args:
+            player_name (str): Nombre del jugador
+            min_minutes (int): Umbral de minutos precalculado
+            position (str, optional): Posición de la cohorte
+
+        Returns:
+            int: Posición de fila, o None si el jugador no está en la cohorte
+        """
+        rows = self._name_rows.get(player_name)
+        if rows is None:
+            return None
+        if not position or position == "Todas":
+            position = self._pos[rows[0]]
+        candidates = rows[(self._pos[rows] == position) & (self._minutes[rows] >= min_minutes)]
+        return int(candidates[0]) if len(candidates) else None
+
+    def percentiles(self, row, metrics, min_minutes):
+        """
+        Devuelve los percentiles de una fila en su cohorte.
+
+        Args:
+            row (int): Posición de fila (de player_row)
+            metrics (list): Métricas numéricas
+            min_minutes (int): Umbral de minutos precalculado
+
+        Returns:
+            dict: Métrica -> percentil (0-100)
+        """
+        counts = self._counts[min_minutes][row]
+        size = self._cohort_sizes[min_minutes][row]
+        return {metric: int(counts[self._metric_index[metric]]) / size * 100 for metric in metrics}
+
+    def player_percentiles(self, player_name, metrics, min_minutes, position=None):
+        """
+        Devuelve los percentiles de un jugador en su cohorte (posición y minutos).
+
+        Args:
+            player_name (str): Nombre del jugador
+            metrics (list): Métricas numéricas
+            min_minutes (int): Umbral de minutos precalculado
+            position (str, optional): Posición de la cohorte
+
+        Returns:
+            tuple: (dict métrica -> percentil, posición de fila), o (None, None)
+        """
+        row = self.player_row(player_name, min_minutes, position)
+        if row is None:
+            return None, None
+        return self.percentiles(row, metrics, min_minutes), row
+
+    def squad_percentiles(self, rows, metrics, min_minutes):
+        """
+        Devuelve de una vez los percentiles de varios jugadores (por ejemplo, una
+        plantilla), cada uno respecto a su posición. Los jugadores por debajo del
+        umbral de minutos quedan sin percentil (NaN).
+
+        Args:
+            rows (numpy.ndarray): Posiciones de fila de los jugadores
+            metrics (list): Métricas numéricas
+            min_minutes (int): Umbral de minutos precalculado
+
+        Returns:
+            numpy.ndarray: Matriz (jugadores x métricas) de percentiles
+        """
+        columns = [self._metric_index[metric] for metric in metrics]
+        counts = self._counts[min_minutes][np.ix_(rows, columns)].astype(np.float64)
+        sizes = self._cohort_sizes[min_minutes][rows].astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = counts / sizes[:, None] * 100
+        result[sizes == 0] = np.nan
+        return result
+
+
+# Cuantiles guardados en las estadísticas de normalización
+STATS_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+# Estadísticas de normalización por métrica y posición
+class MetricStats:
+    """
+    Calcula de una sola vez, para cada métrica numérica, el mínimo, máximo, media,
+    desviación típica y cuantiles de STATS_QUANTILES, tanto de todos los jugadores
+    como de cada posición. Los radares y cualquier normalización leen de aquí en
+    lugar de recorrer las columnas completas en cada gráfico.
+
+    Args:
+        df (DataFrame): Datos de jugadores (no se modifica)
+        metrics (list, optional): Métricas; por defecto todas las numéricas
+    """
+
+    def __init__(self, df, metrics=None):
+        if metrics is None:
+            metrics = [
+                col for col in df.columns
+                if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)
+            ]
+        self.n_rows = len(df)
+        self.metrics = list(metrics)
+        self.quantiles = STATS_QUANTILES
+
+        values = df[self.metrics].astype(np.float64)
+        quantile_names = [f"q{int(q * 100):02d}" for q in self.quantiles]
+
+        # Estadísticas de todos los jugadores: métricas x estadísticas
+        overall = values.agg(["min", "max", "mean", "std"]).T
+        overall[quantile_names] = values.quantile(list(self.quantiles)).T.to_numpy()
+        self._overall = overall
+
+        # Estadísticas por posición: posición -> métricas x estadísticas
+        self._by_pos = {}
+        if "pos" in df.columns and len(df):
+            grouped = values.groupby(df["pos"].to_numpy(dtype=object), sort=False)
+            aggregated = {stat: getattr(grouped, stat)() for stat in ["min", "max", "mean", "std"]}
+            quantiles = grouped.quantile(list(self.quantiles))
+            for pos in aggregated["min"].index:
+                table = pd.DataFrame({stat: frame.loc[pos] for stat, frame in aggregated.items()})
+                table[quantile_names] = quantiles.loc[pos].T.to_numpy()
+                self._by_pos[pos] = table
+
+    def __contains__(self, metric):
+        return metric in self._overall.index
+
+    def table(self, position=None):
+        """
+        Devuelve todas las estadísticas de una cohorte.
+
+        Args:
+            position (str, optional): Posición; por defecto todos los jugadores
+
+        Returns:
+            DataFrame: Métricas x estadísticas (min, max, mean, std, q05...q95)
+        """
+        if position and position != "Todas":
+            return self._by_pos.get(position, self._overall.iloc[0:0])
+        return self._overall
+
+    def get(self, metric, stat, position=None):
+        """
+        Devuelve una estadística de una métrica.
+
+        Args:
+            metric (str): Métrica
+            stat (str): Estadística ('min', 'max', 'mean', 'std', 'q50'...)
+            position (str, optional): Posición de la cohorte
+
+        Returns:
+            float: Valor de la estadística (NaN si no hay datos)
+        """
+        table = self.table(position)
+        if metric not in table.index:
+            return np.nan
+        return table.at[metric, stat]
+
+    def value_range(self, metric, position=None):
+        """
+        Devuelve el mínimo y máximo de una métrica.
+
+        Args:
+            metric (str): Métrica
+            position (str, optional): Posición de la cohorte
+
+        Returns:
+            tuple: (mínimo, máximo)
+        """
+        return self.get(metric, "min", position), self.get(metric, "max", position)
+
+    def normalize(self, metric, value, position=None):
+        """
+        Normaliza un valor al rango 0-1 con el mínimo y máximo de la métrica. Si
+        todos los valores son iguales devuelve 0.5.
+
+        Args:
+            metric (str): Métrica
+            value (float): Valor a normalizar
+            position (str, optional): Posición de la cohorte
+
+        Returns:
+            float: Valor normalizado
+        """
+        min_val, max_val = self.value_range(metric, position)
+        if max_val > min_val:
+            return (value - min_val) / (max_val - min_val)
+        return 0.5
+
+
+# Función para obtener estadísticas válidas para un DataFrame
+def stats_for(player_data, metrics, metric_stats=None):
+    """
+    Devuelve las estadísticas precalculadas si corresponden a player_data y
+    contienen las métricas; si no, las calcula en una sola pasada sobre ellas.
+
+    Args:
+        player_data (DataFrame): Datos de jugadores
+        metrics (list): Métricas necesarias
+        metric_stats (MetricStats, optional): Estadísticas precalculadas
+
+    Returns:
+        MetricStats: Estadísticas de normalización
+    """
+    numeric_metrics = [
+        m for m in metrics
+        if m in player_data.columns and pd.api.types.is_numeric_dtype(player_data[m].dtype)
+    ]
+    if (metric_stats is not None and metric_stats.n_rows == len(player_data)
+            and all(m in metric_stats for m in numeric_metrics)):
+        return metric_stats
+    return MetricStats(player_data, numeric_metrics)
+
+
+# Función para construir la matriz de métricas estandarizadas (z-scores)
+def standardized_matrix(df, metrics, metric_stats=None):
+    """
+    Estandariza las métricas con la media y la desviación típica de todos los
+    jugadores. Los valores nulos quedan en la media (0) y las métricas constantes
+    o sin datos valen 0 en todas las filas.
+
+    Args:
+        df (DataFrame): Datos de jugadores
+        metrics (list): Métricas numéricas
+        metric_stats (MetricStats, optional): Estadísticas precalculadas de df
+
+    Returns:
+        numpy.ndarray: Matriz (jugadores x métricas) de solo lectura en float32
+    """
+    stats = stats_for(df, metrics, metric_stats)
+    table = stats.table().reindex(metrics)
+    mean = np.nan_to_num(table["mean"].to_numpy(dtype=np.float64))
+    std = table["std"].to_numpy(dtype=np.float64)
+    std = np.where(np.isfinite(std) & (std > 0), std, np.inf)
+
+    values = df[metrics].to_numpy(dtype=np.float64, na_value=np.nan)
+    z = np.nan_to_num((values - mean) / std).astype(np.float32)
+    z.flags.writeable = False
+    return z
+
+
+# Índice de similitud entre jugadores sobre la matriz de métricas estandarizadas
+class SimilarityIndex:
+    """
+    Guarda la matriz de métricas de los grupos indicados estandarizada con la
+    media y la desviación típica de MetricStats (los valores nulos quedan en la
+    media, es decir, en 0). La similitud entre dos jugadores es el coseno de sus
+    vectores con un peso por grupo de métricas; se calcula para todos los
+    candidatos con dos productos matriz-vector, sin recorrer filas en Python.
+
+    Las posiciones de fila son posiciones (iloc) del DataFrame indexado.
+
+    Args:
+        df (DataFrame): Datos de jugadores (no se modifica)
+        metric_groups (dict): Grupo -> lista de métricas
+        metric_stats (MetricStats, optional): Estadísticas precalculadas de df
+    """
+
+    def __init__(self, df, metric_groups, metric_stats=None):
+        self.n_rows = len(df)
+        self.metrics = []
+        self.groups = {}
+        for group, metrics in metric_groups.items():
+            present = [
+                m for m in metrics
+                if m in df.columns and m not in self.metrics
+                and pd.api.types.is_numeric_dtype(df[m].dtype)
+            ]
+            if present:
+                self.groups[group] = present
+                self.metrics.extend(present)
+        self._group_columns = {
+            group: np.array([self.metrics.index(m) for m in metrics])
+            for group, metrics in self.groups.items()
+        }
+
+        z = standardized_matrix(df, self.metrics, metric_stats)
+        squared = np.square(z)
+        squared.flags.writeable = False
+        self._z = z
+        self._squared = squared
+
+        if self.n_rows and "jugador" in df.columns:
+            self._names = df["jugador"].to_numpy(dtype=object)
+            self._pos = df["pos"].to_numpy(dtype=object) if "pos" in df.columns else np.full(self.n_rows, None)
+            self._minutes = (
+                df["min"].to_numpy(dtype=np.float64) if "min" in df.columns else np.full(self.n_rows, np.inf)
+            )
+        else:
+            self._names = np.empty(0, dtype=object)
+            self._pos = np.empty(0, dtype=object)
+            self._minutes = np.empty(0)
+
+    def column_weights(self, group_weights=None):
+        """
+        Convierte los pesos por grupo en un peso por columna de la matriz. Los
+        grupos sin peso indicado pesan 1.
+
+        Args:
+            group_weights (dict, optional): Grupo -> peso (>= 0)
+
+        Returns:
+            numpy.ndarray: Peso de cada métrica
+        """
+        weights = np.ones(len(self.metrics))
+        for group, weight in (group_weights or {}).items():
+            if group in self._group_columns:
+                weights[self._group_columns[group]] = max(float(weight), 0.0)
+        return weights
+
+    def similarities(self, row, group_weights=None):
+        """
+        Calcula la similitud coseno ponderada de una fila con todas las demás.
+
+        Args:
+            row (int): Posición de fila del jugador de referencia
+            group_weights (dict, optional): Grupo -> peso
+
+        Returns:
+            numpy.ndarray: Similitud (-1 a 1) de cada fila; NaN si una fila no tiene datos
+        """
+        weights = self.column_weights(group_weights)
+        target = self._z[row].astype(np.float64)
+        dots = self._z @ (weights * target)
+        norms = np.sqrt(self._squared @ weights) * np.sqrt(np.square(target) @ weights)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(norms > 0, dots / norms, np.nan)
+
+    def most_similar(self, player_name, k=10, group_weights=None, position=None, min_minutes=0):
+        """
+        Devuelve los k jugadores más parecidos a uno dado entre los que cumplen
+        los filtros de posición y minutos. Se toma la primera fila del jugador
+        como referencia y cada jugador aparece una sola vez (con su fila más
+        parecida).
+
+        Args:
+            player_name (str): Jugador de referencia
+            k (int): Número de jugadores a devolver
+            group_weights (dict, optional): Grupo -> peso
+            position (str, optional): Posición de los candidatos ("Todas" o None para todas)
+            min_minutes (int): Mínimo de minutos jugados de los candidatos
+
+        Returns:
+            tuple: (posiciones de fila, similitudes) ordenadas de más a menos parecido,
+                o (None, None) si el jugador no está en los datos
+        """
+        matches = np.flatnonzero(self._names == player_name)
+        if len(matches) == 0:
+            return None, None
+
+        scores = self.similarities(matches[0], group_weights)
+        candidates = (self._names != player_name) & (self._minutes >= min_minutes) & ~np.isnan(scores)
+        if position and position != "Todas":
+            candidates &= self._pos == position
+        rows = np.flatnonzero(candidates)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        # Mejor fila de cada jugador: orden por similitud y primera aparición del nombre
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        _, first = np.unique(self._names[rows], return_index=True)
+        rows = rows[np.sort(first)][:k]
+        return rows, scores[rows]
+
+
+# Puntuaciones compuestas a partir de perfiles de pesos
+class CompositeScorer:
+    """
+    Guarda la matriz de todas las métricas numéricas estandarizadas (z-scores),
+    orientada de forma que un valor mayor siempre es mejor: las métricas de
+    lower_is_better cambian de signo. La puntuación de un perfil es la media de
+    los z-scores ponderada por sus pesos, y varios perfiles se evalúan a la vez
+    con un único producto de matrices.
+
+    Las posiciones de fila son posiciones (iloc) del DataFrame indexado.
+
+    Args:
+        df (DataFrame): Datos de jugadores (no se modifica)
+        metric_stats (MetricStats, optional): Estadísticas precalculadas de df
+        lower_is_better (iterable): Métricas en las que un valor menor es mejor
+    """
+
+    def __init__(self, df, metric_stats=None, lower_is_better=()):
+        self.n_rows = len(df)
+        self.metrics = [
+            col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)
+        ]
+        self._metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+        z = standardized_matrix(df, self.metrics, metric_stats)
+        lower = [self._metric_index[m] for m in lower_is_better if m in self._metric_index]
+        if lower:
+            z = z.copy()
+            z[:, lower] *= -1
+            z.flags.writeable = False
+        self._z = z
+
+    def __contains__(self, metric):
+        return metric in self._metric_index
+
+    def weight_matrix(self, profiles):
+        """
+        Construye la matriz de pesos (métricas x perfiles), normalizada para que
+        los pesos de cada perfil sumen 1. Se ignoran las métricas que no existen
+        en los datos y los pesos negativos.
+
+        Args:
+            profiles (dict): Perfil -> {métrica: peso}
+
+        Returns:
+            numpy.ndarray: Matriz de pesos en float32
+        """
+        weights = np.zeros((len(self.metrics), len(profiles)), dtype=np.float32)
+        for j, metric_weights in enumerate(profiles.values()):
+            for metric, weight in metric_weights.items():
+                if metric in self._metric_index and weight > 0:
+                    weights[self._metric_index[metric], j] = weight
+        totals = weights.sum(axis=0)
+        return weights / np.where(totals > 0, totals, 1)
+
+    def scores(self, profiles):
+        """
+        Calcula la puntuación de todos los jugadores en varios perfiles a la vez.
+
+        Args:
+            profiles (dict): Perfil -> {métrica: peso}
+
+        Returns:
+            numpy.ndarray: Matriz (jugadores x perfiles) de puntuaciones
+        """
+        return self._z @ self.weight_matrix(profiles)
@@ -0,0 +1,762 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics_utils import CompositeScorer, MetricStats, PercentileTable, SimilarityIndex
+from index_utils import ViewIndexes
+
+# Logger del módulo de datos (no usa Streamlit para poder ejecutarse fuera de la app)
+logger = logging.getLogger("cac_scouting.data")
+
+# Subcarpeta de DATA_DIR donde se guardan las copias columnares de los Excel
+SIDECAR_DIRNAME = ".cache"
+
+
+# Función para calcular el hash del contenido de un archivo
+def file_sha256(file_path, chunk_size=1 << 20):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyendo por bloques.
+
+    Args:
+        file_path (Path): Ruta al archivo
+        chunk_size (int): Tamaño de cada bloque de lectura en bytes
+
+    Returns:
+        str: Hash hexadecimal del archivo
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Función para obtener las rutas del sidecar y sus metadatos
+def get_sidecar_paths(file_path):
+    """
+    Devuelve las rutas del archivo Parquet y del JSON de metadatos asociados a un Excel.
+
+    Args:
+        file_path (Path): Ruta al archivo Excel
+
+    Returns:
+        tuple: (ruta del Parquet, ruta del JSON de metadatos)
+    """
+    file_path = Path(file_path)
+    cache_dir = file_path.parent / SIDECAR_DIRNAME
+    return cache_dir / f"{file_path.name}.parquet", cache_dir / f"{file_path.name}.json"
+
+
+# Función para comprobar si el sidecar sigue siendo válido
+def is_sidecar_valid(file_path):
+    """
+    Comprueba si el sidecar de un Excel corresponde a su contenido actual.
+
+    Si el tamaño y la fecha de modificación coinciden se da por válido sin leer
+    el Excel; si solo cambió la fecha (p. ej. tras un checkout) se compara el hash
+    y, si coincide, se actualizan los metadatos.
+
+    Args:
+        file_path (Path): Ruta al archivo Excel
+
+    Returns:
+        bool: True si el sidecar puede usarse en lugar del Excel
+    """
+    file_path = Path(file_path)
+    sidecar_path, meta_path = get_sidecar_paths(file_path)
+    if not sidecar_path.exists() or not meta_path.exists():
+        return False
+
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+
+    stat = file_path.stat()
+    if meta.get("size") != stat.st_size:
+        return False
+    if meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+
+    # La fecha cambió: validar por contenido
+    if meta.get("sha256") != file_sha256(file_path):
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    return True
+
+
+# Función para generar el sidecar columnar de un Excel
+def build_sidecar(file_path, df=None):
+    """
+    Convierte un archivo Excel en un sidecar Parquet junto a sus metadatos (hash y mtime).
+
+    Args:
+        file_path (Path): Ruta al archivo Excel
+        df (DataFrame, optional): Datos ya leídos del Excel, para no volver a parsearlo
+
+    Returns:
+        DataFrame: Datos del archivo
+    """
+    file_path = Path(file_path)
+    if df is None:
+        df = pd.read_excel(file_path)
+
+    sidecar_path, meta_path = get_sidecar_paths(file_path)
+    try:
+        sidecar_path.parent.mkdir(exist_ok=True)
+        tmp_path = sidecar_path.with_suffix(".tmp")
+        df.to_parquet(tmp_path, index=False)
+        tmp_path.replace(sidecar_path)
+
+        stat = file_path.stat()
+        meta = {
+            "source": file_path.name,
+            "sha256": file_sha256(file_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        logger.info("sidecar generado: %s (%d filas)", sidecar_path.name, len(df))
+    except Exception as e:
+        # Sin pyarrow o con tipos no serializables seguimos con el Excel
+        logger.warning("no se pudo generar el sidecar de %s: %s", file_path.name, e)
+
+    return df
+
+
+# Función para eliminar el sidecar de un Excel
+def remove_sidecar(file_path):
+    """
+    Elimina el sidecar y los metadatos asociados a un archivo Excel, si existen.
+
+    Args:
+        file_path (Path): Ruta al archivo Excel
+    """
+    for path in get_sidecar_paths(file_path):
+        path.unlink(missing_ok=True)
+
+
+# Función para leer un archivo de jugadores usando el sidecar cuando es válido
+def read_player_file(file_path):
+    """
+    Lee un archivo Excel de jugadores desde su sidecar Parquet si sigue siendo válido;
+    en caso contrario parsea el Excel y regenera el sidecar.
+
+    Args:
+        file_path (Path): Ruta al archivo Excel
+
+    Returns:
+        DataFrame: Datos del archivo
+    """
+    file_path = Path(file_path)
+    if is_sidecar_valid(file_path):
+        sidecar_path, _ = get_sidecar_paths(file_path)
+        try:
+            return pd.read_parquet(sidecar_path)
+        except Exception as e:
+            logger.warning("sidecar ilegible para %s: %s", file_path.name, e)
+
+    return build_sidecar(file_path)
+
+
+# Función para regenerar los sidecars de todos los archivos de una carpeta
+def refresh_sidecars(data_dir):
+    """
+    Genera los sidecars que falten o estén desactualizados en una carpeta de datos.
+
+    Args:
+        data_dir (Path): Carpeta con los archivos Excel
+
+    Returns:
+        list: Nombres de los archivos cuyo sidecar se ha regenerado
+    """
+    rebuilt = []
+    for file_path in sorted(Path(data_dir).glob("*.xlsx")):
+        if not is_sidecar_valid(file_path):
+            build_sidecar(file_path)
+            rebuilt.append(file_path.name)
+    return rebuilt
+
+
+# Función auxiliar del pool de procesos: lee un archivo y mide el tiempo
+def _ingest_player_file(file_path):
+    start = time.perf_counter()
+    df = read_player_file(file_path)
+    return df, time.perf_counter() - start
+
+
+# Función para leer varios archivos de jugadores en paralelo
+def iter_player_files(files, parallel=True, max_workers=None):
+    """
+    Lee varios archivos de jugadores, en paralelo con un pool de procesos, y los
+    devuelve uno a uno en el mismo orden de entrada a medida que están disponibles.
+    El pool solo se usa si hay más de un Excel sin sidecar válido. Los tiempos y
+    tamaños de cada archivo se registran en el log del módulo.
+
+    Args:
+        files (list): Rutas de los archivos a leer
+        parallel (bool): Si se usa un pool de procesos
+        max_workers (int, optional): Número máximo de procesos
+
+    Yields:
+        tuple: (ruta, DataFrame o None, excepción o None)
+    """
+    files = [Path(f) for f in files]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # Solo compensa arrancar procesos para los Excel que hay que parsear
+    stale_files = sum(1 for f in files if not is_sidecar_valid(f))
+    max_workers = min(max_workers, stale_files)
+
+    def log_result(file_path, df, elapsed):
+        logger.info(
+            "ingesta archivo=%s filas=%d columnas=%d segundos=%.3f",
+            file_path.name, df.shape[0], df.shape[1], elapsed
+        )
+
+    done = 0
+    if parallel and max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_ingest_player_file, f) for f in files]
+                for file_path, future in zip(files, futures):
+                    try:
+                        df, elapsed = future.result()
+                    except Exception as e:
+                        logger.error("ingesta archivo=%s error=%s", file_path.name, e)
+                        done += 1
+                        yield file_path, None, e
+                        continue
+                    log_result(file_path, df, elapsed)
+                    done += 1
+                    yield file_path, df, None
+            return
+        except OSError as e:
+            # Entornos sin soporte para procesos: se sigue en secuencial
+            logger.warning("pool de procesos no disponible (%s), lectura secuencial", e)
+
+    for file_path in files[done:]:
+        try:
+            df, elapsed = _ingest_player_file(file_path)
+        except Exception as e:
+            logger.error("ingesta archivo=%s error=%s", file_path.name, e)
+            yield file_path, None, e
+            continue
+        log_result(file_path, df, elapsed)
+        yield file_path, df, None
+
+# Catálogo de competiciones: cada competición se asocia a su archivo de datos.
+# "Todas" no tiene archivo propio, se construye a partir de las demás.
+ALL_COMPETITIONS = "Todas"
+COMPETITION_FILES = {
+    "1ra RFEF": "wyscout_1ra_RFEF_limpio.xlsx",
+    "2da RFEF": "wyscout_2da_RFEF_limpio.xlsx",
+}
+
+
+# Función para obtener las opciones del selector de competición
+def get_competition_options():
+    """
+    Devuelve las competiciones disponibles en el orden del selector.
+
+    Returns:
+        list: Nombres de las competiciones, empezando por "Todas"
+    """
+    return [ALL_COMPETITIONS] + list(COMPETITION_FILES)
+
+
+# Función para construir el catálogo de competiciones
+def build_competition_catalog(data_dir):
+    """
+    Carga una vez cada archivo de competición y los concatena en un único DataFrame
+    etiquetado con la columna categórica 'competicion'. Cada competición queda
+    registrada como un rango contiguo de filas del DataFrame combinado.
+
+    Args:
+        data_dir (Path): Carpeta con los archivos de datos
+
+    Returns:
+        tuple: (DataFrame combinado, dict competición -> (inicio, fin))
+    """
+    frames = []
+    ranges = {}
+    start = 0
+    for comp, file_name in COMPETITION_FILES.items():
+        file_path = Path(data_dir) / file_name
+        if not file_path.exists():
+            logger.warning("archivo de competición no encontrado: %s", file_name)
+            continue
+        df = read_player_file(file_path)
+        ranges[comp] = (start, start + len(df))
+        start += len(df)
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(), {}
+
+    combined = pd.concat(frames, ignore_index=True)
+    codes = np.repeat(np.arange(len(ranges)), [hi - lo for lo, hi in ranges.values()])
+    # Se une como un bloque más: insertar la columna en el resultado de concat (que
+    # puede tener un bloque por columna) avisa de que el DataFrame está fragmentado
+    competicion = pd.Series(pd.Categorical.from_codes(codes, categories=list(ranges)), name="competicion")
+    combined = pd.concat([combined, competicion], axis=1)
+    return apply_schema(combined), ranges
+
+
+# Función para seleccionar una competición del catálogo
+def select_competition(combined, ranges, comp):
+    """
+    Devuelve la vista de una competición como un corte de filas del DataFrame combinado,
+    sin copiar los datos.
+
+    Args:
+        combined (DataFrame): DataFrame combinado del catálogo
+        ranges (dict): Rangos de filas por competición
+        comp (str): Competición seleccionada
+
+    Returns:
+        DataFrame: Datos de la competición
+    """
+    if comp == ALL_COMPETITIONS or comp not in ranges:
+        return combined
+    start, end = ranges[comp]
+    return combined.iloc[start:end]
+
+
+# Número máximo de valores distintos que se guardan en el perfil de una columna de texto
+PROFILE_UNIQUE_LIMIT = 1000
+
+
+# Función para calcular el perfil de las columnas de un DataFrame
+def build_column_profile(df):
+    """
+    Calcula en una sola pasada vectorizada el perfil de cada columna: tipo, mínimo,
+    máximo, número de nulos, número de valores distintos, si los valores son enteros
+    y, para las columnas de texto o categóricas, sus valores distintos ordenados.
+
+    Args:
+        df (DataFrame): Datos de jugadores
+
+    Returns:
+        dict: Columna -> perfil (dict)
+    """
+    profile = {}
+
+    numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col].dtype)]
+    if numeric_cols and len(df):
+        values = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        nulls = len(df) - valid.sum(axis=0)
+        with np.errstate(all="ignore"):
+            mins = np.nanmin(np.where(valid, values, np.inf), axis=0)
+            maxs = np.nanmax(np.where(valid, values, -np.inf), axis=0)
+            fraction = np.where(valid, np.abs(values - np.round(values)), 0.0)
+        has_decimals = (fraction > 0).any(axis=0)
+        significant_decimals = (fraction > 0.01).any(axis=0)
+        cardinality = df[numeric_cols].nunique()
+
+        for i, col in enumerate(numeric_cols):
+            empty = nulls[i] == len(df)
+            profile[col] = {
+                "kind": "numeric",
+                "min": None if empty else float(mins[i]),
+                "max": None if empty else float(maxs[i]),
+                "nulls": int(nulls[i]),
+                "cardinality": int(cardinality[col]),
+                "has_decimals": bool(has_decimals[i]),
+                "significant_decimals": bool(significant_decimals[i]),
+            }
+
+    for col in df.columns:
+        if col in profile:
+            continue
+        series = df[col]
+        dtype = series.dtype
+        if (pd.api.types.is_string_dtype(dtype) or pd.api.types.is_object_dtype(dtype)
+                or isinstance(dtype, pd.CategoricalDtype)):
+            kind = "text"
+        elif pd.api.types.is_bool_dtype(dtype):
+            kind = "bool"
+        else:
+            kind = "other"
+
+        unique_values = series.dropna().unique()
+        entry = {
+            "kind": kind,
+            "nulls": int(series.isna().sum()),
+            "cardinality": len(unique_values),
+        }
+        if kind == "text" and len(unique_values) <= PROFILE_UNIQUE_LIMIT:
+            entry["unique"] = sorted(unique_values.tolist())
+        profile[col] = entry
+
+    return profile
+
+
+# Conjunto de datos de jugadores compartido entre sesiones
+class PlayerDataset:
+    """
+    Catálogo de competiciones cargado una sola vez por proceso y compartido en
+    solo lectura por todas las sesiones. Las competiciones se sirven como vistas
+    (cortes de filas) del DataFrame combinado, nunca como copias.
+
+    Attributes:
+        frame (DataFrame): Datos combinados de todas las competiciones
+        ranges (dict): Rango de filas de cada competición
+        version (str): Huella de los archivos de origen, cambia si cambian los datos
+        indexes (dict): Índices precalculados de cada vista
+        profiles (dict): Perfil de columnas de cada vista
+        percentiles (dict): Tabla de percentiles precalculados de cada vista
+        stats (dict): Estadísticas de normalización de cada vista
+        similarity (dict): Índice de similitud entre jugadores de cada vista
+        scorers (dict): Matriz de puntuaciones compuestas de cada vista
+    """
+
+    def __init__(self, frame, ranges, version):
+        self.frame = frame
+        self.ranges = ranges
+        self.version = version
+        # Índices construidos una sola vez al cargar, alineados con cada vista
+        self.indexes = {
+            comp: ViewIndexes(self.view(comp))
+            for comp in [ALL_COMPETITIONS] + list(ranges)
+        }
+        self.profiles = {
+            comp: build_column_profile(self.view(comp))
+            for comp in [ALL_COMPETITIONS] + list(ranges)
+        }
+        self.percentiles = {
+            comp: PercentileTable(self.view(comp))
+            for comp in [ALL_COMPETITIONS] + list(ranges)
+        }
+        self.stats = {
+            comp: MetricStats(self.view(comp))
+            for comp in [ALL_COMPETITIONS] + list(ranges)
+        }
+        self.similarity = {
+            comp: SimilarityIndex(self.view(comp), VIZ_METRIC_GROUPS, self.stats[comp])
+            for comp in [ALL_COMPETITIONS] + list(ranges)
+        }
+        self.scorers = {
+            comp: CompositeScorer(self.view(comp), self.stats[comp], LOWER_IS_BETTER_METRICS)
+            for comp in [ALL_COMPETITIONS] + list(ranges)
+        }
+
+    def view(self, comp):
+        """
+        Devuelve la vista de una competición sin copiar los datos.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            DataFrame: Datos de la competición (no modificar)
+        """
+        return select_competition(self.frame, self.ranges, comp)
+
+    def view_indexes(self, comp):
+        """
+        Devuelve los índices alineados con la vista de una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            ViewIndexes: Índices de la vista
+        """
+        if comp not in self.ranges:
+            comp = ALL_COMPETITIONS
+        return self.indexes[comp]
+
+    def column_profile(self, comp):
+        """
+        Devuelve el perfil de columnas de la vista de una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            dict: Columna -> perfil
+        """
+        if comp not in self.ranges:
+            comp = ALL_COMPETITIONS
+        return self.profiles[comp]
+
+    def percentile_table(self, comp):
+        """
+        Devuelve la tabla de percentiles precalculados de la vista de una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            PercentileTable: Percentiles por posición y minutos
+        """
+        if comp not in self.ranges:
+            comp = ALL_COMPETITIONS
+        return self.percentiles[comp]
+
+    def metric_stats(self, comp):
+        """
+        Devuelve las estadísticas de normalización de la vista de una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            MetricStats: Estadísticas por métrica y posición
+        """
+        if comp not in self.ranges:
+            comp = ALL_COMPETITIONS
+        return self.stats[comp]
+
+    def similarity_index(self, comp):
+        """
+        Devuelve el índice de similitud entre jugadores de la vista de una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            SimilarityIndex: Índice sobre las métricas de VIZ_METRIC_GROUPS
+        """
+        if comp not in self.ranges:
+            comp = ALL_COMPETITIONS
+        return self.similarity[comp]
+
+    def composite_scorer(self, comp):
+        """
+        Devuelve la matriz de puntuaciones compuestas de la vista de una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            CompositeScorer: Métricas estandarizadas para los perfiles de pesos
+        """
+        if comp not in self.ranges:
+            comp = ALL_COMPETITIONS
+        return self.scorers[comp]
+
+
+# Función para cargar el conjunto de datos compartido
+def load_player_dataset(data_dir):
+    """
+    Construye el catálogo de competiciones y calcula su versión a partir del
+    hash de los archivos de origen.
+
+    Args:
+        data_dir (Path): Carpeta con los archivos de datos
+
+    Returns:
+        PlayerDataset: Conjunto de datos compartido
+    """
+    frame, ranges = build_competition_catalog(data_dir)
+    digest = hashlib.sha256()
+    for comp in ranges:
+        file_path = Path(data_dir) / COMPETITION_FILES[comp]
+        digest.update(f"{file_path.name}:{file_sha256(file_path)}".encode())
+    return PlayerDataset(frame, ranges, digest.hexdigest()[:16])
+
+# Grupos de columnas de los datos de Wyscout
+COLUMN_GROUPS = {
+    "GENERAL": [
+        "jugador", "equipo", "pos", "pos_secun", "pj", "min", 
+        "anio_nac", "edad", "pais_nat", "pasap", "valor_tm",
+        "fin_contrato", "prestamo", "alt_cm", "peso_kg", "pie",
+        "competicion"
+    ],
+    "FASE DEFENSIVA": [
+        "acc_def/90", "duelos_def/90", "duelos_def_w_pct",
+        "duelos_aer/90", "duelos_aer_w_pct", "entradas/90",
+        "posesion_tras_entrada", "tiros_int/90",
+        "interc/90", "posesion_tras_interc",
+        "faltas/90", "TA", "TA/90", "TR", "TR/90", "duelos/90", "duelos_w_pct"
+    ],
+    "FASE OFENSIVA": [
+        "goles", "goles/90", "goles_exc_pen", "goles_exc_pen/90",
+        "goles_cabeza", "goles_cabeza/90", "remates", "remates/90", 
+        "remates_port_pct", "xg", "xg/90", "goles_conv_pct", "desmarq/90",
+        "desmarq_pct", "duelos_atq/90", "duelos_atq_w_pct",
+        "toques_area_pen/90", "carreras_prog/90", "acel/90",
+        "regates/90", "regates_pct", "centros/90",
+        "centros_prec_pct", "centros_izq/90", "centros_izq_pct",
+        "centros_der/90", "centros_der_pct",
+        "centros_area_peq/90", "centros_ult_terc/90", "acc_atq/90", 
+        "atq_prof/90", "faltas_rec/90"
+    ],
+    "ORGANIZACIÓN": [
+        "asis", "asis/90", "xa", "xa/90", "pases/90", "pases_pct", 
+        "pases_adel/90", "pases_adel_pct", "pases_atras/90", "pases_atras_pct",
+        "pases_lat/90", "pases_lat_pct", "long_media_pases_m", 
+        "long_media_pases_larg_m", "pases_rec/90", "pases_cor_med/90", 
+        "pases_cor_med_pct", "pases_larg/90", "pases_larg_pct",
+        "pases_prog/90", "pases_prog_pct", "pases_larg_rec/90"
+    ],
+    "PASES CLAVES": [
+        "pases_ult_terc/90", "pases_ult_terc_pct",
+        "jugadas_claves/90", "asis_disparo/90",
+        "2da_asis/90", "3ra_asis/90", "pases_area_pen/90",
+        "pases_area_peq_pct", "pases_prof/90", "pases_prof_pct" 
+    ],
+    "PORTERO": [
+        "goles_recibidos", "goles_rec/90",
+        "remates_en_contra", "remates_contra/90",
+        "port_imbat/90", "paradas_pct",
+        "xg_contra", "xg_contra/90",
+        "goles_evitados", "goles_evit/90",
+        "pases_rec_arq/90", "salidas/90",
+        "duelos_aer_portero/90"
+    ],
+    "BALÓN PARADO": [
+        "tiros_libres/90", "tiros_libres_direct/90",
+        "tiros_libre_direc_pct", "corners/90",
+        "penaltis_a_favor", "penaltis_conv_pct"
+    ]
+}
+
+# Grupos de métricas de las visualizaciones (radares, comparativas y similitud)
+VIZ_METRIC_GROUPS = {
+    "ATAQUE": [
+        "goles/90", "xg/90", "remates/90", "remates_port_pct",
+        "regates/90", "regates_pct", "toques_area_pen/90"
+    ],
+    "PASES": [
+        "pases/90", "pases_pct", "pases_prog/90", "jugadas_claves/90",
+        "asis/90", "xa/90", "pases_prof/90"
+    ],
+    "DEFENSA": [
+        "duelos_def/90", "duelos_def_w_pct", "duelos_aer/90",
+        "duelos_aer_w_pct", "entradas/90", "interc/90"
+    ],
+    "PORTERO": [
+        "paradas_pct", "goles_evit/90", "salidas/90",
+        "duelos_aer_portero/90"
+    ]
+}
+
+# Métricas en las que un valor menor es mejor (se ordenan de menor a mayor en los rankings)
+LOWER_IS_BETTER_METRICS = {
+    "goles_recibidos", "goles_rec/90", "remates_en_contra", "remates_contra/90",
+    "xg_contra", "xg_contra/90", "faltas/90", "TA", "TA/90", "TR", "TR/90"
+}
+
+# Perfiles de puntuación compuesta predefinidos: perfil -> {métrica: peso}
+SCORING_PROFILES = {
+    "Central con salida de balón": {
+        "pases_prog/90": 2, "duelos_aer_w_pct": 1, "interc/90": 1, "pases_pct": 1
+    },
+    "Lateral ofensivo": {
+        "centros/90": 1, "carreras_prog/90": 1, "jugadas_claves/90": 1, "duelos_def_w_pct": 1
+    },
+    "Mediocentro organizador": {
+        "pases/90": 1, "pases_pct": 1, "pases_prog/90": 2, "pases_ult_terc/90": 1, "interc/90": 1
+    },
+    "Extremo desequilibrante": {
+        "regates/90": 2, "regates_pct": 1, "xa/90": 1, "toques_area_pen/90": 1, "carreras_prog/90": 1
+    },
+    "Delantero rematador": {
+        "goles/90": 2, "xg/90": 2, "remates_port_pct": 1, "toques_area_pen/90": 1
+    },
+    "Portero": {
+        "paradas_pct": 2, "goles_evit/90": 2, "goles_rec/90": 1, "salidas/90": 1
+    }
+}
+
+# Columnas de texto con pocos valores distintos que se guardan como categóricas
+CATEGORICAL_COLUMNS = ["equipo", "pos", "pos_secun", "pais_nat", "pie", "data_source", "competicion"]
+
+# Columnas de texto libre que se mantienen sin convertir
+TEXT_COLUMNS = ["jugador", "valor_tm", "fin_contrato", "pasap"]
+
+
+# Función para construir el registro de esquema a partir de los grupos de columnas
+def build_schema(column_groups):
+    """
+    Asigna a cada columna conocida un tipo lógico: 'category', 'text' o 'numeric'.
+    El tipo físico de las columnas numéricas se decide al cargar los datos
+    (float32 o el entero más pequeño que admita su rango).
+
+    Args:
+        column_groups (dict): Grupos de columnas
+
+    Returns:
+        dict: Columna -> tipo lógico
+    """
+    schema = {}
+    for columns in column_groups.values():
+        for col in columns:
+            if col in CATEGORICAL_COLUMNS:
+                schema[col] = "category"
+            elif col in TEXT_COLUMNS:
+                schema[col] = "text"
+            else:
+                schema[col] = "numeric"
+    for col in CATEGORICAL_COLUMNS:
+        schema.setdefault(col, "category")
+    return schema
+
+
+# Registro de esquema de los DataFrames de jugadores
+PLAYER_SCHEMA = build_schema(COLUMN_GROUPS)
+
+
+# Función para elegir el entero con signo más pequeño que admite un rango
+def smallest_int_dtype(lo, hi):
+    """
+    Devuelve el tipo entero con signo más pequeño que contiene el rango [lo, hi].
+
+    Args:
+        lo (int): Valor mínimo
+        hi (int): Valor máximo
+
+    Returns:
+        numpy.dtype: Tipo entero
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+# Función para aplicar el registro de esquema a un DataFrame de jugadores
+def apply_schema(df, schema=None):
+    """
+    Reduce el tamaño en memoria de un DataFrame de jugadores: las métricas decimales
+    pasan a float32, las enteras al entero más pequeño posible y las columnas de
+    texto con pocos valores a categóricas. Las columnas que no están en el esquema
+    o cuyo tipo no coincide con el esperado se dejan igual.
+
+    Args:
+        df (DataFrame): DataFrame original
+        schema (dict, optional): Registro de esquema (por defecto PLAYER_SCHEMA)
+
+    Returns:
+        DataFrame: DataFrame con los tipos ajustados
+    """
+    if schema is None:
+        schema = PLAYER_SCHEMA
+
+    dtypes = {}
+    for col in df.columns:
+        kind = schema.get(col)
+        dtype = df[col].dtype
+        if kind == "category":
+            if not isinstance(dtype, pd.CategoricalDtype):
+                dtypes[col] = "category"
+        elif kind == "numeric" and pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            if pd.api.types.is_float_dtype(dtype):
+                dtypes[col] = np.float32
+            elif pd.api.types.is_integer_dtype(dtype) and len(df):
+                dtypes[col] = smallest_int_dtype(df[col].min(), df[col].max())
+
+    return df.astype(dtypes) if dtypes else df
@@ -0,0 +1,189 @@
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("cac_scouting.export")
+
+# Filas que se serializan en cada bloque de la exportación
+EXPORT_CHUNK_ROWS = 5000
+
+# Formatos de exportación disponibles: etiqueta -> (extensión, tipo MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+# Flujo de lectura alimentado por un generador de bloques de bytes
+class ChunkStream(io.RawIOBase):
+    """
+    Objeto tipo fichero de solo lectura que consume un generador de bloques de
+    bytes a medida que se lee. El generador solo se ejecuta al leer; quien lee
+    decide si reúne el contenido (st.download_button lo lee entero antes de
+    enviarlo).
+
+    Args:
+        chunks (iterable): Bloques de bytes
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+# Buffer que entrega lo escrito hasta el momento y se vacía
+class _DrainBuffer(io.RawIOBase):
+    """Destino de escritura para ParquetWriter y openpyxl que se vacía en cada bloque."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+# Función para generar la exportación en CSV por bloques
+def iter_csv_chunks(view, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Serializa la vista en CSV bloque a bloque; solo el primero lleva cabecera.
+
+    Args:
+        view (PagedView): Vista de las filas filtradas
+        chunk_size (int): Filas por bloque
+
+    Yields:
+        bytes: Fragmentos del fichero CSV en UTF-8
+    """
+    if len(view) == 0:
+        yield pd.DataFrame(columns=view.columns).to_csv(index=False).encode("utf-8")
+        return
+    for i, chunk in enumerate(view.iter_chunks(chunk_size)):
+        yield chunk.to_csv(index=False, header=(i == 0)).encode("utf-8")
+
+
+# Función para generar la exportación en Parquet por bloques
+def iter_parquet_chunks(view, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Serializa la vista en Parquet escribiendo un row group por bloque.
+
+    Args:
+        view (PagedView): Vista de las filas filtradas
+        chunk_size (int): Filas por bloque
+
+    Yields:
+        bytes: Fragmentos del fichero Parquet
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _DrainBuffer()
+    writer = None
+    try:
+        for chunk in view.iter_chunks(chunk_size):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            yield sink.drain()
+        if writer is None:
+            empty = view.take(np.empty(0, dtype=np.intp))
+            writer = pq.ParquetWriter(sink, pa.Schema.from_pandas(empty, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+# Función para generar la exportación en Excel por bloques
+def iter_xlsx_chunks(view, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Serializa la vista en Excel con un libro de openpyxl en modo solo escritura,
+    añadiendo las filas bloque a bloque. El XLSX es un zip que solo se puede
+    cerrar al final, así que el fichero completo se entrega en un único bloque.
+
+    Args:
+        view (PagedView): Vista de las filas filtradas
+        chunk_size (int): Filas por bloque
+
+    Yields:
+        bytes: Fichero XLSX (el formato zip solo se cierra al final)
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Jugadores")
+    sheet.append(list(view.columns))
+    for chunk in view.iter_chunks(chunk_size):
+        values = chunk.astype(object)
+        values = values.where(values.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(list(row))
+
+    sink = _DrainBuffer()
+    workbook.save(sink)
+    yield sink.drain()
+
+
+# Función para crear la exportación bajo demanda de una vista
+def make_export(view, fmt, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Devuelve una función sin argumentos que genera la exportación solo cuando se
+    invoca (al pulsar el botón de descarga), como flujo de bloques.
+
+    La ventaja es que no se serializa nada hasta la descarga y que las filas se
+    convierten bloque a bloque sin copiar el DataFrame filtrado completo; la
+    memoria no queda acotada, porque Streamlit lee el fichero entero antes de
+    enviarlo (pico aproximado: el tamaño del fichero más un bloque).
+
+    Args:
+        view (PagedView): Vista de las filas filtradas
+        fmt (str): Formato de EXPORT_FORMATS
+        chunk_size (int): Filas por bloque
+
+    Returns:
+        callable: Función que devuelve un ChunkStream con el fichero
+    """
+    writers = {
+        "CSV": iter_csv_chunks,
+        "Parquet": iter_parquet_chunks,
+        "Excel": iter_xlsx_chunks,
+    }
+    writer = writers[fmt]
+
+    def export():
+        logger.info("export format=%s rows=%d cols=%d", fmt, len(view), len(view.columns))
+        return ChunkStream(writer(view, chunk_size))
+
+    return export
@@ -0,0 +1,269 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Función para compilar los filtros activos en un plan de filtrado
+def compile_filter_plan(active_filters, filter_values, filter_types):
+    """
+    Convierte los filtros activos y sus valores en un plan inmutable de predicados.
+    Los filtros sin efecto (texto vacío, multiselect vacío, toggle desactivado) se
+    descartan, de modo que dos estados equivalentes producen el mismo plan.
+
+    Args:
+        active_filters (list): Nombres de los filtros activos
+        filter_values (dict): Valores de cada filtro
+        filter_types (dict): Tipos de filtro por grupo de columnas
+
+    Returns:
+        tuple: Predicados (columna, tipo, valor)
+    """
+    filter_info = {}
+    for filters in filter_types.values():
+        for name, info in filters.items():
+            filter_info.setdefault(name, info)
+
+    plan = []
+    for name in active_filters:
+        if name not in filter_values or name not in filter_info:
+            continue
+
+        ftype = filter_info[name]["type"]
+        value = filter_values[name]
+
+        if ftype == "text" and value:
+            plan.append((name, "text", str(value)))
+        elif ftype == "range":
+            lo, hi = value
+            plan.append((name, "range", (lo, hi)))
+        elif ftype == "multiselect" and value:
+            plan.append((name, "multiselect", tuple(value)))
+        elif ftype == "toggle" and value:
+            plan.append((name, "toggle", True))
+
+    return tuple(plan)
+
+
+# Función para evaluar un predicado del plan sobre una columna
+def predicate_mask(series, ftype, value, indexes=None):
+    """
+    Evalúa un predicado sobre una columna y devuelve una máscara booleana de NumPy.
+    Si se proporcionan los índices de la vista, los filtros de rango usan el índice
+    de columnas ordenadas, los multiselect el índice de bitmaps y los de texto el
+    índice de trigramas.
+
+    Args:
+        series (Series): Columna del DataFrame
+        ftype (str): Tipo de filtro ('text', 'range', 'multiselect' o 'toggle')
+        value: Valor del filtro
+        indexes (ViewIndexes, optional): Índices alineados con la columna
+
+    Returns:
+        numpy.ndarray: Máscara booleana
+    """
+    if ftype == "text":
+        # Búsqueda por trigramas sin distinguir mayúsculas ni acentos
+        if indexes is not None and series.name in indexes.text:
+            return indexes.text[series.name].mask(value)
+        # Búsqueda de texto con case insensitive
+        return series.astype(str).str.contains(value, case=False, na=False).to_numpy(dtype=bool)
+
+    if ftype == "range":
+        lo, hi = value
+        if indexes is not None and series.name in indexes.sorted:
+            return indexes.sorted.range_mask(series.name, lo, hi)
+        values = series.to_numpy()
+        # Comparar en la precisión de la columna (float32)
+        if np.issubdtype(values.dtype, np.floating):
+            lo, hi = values.dtype.type(lo), values.dtype.type(hi)
+        return (values >= lo) & (values <= hi)
+
+    if ftype == "multiselect":
+        if indexes is not None and series.name in indexes.bitmap:
+            return indexes.bitmap.mask(series.name, value)
+        return series.isin(value).to_numpy(dtype=bool)
+
+    if ftype == "toggle":
+        return (series == True).to_numpy(dtype=bool)
+
+    return np.ones(len(series), dtype=bool)
+
+
+# Caché LRU de máscaras por filtro individual
+class MaskCache:
+    """
+    Guarda la máscara booleana de cada predicado, con la clave
+    (datos, columna, tipo, valor). Al cambiar un único filtro solo se recalcula su
+    máscara; el resto se reutiliza y se combina con un AND. Es segura entre hilos
+    para poder compartirse entre sesiones de Streamlit.
+
+    Args:
+        max_entries (int): Número máximo de máscaras guardadas
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_mask(self, data_key, series, ftype, value, indexes=None):
+        """
+        Devuelve la máscara de un predicado, calculándola solo si no está en caché.
+
+        Args:
+            data_key: Identificador de los datos (versión del dataset y competición)
+            series (Series): Columna a filtrar
+            ftype (str): Tipo de filtro
+            value: Valor del filtro
+            indexes (ViewIndexes, optional): Índices alineados con la columna
+
+        Returns:
+            numpy.ndarray: Máscara booleana de solo lectura
+        """
+        key = (data_key, series.name, ftype, value)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+
+        mask = predicate_mask(series, ftype, value, indexes=indexes)
+        mask.flags.writeable = False
+        with self._lock:
+            self._masks[key] = mask
+            self._masks.move_to_end(key)
+            while len(self._masks) > self.max_entries:
+                self._masks.popitem(last=False)
+        return mask
+
+    def clear(self):
+        """Vacía la caché."""
+        with self._lock:
+            self._masks.clear()
+
+
+# Función para evaluar un plan de filtrado completo
+def evaluate_filter_plan(df, plan, mask_cache=None, data_key=None, indexes=None):
+    """
+    Combina todos los predicados del plan en una única máscara booleana, sin crear
+    DataFrames intermedios ni copiar el DataFrame original. Si hay varios filtros
+    multiselect con índice de bitmaps, se intersecan sus bitmaps empaquetados y se
+    desempaquetan una sola vez.
+
+    Args:
+        df (DataFrame): Datos de jugadores
+        plan (tuple): Plan generado con compile_filter_plan
+        mask_cache (MaskCache, optional): Caché de máscaras por predicado
+        data_key (optional): Identificador de los datos para la caché
+        indexes (ViewIndexes, optional): Índices precalculados de df
+
+    Returns:
+        numpy.ndarray: Máscara booleana con las filas que cumplen todos los filtros
+    """
+    mask = np.ones(len(df), dtype=bool)
+    plan = [predicate for predicate in plan if predicate[0] in df.columns]
+
+    if indexes is not None:
+        bitmap_plan = [
+            predicate for predicate in plan
+            if predicate[1] == "multiselect" and predicate[0] in indexes.bitmap
+        ]
+        if len(bitmap_plan) > 1:
+            bitmaps = [indexes.bitmap.bitmap(col, value) for col, _, value in bitmap_plan]
+            mask &= indexes.bitmap.to_mask(indexes.bitmap.intersect(bitmaps))
+            plan = [predicate for predicate in plan if predicate not in bitmap_plan]
+
+    for col, ftype, value in plan:
+        if mask_cache is not None:
+            mask &= mask_cache.get_mask(data_key, df[col], ftype, value, indexes=indexes)
+        else:
+            mask &= predicate_mask(df[col], ftype, value, indexes=indexes)
+    return mask
+
+
+# Vista paginada sobre las filas filtradas
+class PagedView:
+    """
+    Vista de solo lectura sobre las filas que cumplen los filtros. Solo guarda el
+    array de posiciones de fila; las páginas se materializan bajo demanda con las
+    filas y columnas visibles, sin crear nunca el DataFrame filtrado completo.
+
+    Args:
+        df (DataFrame): Datos de jugadores
+        rows (numpy.ndarray): Posiciones de las filas que forman la vista, en orden
+        columns (list): Columnas visibles
+    """
+
+    def __init__(self, df, rows, columns):
+        self.df = df
+        self.rows = rows
+        self.columns = [col for col in columns if col in df.columns]
+        self._col_positions = [df.columns.get_loc(col) for col in self.columns]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def n_pages(self, rows_per_page):
+        """
+        Devuelve el número de páginas (como mínimo una).
+
+        Args:
+            rows_per_page (int): Filas por página
+
+        Returns:
+            int: Número de páginas
+        """
+        return max(1, (len(self.rows) - 1) // rows_per_page + 1)
+
+    def clamp_page(self, page, rows_per_page):
+        """
+        Ajusta un número de página al rango válido de la vista.
+
+        Args:
+            page (int): Página solicitada (empezando en 1)
+            rows_per_page (int): Filas por página
+
+        Returns:
+            int: Página válida
+        """
+        return min(max(1, page), self.n_pages(rows_per_page))
+
+    def take(self, rows):
+        """
+        Materializa las filas indicadas con las columnas visibles.
+
+        Args:
+            rows (numpy.ndarray): Posiciones de fila en df
+
+        Returns:
+            DataFrame: Filas y columnas solicitadas
+        """
+        return self.df.iloc[rows, self._col_positions]
+
+    def page(self, page, rows_per_page):
+        """
+        Materializa una única página de la vista.
+
+        Args:
+            page (int): Página (empezando en 1)
+            rows_per_page (int): Filas por página
+
+        Returns:
+            DataFrame: Filas de la página con las columnas visibles
+        """
+        start = (page - 1) * rows_per_page
+        return self.take(self.rows[start:start + rows_per_page])
+
+    def iter_chunks(self, chunk_size=5000):
+        """
+        Recorre la vista completa en bloques de filas.
+
+        Args:
+            chunk_size (int): Filas por bloque
+
+        Yields:
+            DataFrame: Bloque de filas con las columnas visibles
+        """
+        for start in range(0, len(self.rows), chunk_size):
+            yield self.take(self.rows[start:start + chunk_size])
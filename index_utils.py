@@ -0,0 +1,553 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+# Función para convertir un valor de mercado ("€ 250K", "€ 1.5M", "-") en euros
+def market_value_key(series):
+    """
+    Convierte los valores de mercado de Transfermarkt en euros para poder ordenarlos.
+
+    Args:
+        series (Series): Columna valor_tm
+
+    Returns:
+        numpy.ndarray: Valores en euros (NaN si no hay valor)
+    """
+    parts = series.astype(str).str.extract(r"([\d.,]+)\s*([KkMm]?)")
+    amount = pd.to_numeric(parts[0].str.replace(",", ".", regex=False), errors="coerce")
+    multiplier = parts[1].str.upper().map({"K": 1e3, "M": 1e6}).fillna(1.0)
+    return (amount * multiplier).to_numpy(dtype=np.float64)
+
+
+# Función para convertir una fecha en texto en un valor ordenable
+def date_key(series):
+    """
+    Convierte fechas en texto (AAAA-MM-DD) en días desde 1970 para poder ordenarlas.
+
+    Args:
+        series (Series): Columna de fechas
+
+    Returns:
+        numpy.ndarray: Días desde 1970 (NaN si la fecha no es válida)
+    """
+    dates = pd.to_datetime(series.astype(str), errors="coerce", format="%Y-%m-%d")
+    days = (dates - pd.Timestamp("1970-01-01")).dt.days
+    return days.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# Claves de orden específicas de columnas de texto con valores numéricos
+SORT_KEY_FUNCTIONS = {
+    "valor_tm": market_value_key,
+    "fin_contrato": date_key,
+}
+
+
+# Función para obtener una clave de orden numérica de cualquier columna
+def sort_key(series):
+    """
+    Devuelve una clave numérica con la que ordenar una columna: los valores de las
+    columnas numéricas, una conversión específica para las columnas de
+    SORT_KEY_FUNCTIONS y el orden alfabético para el resto de columnas de texto.
+
+    Args:
+        series (Series): Columna a ordenar
+
+    Returns:
+        numpy.ndarray: Clave de orden (NaN para los nulos)
+    """
+    if series.name in SORT_KEY_FUNCTIONS:
+        return SORT_KEY_FUNCTIONS[series.name](series)
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy()
+    codes, _ = pd.factorize(series.astype(object), sort=True)
+    return np.where(codes >= 0, codes, np.nan)
+
+
+# Índice de columnas numéricas ordenadas
+class SortedColumnIndex:
+    """
+    Guarda, para cada columna numérica de un DataFrame, el orden de sus filas
+    (argsort estable, con los nulos al final) y los valores ordenados. Los filtros de
+    rango se resuelven con búsqueda binaria y los rankings se leen directamente del
+    orden, sin recorrer ni ordenar la columna en cada consulta.
+
+    Las columnas de sort_columns solo se indexan para ordenar la tabla, usando su
+    clave de orden (sort_key); no admiten filtros de rango.
+
+    Las posiciones devueltas son posiciones de fila (iloc) del DataFrame indexado.
+
+    Args:
+        df (DataFrame): Datos a indexar (no se modifica)
+        columns (list, optional): Columnas a indexar; por defecto todas las numéricas
+        sort_columns (list, optional): Columnas adicionales indexadas solo para ordenar
+    """
+
+    def __init__(self, df, columns=None, sort_columns=None):
+        if columns is None:
+            columns = [
+                col for col in df.columns
+                if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)
+            ]
+        sort_columns = [col for col in (sort_columns or []) if col not in columns]
+
+        self.n_rows = len(df)
+        self._range_columns = set(columns)
+        self._order = {}
+        self._sorted = {}
+        for col in list(columns) + sort_columns:
+            values = df[col].to_numpy() if col in self._range_columns else sort_key(df[col])
+            order = np.argsort(values, kind="stable").astype(np.int32)
+            sorted_values = values[order]
+            # Los NaN quedan al final del argsort: solo se guardan los valores válidos
+            if np.issubdtype(sorted_values.dtype, np.floating):
+                sorted_values = sorted_values[:np.count_nonzero(~np.isnan(sorted_values))]
+            order.flags.writeable = False
+            sorted_values.flags.writeable = False
+            self._order[col] = order
+            self._sorted[col] = sorted_values
+
+    def __contains__(self, col):
+        return col in self._range_columns
+
+    def can_sort(self, col):
+        """Indica si la columna está indexada para ordenar."""
+        return col in self._order
+
+    def range_rows(self, col, lo=None, hi=None):
+        """
+        Devuelve las posiciones de las filas con lo <= valor <= hi (los nulos nunca cumplen).
+
+        Args:
+            col (str): Columna indexada
+            lo (float, optional): Límite inferior (sin límite si es None)
+            hi (float, optional): Límite superior (sin límite si es None)
+
+        Returns:
+            numpy.ndarray: Posiciones de fila en orden ascendente del valor
+        """
+        sorted_values = self._sorted[col]
+        cast = sorted_values.dtype.type if np.issubdtype(sorted_values.dtype, np.floating) else float
+        left = 0 if lo is None else np.searchsorted(sorted_values, cast(lo), side="left")
+        right = len(sorted_values) if hi is None else np.searchsorted(sorted_values, cast(hi), side="right")
+        return self._order[col][left:max(left, right)]
+
+    def range_mask(self, col, lo=None, hi=None):
+        """
+        Devuelve la máscara booleana del filtro de rango lo <= valor <= hi.
+
+        Args:
+            col (str): Columna indexada
+            lo (float, optional): Límite inferior
+            hi (float, optional): Límite superior
+
+        Returns:
+            numpy.ndarray: Máscara booleana
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.range_rows(col, lo, hi)] = True
+        return mask
+
+    def order(self, col, ascending=True):
+        """
+        Devuelve el orden de las filas según una columna, con los nulos siempre al final.
+
+        Args:
+            col (str): Columna indexada
+            ascending (bool): Orden ascendente o descendente
+
+        Returns:
+            numpy.ndarray: Posiciones de fila ordenadas
+        """
+        order = self._order[col]
+        if ascending:
+            return order
+        n_valid = len(self._sorted[col])
+        return np.concatenate([order[:n_valid][::-1], order[n_valid:]])
+
+    def top_n(self, col, n, mask=None, ascending=False):
+        """
+        Devuelve las n primeras filas según una columna, opcionalmente restringidas
+        a una máscara, leyendo el orden precalculado. Los nulos quedan al final.
+
+        Args:
+            col (str): Columna indexada
+            n (int): Número de filas
+            mask (numpy.ndarray, optional): Filas candidatas
+            ascending (bool): Si se toman los valores más bajos en lugar de los más altos
+
+        Returns:
+            numpy.ndarray: Posiciones de fila del top-n
+        """
+        order = self.order(col, ascending=ascending)
+        if mask is not None:
+            order = order[mask[order]]
+        return order[:n]
+
+    def sort_rows(self, col, rows, ascending=True):
+        """
+        Ordena un subconjunto de filas según una columna recorriendo el orden
+        precalculado, sin ordenar ni copiar los datos. Los nulos quedan al final.
+
+        Args:
+            col (str): Columna indexada
+            rows (numpy.ndarray): Posiciones de las filas a ordenar
+            ascending (bool): Orden ascendente o descendente
+
+        Returns:
+            numpy.ndarray: Las mismas posiciones de fila, ordenadas
+        """
+        order = self.order(col, ascending=ascending)
+        if len(rows) == self.n_rows:
+            return order
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return order[mask[order]]
+
+
+# Función para obtener la máscara de minutos mínimos jugados
+def min_minutes_mask(df, min_minutes, sorted_index=None):
+    """
+    Devuelve la máscara de jugadores con al menos min_minutes minutos. Si se
+    proporciona un índice alineado con df se resuelve con búsqueda binaria.
+
+    Args:
+        df (DataFrame): Datos de jugadores
+        min_minutes (int): Minutos mínimos jugados
+        sorted_index (SortedColumnIndex, optional): Índice de columnas ordenadas de df
+
+    Returns:
+        numpy.ndarray: Máscara booleana
+    """
+    if sorted_index is not None and "min" in sorted_index and sorted_index.n_rows == len(df):
+        return sorted_index.range_mask("min", lo=min_minutes)
+    # Comparar sobre el array de NumPy devuelve una máscara nueva (modificable)
+    return df["min"].to_numpy() >= min_minutes
+
+
+# Función para obtener el top-k de una columna con selección parcial
+def top_k_rows(values, k, mask=None, ascending=False):
+    """
+    Devuelve las k primeras filas según unos valores sin ordenar todas las filas:
+    np.partition localiza el valor k-ésimo y solo se ordenan las filas que lo
+    igualan o superan. El desempate es el de SortedColumnIndex.top_n (a igual
+    valor, la fila anterior primero en orden ascendente y la posterior en
+    descendente) y los nulos solo aparecen al final si no hay k valores válidos.
+
+    Args:
+        values (numpy.ndarray): Valores de la métrica
+        k (int): Número de filas
+        mask (numpy.ndarray, optional): Filas candidatas
+        ascending (bool): Si se toman los valores más bajos en lugar de los más altos
+
+    Returns:
+        numpy.ndarray: Posiciones de fila del top-k, en orden
+    """
+    k = max(int(k), 0)
+    values = np.asarray(values, dtype=np.float64)
+    rows = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+    valid = ~np.isnan(values[rows])
+    null_rows = rows[~valid]
+    rows = rows[valid]
+
+    # Clave en la que "menor" es "mejor" según el sentido del ranking
+    keys = values[rows] if ascending else -values[rows]
+    if 0 < k < len(rows):
+        kth = np.partition(keys, k - 1)[k - 1]
+        selected = keys <= kth
+        rows, keys = rows[selected], keys[selected]
+
+    order = np.lexsort((rows if ascending else -rows, keys))
+    top = rows[order][:k]
+    if len(top) < k:
+        top = np.concatenate([top, null_rows[:k - len(top)]])
+    return top
+
+
+# Columnas categóricas con índice de bitmaps
+BITMAP_COLUMNS = ["equipo", "pos", "pie", "pais_nat"]
+
+
+# Índice de bitmaps para columnas categóricas de baja cardinalidad
+class BitmapIndex:
+    """
+    Guarda, para cada valor de las columnas indexadas, un bitmap empaquetado
+    (np.packbits) con las filas que lo contienen y su número de filas. Un filtro
+    multiselect es la unión (OR) de los bitmaps de sus valores y varios filtros se
+    combinan con la intersección (AND); los recuentos por opción salen gratis.
+
+    Args:
+        df (DataFrame): Datos a indexar (no se modifica)
+        columns (list, optional): Columnas a indexar; por defecto BITMAP_COLUMNS
+    """
+
+    def __init__(self, df, columns=None):
+        if columns is None:
+            columns = BITMAP_COLUMNS
+
+        self.n_rows = len(df)
+        self._bitmaps = {}
+        self._counts = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                values = series.cat.categories
+            else:
+                codes, values = pd.factorize(series)
+
+            bitmaps = {}
+            counts = {}
+            for code, value in enumerate(values):
+                rows = codes == code
+                count = int(np.count_nonzero(rows))
+                if count == 0:
+                    continue
+                bitmap = np.packbits(rows)
+                bitmap.flags.writeable = False
+                bitmaps[value] = bitmap
+                counts[value] = count
+            self._bitmaps[col] = bitmaps
+            self._counts[col] = counts
+
+    def __contains__(self, col):
+        return col in self._bitmaps
+
+    def bitmap(self, col, values):
+        """
+        Devuelve la unión de los bitmaps de varios valores de una columna.
+
+        Args:
+            col (str): Columna indexada
+            values (list): Valores seleccionados
+
+        Returns:
+            numpy.ndarray: Bitmap empaquetado
+        """
+        result = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        bitmaps = self._bitmaps[col]
+        for value in values:
+            if value in bitmaps:
+                result |= bitmaps[value]
+        return result
+
+    def to_mask(self, bitmap):
+        """
+        Convierte un bitmap empaquetado en una máscara booleana.
+
+        Args:
+            bitmap (numpy.ndarray): Bitmap empaquetado
+
+        Returns:
+            numpy.ndarray: Máscara booleana
+        """
+        return np.unpackbits(bitmap, count=self.n_rows).astype(bool)
+
+    def mask(self, col, values):
+        """
+        Devuelve la máscara booleana de un filtro multiselect.
+
+        Args:
+            col (str): Columna indexada
+            values (list): Valores seleccionados
+
+        Returns:
+            numpy.ndarray: Máscara booleana
+        """
+        return self.to_mask(self.bitmap(col, values))
+
+    def intersect(self, bitmaps):
+        """
+        Devuelve la intersección de varios bitmaps empaquetados.
+
+        Args:
+            bitmaps (list): Bitmaps a combinar
+
+        Returns:
+            numpy.ndarray: Bitmap empaquetado
+        """
+        result = np.full((self.n_rows + 7) // 8, 0xFF, dtype=np.uint8)
+        for bitmap in bitmaps:
+            result &= bitmap
+        return result
+
+    def counts(self, col):
+        """
+        Devuelve el número de filas de cada valor de una columna.
+
+        Args:
+            col (str): Columna indexada
+
+        Returns:
+            dict: Valor -> número de filas
+        """
+        return self._counts.get(col, {})
+
+
+# Columnas de texto con índice de trigramas
+TEXT_SEARCH_COLUMNS = ["jugador", "equipo"]
+
+
+# Función para normalizar texto (minúsculas y sin acentos)
+def fold_text(text):
+    """
+    Pasa un texto a minúsculas y elimina los acentos y diacríticos.
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Texto normalizado
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+# Función para obtener los trigramas de un texto
+def trigrams(text):
+    """
+    Devuelve el conjunto de trigramas de un texto.
+
+    Args:
+        text (str): Texto (ya normalizado)
+
+    Returns:
+        set: Trigramas
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Índice de trigramas para búsqueda de texto
+class TrigramIndex:
+    """
+    Índice invertido de trigramas sobre una columna de texto normalizada (sin
+    acentos y en minúsculas). Una búsqueda por subcadena intersecta las listas de
+    filas de los trigramas de la consulta y solo verifica esos candidatos; si no
+    hay coincidencias exactas, la búsqueda aproximada ordena las filas por
+    similitud de trigramas para tolerar erratas.
+
+    Args:
+        series (Series): Columna de texto a indexar (no se modifica)
+    """
+
+    def __init__(self, series):
+        self.n_rows = len(series)
+        # Cada texto se rodea de espacios para que los extremos tengan trigramas propios
+        self._folded = [f" {fold_text(v)} " if pd.notna(v) else "" for v in series]
+        postings = {}
+        self._sizes = np.zeros(self.n_rows, dtype=np.int32)
+        for row, text in enumerate(self._folded):
+            grams = trigrams(text)
+            self._sizes[row] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+        self._postings = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def search(self, query):
+        """
+        Devuelve las filas cuyo texto contiene la consulta, sin distinguir
+        mayúsculas ni acentos.
+
+        Args:
+            query (str): Texto a buscar
+
+        Returns:
+            numpy.ndarray: Posiciones de fila en orden ascendente
+        """
+        query = fold_text(query).strip()
+        if not query:
+            return np.arange(self.n_rows, dtype=np.int32)
+
+        grams = trigrams(query)
+        if grams:
+            lists = [self._postings.get(gram) for gram in grams]
+            if any(rows is None for rows in lists):
+                return np.empty(0, dtype=np.int32)
+            lists.sort(key=len)
+            candidates = lists[0]
+            for rows in lists[1:]:
+                candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        else:
+            # Consultas de menos de tres caracteres: se revisan todas las filas
+            candidates = range(self.n_rows)
+
+        return np.asarray([row for row in candidates if query in self._folded[row]], dtype=np.int32)
+
+    def fuzzy_search(self, query, limit=20, min_similarity=0.3):
+        """
+        Devuelve las filas más parecidas a la consulta según la similitud de
+        Jaccard entre sus trigramas, para tolerar erratas.
+
+        Args:
+            query (str): Texto a buscar
+            limit (int): Número máximo de filas
+            min_similarity (float): Similitud mínima (0-1)
+
+        Returns:
+            numpy.ndarray: Posiciones de fila ordenadas de más a menos parecida
+        """
+        grams = trigrams(f" {fold_text(query).strip()} ")
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+
+        hits = np.bincount(np.concatenate(lists), minlength=self.n_rows)
+        similarity = hits / np.maximum(len(grams) + self._sizes - hits, 1)
+        rows = np.flatnonzero(similarity >= min_similarity)
+        rows = rows[np.argsort(-similarity[rows], kind="stable")]
+        return rows[:limit].astype(np.int32)
+
+    def mask(self, query):
+        """
+        Devuelve la máscara booleana de la búsqueda por subcadena.
+
+        Args:
+            query (str): Texto a buscar
+
+        Returns:
+            numpy.ndarray: Máscara booleana
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+# Índices precalculados de una vista de datos
+class ViewIndexes:
+    """
+    Agrupa los índices construidos sobre una misma vista de datos, de modo que
+    todas las posiciones de fila que devuelven están alineadas con ella.
+
+    Attributes:
+        sorted (SortedColumnIndex): Índice de columnas numéricas ordenadas
+        bitmap (BitmapIndex): Índice de bitmaps de columnas categóricas
+        text (dict): Índice de trigramas de cada columna de texto
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.sorted = SortedColumnIndex(df, sort_columns=list(df.columns))
+        self.bitmap = BitmapIndex(df)
+        self.text = {col: TrigramIndex(df[col]) for col in TEXT_SEARCH_COLUMNS if col in df.columns}
+
+    def search_players(self, query, fuzzy_limit=20):
+        """
+        Busca jugadores por nombre o equipo. Si no hay coincidencias por subcadena,
+        devuelve los nombres más parecidos a la consulta.
+
+        Args:
+            query (str): Texto a buscar
+            fuzzy_limit (int): Número máximo de resultados aproximados
+
+        Returns:
+            numpy.ndarray: Posiciones de fila de los jugadores encontrados
+        """
+        matches = [index.search(query) for index in self.text.values()]
+        rows = np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int32)
+        if len(rows) == 0 and "jugador" in self.text:
+            rows = self.text["jugador"].fuzzy_search(query, limit=fuzzy_limit)
+        return rows
@@ -0,0 +1,707 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
+
+logger = logging.getLogger("cac_scouting.reports")
+
+# Subcarpeta de REPORTS_DIR donde se guardan los PDF ya generados
+PDF_CACHE_DIRNAME = ".pdf_cache"
+
+# Tamaño máximo de la caché de PDF en disco
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Versión de la plantilla de los PDF: al cambiar el diseño invalida la caché
+PDF_TEMPLATE_VERSION = 1
+
+# PDF que se generan a la vez en la exportación masiva, por proceso
+BULK_IN_FLIGHT_PER_WORKER = 2
+
+# Subcarpeta de REPORTS_DIR donde se guardan los ZIP de la exportación masiva
+ZIP_EXPORT_DIRNAME = ".zip_exports"
+
+# Antigüedad a partir de la cual se borra un ZIP exportado (segundos)
+ZIP_EXPORT_MAX_AGE = 6 * 60 * 60
+
+# Campos de la consulta que no forman parte del contenido del informe
+VOLATILE_REPORT_FIELDS = {"scout_name", "total_reports"}
+
+
+# Función para construir los estilos de los PDF de informes
+def report_styles():
+    """
+    Construye los estilos de párrafo y de tabla de los PDF de informes. Se usan a
+    través de PDF_TEMPLATES, que los construye una sola vez.
+
+    Returns:
+        dict: Estilos ('title', 'subtitle', 'normal', 'table', 'summary_table')
+    """
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            alignment=1,  # Centrado
+            spaceAfter=20
+        ),
+        "subtitle": ParagraphStyle(
+            'SubtitleStyle',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=10
+        ),
+        "normal": styles['Normal'],
+        # Tablas de etiqueta/valor (datos del partido y del jugador)
+        "table": TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.black),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('BACKGROUND', (1, 0), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        # Tabla con cabecera (resumen del dossier)
+        "summary_table": TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.black),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+        ]),
+    }
+
+
+# Registro de estilos y plantillas de los PDF, construido una vez por proceso
+class PDFTemplateRegistry:
+    """
+    Construye los estilos de párrafo y de tabla de report_styles la primera vez
+    que se piden y los comparte entre todas las llamadas e hilos (y, en la
+    exportación masiva, entre todos los PDF de cada proceso). ReportLab solo lee
+    los estilos al maquetar, así que pueden compartirse; no deben modificarse.
+
+    Los marcos de página (Frame) sí guardan estado durante la maquetación, por lo
+    que cada documento recibe su propia plantilla creada con la configuración de
+    página del registro.
+
+    Args:
+        pagesize (tuple): Tamaño de página
+        margin (float): Margen de la página en puntos
+    """
+
+    def __init__(self, pagesize=A4, margin=inch):
+        self.pagesize = pagesize
+        self.margin = margin
+        self._styles = None
+        self._lock = threading.Lock()
+
+    @property
+    def styles(self):
+        """Estilos compartidos ('title', 'subtitle', 'normal', 'table', 'summary_table')."""
+        if self._styles is None:
+            with self._lock:
+                if self._styles is None:
+                    self._styles = report_styles()
+        return self._styles
+
+    def document(self, buffer, **kwargs):
+        """
+        Crea la plantilla de documento de un PDF con la configuración de página
+        del registro.
+
+        Args:
+            buffer (BytesIO): Destino del PDF
+            **kwargs: Metadatos del documento (title, author...)
+
+        Returns:
+            SimpleDocTemplate: Plantilla del documento
+        """
+        return SimpleDocTemplate(
+            buffer,
+            pagesize=self.pagesize,
+            leftMargin=self.margin,
+            rightMargin=self.margin,
+            topMargin=self.margin,
+            bottomMargin=self.margin,
+            **kwargs
+        )
+
+
+# Registro de plantillas compartido por todos los PDF del proceso
+PDF_TEMPLATES = PDFTemplateRegistry()
+
+
+# Función para construir los elementos del PDF de un informe
+def report_flowables(report_data, styles):
+    """
+    Construye los elementos (párrafos, tablas e imagen) del PDF de un informe,
+    para generarlo solo o como parte de un dossier.
+
+    Args:
+        report_data (dict): Datos del informe
+        styles (dict): Estilos de report_styles
+
+    Returns:
+        list: Elementos de ReportLab
+    """
+    title_style = styles['title']
+    subtitle_style = styles['subtitle']
+    normal_style = styles['normal']
+    report_elements = []
+    
+    # Título del informe
+    report_elements.append(Paragraph(f"INFORME DE SCOUTING - {report_data['player_name']}", title_style))
+    report_elements.append(Spacer(1, 0.25*inch))
+    
+    # Datos del partido
+    match_data = [
+        ["Fecha del partido:", report_data['match_date']],
+        ["Equipo local:", report_data['local_team']],
+        ["Equipo visitante:", report_data['visitor_team']],
+        ["Resultado:", report_data['result']]
+    ]
+    match_table = Table(match_data, colWidths=[2.5*inch, 3*inch])
+    match_table.setStyle(styles['table'])
+    report_elements.append(match_table)
+    report_elements.append(Spacer(1, 0.25*inch))
+    
+    # Datos del jugador
+    player_data = [
+        ["Jugador:", report_data['player_name']],
+        ["Club:", report_data['player_club']],
+        ["Posición:", report_data['position']],
+        ["Valoración general:", f"{report_data['overall_rating']}/10"],
+        ["Titular:", "Sí" if report_data['is_starter'] else "No"],
+        ["Minutos jugados:", f"{report_data['minutes_played']}"]
+    ]
+    player_table = Table(player_data, colWidths=[2.5*inch, 3*inch])
+    player_table.setStyle(styles['table'])
+    report_elements.append(player_table)
+    report_elements.append(Spacer(1, 0.25*inch))
+    
+    # Secciones de análisis
+    sections = [
+        ("ASPECTOS TÉCNICOS", report_data['technical_aspects']),
+        ("ASPECTOS TÁCTICOS", report_data['tactical_aspects']),
+        ("ASPECTOS FÍSICOS", report_data['physical_aspects']),
+        ("ASPECTOS PSICOLÓGICOS", report_data['psychological_aspects']),
+        ("OBSERVACIONES", report_data['observations'])
+    ]
+    
+    for title, content in sections:
+        report_elements.append(Paragraph(title, subtitle_style))
+        report_elements.append(Paragraph(content, normal_style))
+        report_elements.append(Spacer(1, 0.25*inch))
+    
+    # Agregar foto si existe
+    if report_data['photo_path'] and os.path.exists(report_data['photo_path']):
+        try:
+            img = Image(report_data['photo_path'], width=3*inch, height=4*inch)
+            report_elements.append(img)
+        except:
+            report_elements.append(Paragraph("Error al cargar la imagen del jugador", normal_style))
+    
+    # Agregar fecha de generación del informe
+    report_elements.append(Spacer(1, 0.5*inch))
+    report_elements.append(Paragraph(f"Informe generado el {report_data['report_date']}", normal_style))
+    
+    return report_elements
+
+
+# Función para generar el PDF de un informe
+def render_report_pdf(report_data):
+    """
+    Genera el PDF de un informe de scouting. No usa Streamlit, de modo que puede
+    ejecutarse en los procesos de la exportación masiva; los errores se propagan.
+
+    Args:
+        report_data (dict): Datos del informe
+
+    Returns:
+        BytesIO: PDF generado
+    """
+    buffer = io.BytesIO()
+    doc = PDF_TEMPLATES.document(buffer)
+    doc.build(report_flowables(report_data, PDF_TEMPLATES.styles))
+    buffer.seek(0)
+    return buffer
+
+
+# Función para obtener la clave de orden cronológico de un informe
+def match_date_key(report_data):
+    """
+    Convierte la fecha del partido (dd/mm/aaaa) en una clave ordenable.
+
+    Args:
+        report_data (dict): Datos del informe
+
+    Returns:
+        tuple: (aaaa-mm-dd, id del informe)
+    """
+    day, month, year = (report_data['match_date'].split('/') + ['', '', ''])[:3]
+    return f"{year}-{month}-{day}", report_data.get('id') or 0
+
+
+# Función para construir el gráfico de valoración a lo largo del tiempo
+def rating_chart(reports, width=6.5*inch, height=2.5*inch):
+    """
+    Construye un gráfico de líneas (vectorial, de ReportLab) con la valoración
+    general de cada informe en orden cronológico.
+
+    Args:
+        reports (list): Informes en orden cronológico
+        width (float): Ancho del gráfico en puntos
+        height (float): Alto del gráfico en puntos
+
+    Returns:
+        Drawing: Gráfico
+    """
+    drawing = Drawing(width, height)
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 40, 30
+    chart.width, chart.height = width - 60, height - 50
+    chart.data = [[report['overall_rating'] for report in reports]]
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = 10
+    chart.valueAxis.valueStep = 2
+    chart.lines[0].strokeColor = colors.black
+    chart.lines[0].strokeWidth = 1.5
+    chart.lines[0].symbol = makeMarker('FilledCircle', size=4)
+
+    # Como mucho unas 12 etiquetas de fecha para que no se solapen
+    step = max(1, len(reports) // 12)
+    chart.categoryAxis.categoryNames = [
+        report['match_date'] if i % step == 0 else '' for i, report in enumerate(reports)
+    ]
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontSize = 7
+    drawing.add(chart)
+    return drawing
+
+
+# Función para generar el dossier PDF de un jugador
+def render_player_dossier(reports, player_name=None):
+    """
+    Genera un único PDF con todos los informes de un jugador en orden cronológico:
+    una portada con el resumen de los informes y la evolución de la valoración,
+    y a continuación cada informe en su página. Los estilos son los del registro
+    compartido, de modo que el tiempo crece linealmente con el número de informes.
+
+    Sin informes (por ejemplo, si se han borrado después de elegir el jugador) se
+    genera una única página que lo indica.
+
+    Args:
+        reports (list): Informes del jugador
+        player_name (str, optional): Nombre del jugador si la lista está vacía
+
+    Returns:
+        BytesIO: PDF generado
+    """
+    reports = sorted(reports, key=match_date_key)
+    styles = PDF_TEMPLATES.styles
+    if not reports:
+        suffix = f" - {player_name}" if player_name else ""
+        buffer = io.BytesIO()
+        doc = PDF_TEMPLATES.document(buffer, title=f"Dossier de scouting{suffix}")
+        doc.build([
+            Paragraph(f"DOSSIER DE SCOUTING{suffix}", styles['title']),
+            Paragraph("No hay informes de este jugador.", styles['normal']),
+        ])
+        buffer.seek(0)
+        logger.info("player_dossier player=%s informes=0", player_name)
+        return buffer
+    player_name = reports[0]['player_name']
+    ratings = [report['overall_rating'] for report in reports]
+
+    elements = [
+        Paragraph(f"DOSSIER DE SCOUTING - {player_name}", styles['title']),
+        Paragraph(
+            f"{len(reports)} informes entre el {reports[0]['match_date']} y el {reports[-1]['match_date']}. "
+            f"Valoración media: {sum(ratings) / len(ratings):.1f}/10.",
+            styles['normal']
+        ),
+        Spacer(1, 0.25*inch),
+        Paragraph("EVOLUCIÓN DE LA VALORACIÓN", styles['subtitle']),
+        rating_chart(reports),
+        Spacer(1, 0.25*inch),
+        Paragraph("INFORMES", styles['subtitle']),
+    ]
+
+    summary = [["Fecha", "Partido", "Resultado", "Valoración", "Minutos", "Scout"]]
+    for report in reports:
+        summary.append([
+            report['match_date'],
+            f"{report['local_team']} vs {report['visitor_team']}",
+            report['result'],
+            f"{report['overall_rating']}/10",
+            f"{report['minutes_played']}",
+            report.get('scout_name', ''),
+        ])
+    summary_table = Table(summary, colWidths=[0.9*inch, 2.6*inch, 0.8*inch, 0.8*inch, 0.7*inch, 1*inch], repeatRows=1)
+    summary_table.setStyle(styles['summary_table'])
+    elements.append(summary_table)
+
+    for report in reports:
+        elements.append(PageBreak())
+        elements.extend(report_flowables(report, styles))
+
+    buffer = io.BytesIO()
+    doc = PDF_TEMPLATES.document(buffer, title=f"Dossier de scouting - {player_name}")
+    doc.build(elements)
+    buffer.seek(0)
+    logger.info("player_dossier player=%s informes=%d bytes=%d", player_name, len(reports), buffer.getbuffer().nbytes)
+    return buffer
+
+
+# Función para obtener el nombre de archivo del PDF de un informe
+def report_pdf_filename(report_data):
+    return f"informe_{report_data['player_name'].replace(' ', '_')}_{report_data['match_date'].replace('/', '-')}.pdf"
+
+
+# Función para calcular la huella del contenido de un informe
+def report_content_hash(report_data):
+    """
+    Calcula el hash del contenido de un informe: sus campos, la versión de la
+    plantilla y, si tiene foto, su ruta, tamaño y fecha de modificación. Cualquier
+    cambio en el informe o en su foto produce un hash distinto.
+
+    Args:
+        report_data (dict): Datos del informe
+
+    Returns:
+        str: Hash hexadecimal (16 caracteres)
+    """
+    content = {k: v for k, v in report_data.items() if k not in VOLATILE_REPORT_FIELDS}
+    content["_template"] = PDF_TEMPLATE_VERSION
+
+    photo_path = report_data.get("photo_path")
+    if photo_path and os.path.exists(photo_path):
+        stat = os.stat(photo_path)
+        content["_photo"] = [stat.st_size, stat.st_mtime_ns]
+
+    payload = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+# Caché en disco de los PDF de los informes
+class ReportPDFCache:
+    """
+    Guarda en disco el PDF de cada informe con el nombre
+    <id del informe>_<hash del contenido>.pdf, de modo que las descargas repetidas
+    leen los bytes del archivo en lugar de volver a generar el PDF. Al guardar una
+    nueva versión de un informe se borran las anteriores, y si la carpeta supera
+    max_bytes se eliminan los PDF usados hace más tiempo.
+
+    Args:
+        cache_dir (Path): Carpeta de la caché
+        max_bytes (int): Tamaño máximo de la carpeta
+    """
+
+    def __init__(self, cache_dir, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, report_data):
+        """
+        Devuelve la ruta del PDF de un informe en la caché.
+
+        Args:
+            report_data (dict): Datos del informe (con 'id')
+
+        Returns:
+            Path: Ruta del archivo
+        """
+        return self.cache_dir / f"{report_data['id']}_{report_content_hash(report_data)}.pdf"
+
+    def get(self, report_data):
+        """
+        Devuelve el PDF de un informe si está en la caché con el mismo contenido.
+
+        Args:
+            report_data (dict): Datos del informe
+
+        Returns:
+            bytes: Contenido del PDF, o None si no está (o el informe no tiene 'id')
+        """
+        if report_data.get("id") is None:
+            return None
+        path = self.path_for(report_data)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        # Marcar el archivo como usado recientemente para la expulsión (puede
+        # haberse expulsado justo después de leerlo)
+        with suppress(OSError):
+            os.utime(path)
+        logger.info("pdf_cache hit report_id=%s", report_data["id"])
+        return data
+
+    def contains(self, report_data):
+        """
+        Indica si el PDF de un informe está en la caché, sin leerlo.
+
+        Args:
+            report_data (dict): Datos del informe
+
+        Returns:
+            bool: True si el archivo existe (puede expulsarse antes de leerlo)
+        """
+        return report_data.get("id") is not None and self.path_for(report_data).is_file()
+
+    def put(self, report_data, data):
+        """
+        Guarda el PDF de un informe, sustituyendo sus versiones anteriores.
+
+        Args:
+            report_data (dict): Datos del informe (sin 'id' no se guarda)
+            data (bytes): Contenido del PDF
+        """
+        if report_data.get("id") is None:
+            return
+        self._store(self.path_for(report_data), report_data["id"], data)
+        logger.info("pdf_cache store report_id=%s bytes=%d", report_data["id"], len(data))
+
+    def get_or_render(self, report_data, render):
+        """
+        Devuelve el PDF de un informe desde la caché o, si no está, lo genera con
+        render y lo guarda. Los informes sin 'id' (aún no guardados) no se cachean.
+
+        Args:
+            report_data (dict): Datos del informe
+            render (callable): Función que recibe report_data y devuelve el PDF (BytesIO)
+
+        Returns:
+            bytes: Contenido del PDF, o None si no se pudo generar
+        """
+        data = self.get(report_data)
+        if data is not None:
+            return data
+
+        pdf_buffer = render(report_data)
+        if pdf_buffer is None:
+            return None
+        data = pdf_buffer.getvalue()
+        self.put(report_data, data)
+        return data
+
+    def _store(self, path, report_id, data):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("no se pudo guardar el PDF del informe %s en la caché: %s", report_id, e)
+            return
+
+        with self._lock:
+            # Versiones anteriores del mismo informe
+            for old_path in self.cache_dir.glob(f"{report_id}_*.pdf"):
+                if old_path != path:
+                    old_path.unlink(missing_ok=True)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            logger.info("pdf_cache evict file=%s bytes=%d", entry.name, size)
+
+
+# Función auxiliar del pool de procesos: genera un PDF y mide el tiempo
+def _render_report_bytes(report_data):
+    start = time.perf_counter()
+    data = render_report_pdf(report_data).getvalue()
+    return data, time.perf_counter() - start
+
+
+# Función para generar los PDF de varios informes en paralelo
+def iter_report_pdfs(reports, pdf_cache=None, parallel=True, max_workers=None):
+    """
+    Genera los PDF de varios informes y los devuelve uno a uno en el orden de
+    entrada. Los que están en la caché se leen del disco al entregarlos (y se
+    generan de nuevo si se han expulsado entretanto); el resto se generan en un
+    pool de procesos con como mucho BULK_IN_FLIGHT_PER_WORKER PDF pendientes
+    por proceso, de modo que la memoria no crece con el número de informes.
+
+    Args:
+        reports (list): Datos de los informes
+        pdf_cache (ReportPDFCache, optional): Caché de PDF en disco
+        parallel (bool): Si se usa un pool de procesos
+        max_workers (int, optional): Número máximo de procesos
+
+    Yields:
+        tuple: (informe, bytes del PDF o None, excepción o None)
+    """
+    # Solo se comprueba qué informes están en la caché; cada PDF se lee al entregarlo
+    cached = [pdf_cache is not None and pdf_cache.contains(report) for report in reports]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, cached.count(False))
+
+    def finish(report, data, elapsed):
+        logger.info("report_pdf report_id=%s bytes=%d segundos=%.3f", report.get("id"), len(data), elapsed)
+        if pdf_cache is not None:
+            pdf_cache.put(report, data)
+
+    def render(report):
+        try:
+            data, elapsed = _render_report_bytes(report)
+        except Exception as e:
+            logger.error("report_pdf report_id=%s error=%s", report.get("id"), e)
+            return report, None, e
+        finish(report, data, elapsed)
+        return report, data, None
+
+    def from_cache(report):
+        data = pdf_cache.get(report)
+        # Expulsado de la caché desde la comprobación inicial: se genera de nuevo
+        return (report, data, None) if data is not None else render(report)
+
+    done = 0
+    if parallel and max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                window = max_workers * BULK_IN_FLIGHT_PER_WORKER
+                pending = {}
+                submitted = 0
+                for i, report in enumerate(reports):
+                    # Mantener como mucho 'window' PDF en vuelo por delante del actual
+                    while submitted < len(reports) and submitted < i + window:
+                        if not cached[submitted]:
+                            pending[submitted] = pool.submit(_render_report_bytes, reports[submitted])
+                        submitted += 1
+                    if cached[i]:
+                        done += 1
+                        yield from_cache(report)
+                        continue
+                    try:
+                        data, elapsed = pending.pop(i).result()
+                    except Exception as e:
+                        logger.error("report_pdf report_id=%s error=%s", report.get("id"), e)
+                        done += 1
+                        yield report, None, e
+                        continue
+                    finish(report, data, elapsed)
+                    done += 1
+                    yield report, data, None
+            return
+        except OSError as e:
+            # Entornos sin soporte para procesos: se sigue en secuencial
+            logger.warning("pool de procesos no disponible (%s), generación secuencial", e)
+
+    for report, is_cached in zip(reports[done:], cached[done:]):
+        yield from_cache(report) if is_cached else render(report)
+
+
+# Función para escribir varios informes en un ZIP
+def write_reports_zip(reports, zip_path, pdf_cache=None, progress=None, parallel=True, max_workers=None):
+    """
+    Genera el PDF de cada informe (ver iter_report_pdfs) y lo añade a un ZIP en
+    disco a medida que está disponible, sin reunir todos los PDF en memoria. Cada
+    archivo lleva el id del informe para que los nombres no se repitan.
+
+    Args:
+        reports (list): Datos de los informes
+        zip_path (Path): Ruta del ZIP a escribir
+        pdf_cache (ReportPDFCache, optional): Caché de PDF en disco
+        progress (callable, optional): Función llamada con (hechos, total)
+        parallel (bool): Si se usa un pool de procesos
+        max_workers (int, optional): Número máximo de procesos
+
+    Returns:
+        list: (informe, excepción) de los informes que no se pudieron generar
+    """
+    errors = []
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        pdfs = iter_report_pdfs(reports, pdf_cache, parallel=parallel, max_workers=max_workers)
+        for done, (report, data, error) in enumerate(pdfs, start=1):
+            if error is not None:
+                errors.append((report, error))
+            else:
+                archive.writestr(f"{report.get('id', done)}_{report_pdf_filename(report)}", data)
+            if progress is not None:
+                progress(done, len(reports))
+    logger.info("reports_zip informes=%d errores=%d bytes=%d", len(reports), len(errors), Path(zip_path).stat().st_size)
+    return errors
+
+
+# Función para reservar la ruta de un nuevo ZIP de informes
+def new_reports_zip_path(export_dir):
+    """
+    Crea un archivo vacío con nombre único en la carpeta de exportación para
+    escribir en él un ZIP de informes.
+
+    Args:
+        export_dir (Path): Carpeta de los ZIP exportados
+
+    Returns:
+        Path: Ruta del archivo
+    """
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    fd, zip_path = tempfile.mkstemp(prefix="informes_", suffix=".zip", dir=export_dir)
+    os.close(fd)
+    return Path(zip_path)
+
+
+# Función para borrar los ZIP de informes antiguos
+def remove_stale_zips(export_dir, max_age=ZIP_EXPORT_MAX_AGE):
+    """
+    Borra los ZIP de la carpeta de exportación modificados hace más de max_age
+    segundos, incluidos los de sesiones que ya no existen o que nunca se
+    descargaron.
+
+    Args:
+        export_dir (Path): Carpeta de los ZIP exportados
+        max_age (float): Antigüedad máxima en segundos
+
+    Returns:
+        int: Número de archivos borrados
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for zip_path in Path(export_dir).glob("informes_*.zip"):
+        try:
+            if zip_path.stat().st_mtime < cutoff:
+                zip_path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info("reports_zip limpieza borrados=%d", removed)
+    return removed
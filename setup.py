@@ -58,6 +58,7 @@ def main():
         "plotly",
         "openpyxl",  # Para leer archivos Excel
         "xlrd",      # Para archivos Excel más antiguos
+        "pyarrow",   # Para la caché columnar (Parquet) de los Excel
         "reportlab", # Para generar PDFs
         "pillow",    # Para manipulación de imágenes
         "beautifulsoup4",  # Para scraping web
@@ -100,6 +101,14 @@ font = "sans serif"
     
     print(f"Archivo de configuración de Streamlit creado en {config_file}")
     
+    # Generar la caché columnar de los archivos de datos existentes
+    try:
+        from data_utils import refresh_sidecars
+        rebuilt = refresh_sidecars(Path("data"))
+        print(f"Caché columnar generada para: {rebuilt if rebuilt else 'ningún archivo nuevo'}")
+    except Exception as e:
+        print(f"No se pudo generar la caché columnar de datos: {e}")
+    
     # Instrucciones finales
     print("\n=== Configuración completada ===")
     print("Para ejecutar la aplicación, usa el siguiente comando:")
@@ -0,0 +1,463 @@
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_utils import SIDECAR_DIRNAME
+from export_utils import ChunkStream, make_export as make_pandas_export
+from index_utils import TEXT_SEARCH_COLUMNS, fold_text
+
+logger = logging.getLogger("cac_scouting.sql")
+
+# DuckDB es opcional: sin él la aplicación usa siempre el motor de pandas
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+# Motores de consulta disponibles
+QUERY_BACKENDS = ["pandas", "duckdb"]
+
+# Formatos que DuckDB escribe directamente con COPY (el resto usa pandas)
+SQL_EXPORT_FORMATS = {"CSV": "FORMAT CSV, HEADER", "Parquet": "FORMAT PARQUET"}
+
+# Columna con la posición de fila de cada jugador en el conjunto de datos
+ROW_COLUMN = "_row"
+
+
+# Función para escapar un nombre de columna en SQL
+def quote_identifier(name):
+    """
+    Escapa un nombre de columna para usarlo en SQL (admite nombres como "xg/90").
+
+    Args:
+        name (str): Nombre de la columna
+
+    Returns:
+        str: Identificador entre comillas dobles
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# Función para obtener el nombre de la columna normalizada de búsqueda de texto
+def folded_column(col):
+    """Devuelve el nombre de la columna con el texto normalizado de col."""
+    return f"_fold_{col}"
+
+
+# Función para escribir el conjunto de datos en Parquet para DuckDB
+def write_dataset_parquet(dataset, data_dir):
+    """
+    Escribe el DataFrame combinado del conjunto de datos, con el esquema ya
+    aplicado, en un Parquet de la caché identificado por la versión de los datos.
+    Añade la posición de cada fila y las columnas de texto normalizado que usa la
+    búsqueda de jugadores, y elimina los Parquet de versiones anteriores.
+
+    Args:
+        dataset (PlayerDataset): Conjunto de datos de jugadores
+        data_dir (Path): Carpeta de datos
+
+    Returns:
+        Path: Ruta del Parquet
+    """
+    cache_dir = Path(data_dir) / SIDECAR_DIRNAME
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"players_{dataset.version}.parquet"
+
+    if not path.exists():
+        frame = dataset.frame.copy()
+        frame[ROW_COLUMN] = np.arange(len(frame), dtype=np.int32)
+        for col in TEXT_SEARCH_COLUMNS:
+            if col in frame.columns:
+                frame[folded_column(col)] = [
+                    f" {fold_text(v)} " if pd.notna(v) else None for v in frame[col]
+                ]
+        tmp_path = path.with_suffix(".tmp")
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    for old_path in cache_dir.glob("players_*.parquet"):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+
+    return path
+
+
+# Función para dar a un resultado de DuckDB los tipos de la exportación de pandas
+def match_pandas_schema(table, frame):
+    """
+    Convierte una tabla de Arrow leída de DuckDB al esquema que escribe pandas para
+    las mismas columnas: las categóricas vuelven a ser diccionarios con todas las
+    categorías del DataFrame (DuckDB las devuelve como texto) y se conservan los
+    metadatos de pandas, de modo que el Parquet exportado se lee igual con ambos
+    motores.
+
+    Args:
+        table (pyarrow.Table): Resultado de la consulta, con las columnas de frame
+        frame (DataFrame): DataFrame con los tipos de referencia
+
+    Returns:
+        pyarrow.Table: Tabla con el esquema de pandas
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    columns = []
+    for field, column in zip(schema, table.columns):
+        if pa.types.is_dictionary(field.type):
+            categories = pa.array(frame[field.name].cat.categories.to_numpy(), type=field.type.value_type)
+            values = column.combine_chunks().cast(field.type.value_type)
+            indices = pc.index_in(values, value_set=categories).cast(field.type.index_type)
+            column = pa.DictionaryArray.from_arrays(indices, categories)
+        else:
+            column = column.cast(field.type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+# Función para construir las columnas de la exportación CSV de DuckDB
+def csv_select_columns(frame, alias="p"):
+    """
+    Construye la lista de columnas del SELECT de la exportación CSV. DuckDB escribe
+    los booleanos como true/false y pandas como True/False, así que esas columnas
+    se convierten a texto con el formato de pandas (los nulos quedan vacíos).
+
+    Args:
+        frame (DataFrame): DataFrame con las columnas y los tipos de referencia
+        alias (str): Alias de la tabla de jugadores en la consulta
+
+    Returns:
+        str: Columnas separadas por comas
+    """
+    columns = []
+    for name, dtype in frame.dtypes.items():
+        column = f"{alias}.{quote_identifier(name)}"
+        if pd.api.types.is_bool_dtype(dtype):
+            column = f"CASE WHEN {column} THEN 'True' WHEN NOT {column} THEN 'False' END AS {quote_identifier(name)}"
+        columns.append(column)
+    return ", ".join(columns)
+
+
+# Función para leer un fichero por bloques y borrarlo al terminar
+def iter_file_chunks(path, chunk_size=1 << 20):
+    """
+    Lee un fichero temporal por bloques y lo elimina al terminar.
+
+    Args:
+        path (Path): Ruta del fichero
+        chunk_size (int): Bytes por bloque
+
+    Yields:
+        bytes: Bloques del fichero
+    """
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+# Motor de consultas DuckDB sobre el Parquet del conjunto de datos
+class DuckDBBackend:
+    """
+    Conexión DuckDB en proceso sobre el Parquet del conjunto de datos. Los planes
+    de filtrado, rankings, percentiles y exportaciones se traducen a SQL y se
+    ejecutan en paralelo sobre el almacenamiento columnar. Los resultados son
+    posiciones de fila alineadas con las vistas de PlayerDataset, de modo que
+    coinciden con los del motor de pandas.
+
+    Args:
+        dataset (PlayerDataset): Conjunto de datos de jugadores
+        data_dir (Path): Carpeta de datos
+    """
+
+    def __init__(self, dataset, data_dir):
+        self.dataset = dataset
+        self.path = write_dataset_parquet(dataset, data_dir)
+        self.dtypes = dataset.frame.dtypes.to_dict()
+        self._con = duckdb.connect(database=":memory:")
+        self._con.execute(
+            f"CREATE VIEW players AS SELECT * FROM read_parquet('{self.path.as_posix()}')"
+        )
+        self._lock = threading.Lock()
+
+    def cursor(self):
+        """Devuelve un cursor propio (las conexiones DuckDB no se comparten entre hilos)."""
+        with self._lock:
+            return self._con.cursor()
+
+    def view(self, comp):
+        """
+        Devuelve el motor de consultas restringido a una competición.
+
+        Args:
+            comp (str): Competición seleccionada
+
+        Returns:
+            SQLView: Consultas sobre las filas de la competición
+        """
+        if comp in self.dataset.ranges:
+            start, stop = self.dataset.ranges[comp]
+        else:
+            start, stop = 0, len(self.dataset.frame)
+        return SQLView(self, start, stop)
+
+
+# Consultas SQL sobre la vista de una competición
+class SQLView:
+    """
+    Consultas sobre un rango de filas del conjunto de datos (una competición). Las
+    posiciones que devuelve son posiciones de fila (iloc) de la vista.
+
+    Args:
+        backend (DuckDBBackend): Motor de consultas
+        start (int): Primera fila de la vista
+        stop (int): Fila siguiente a la última de la vista
+    """
+
+    def __init__(self, backend, start, stop):
+        self.backend = backend
+        self.start = start
+        self.stop = stop
+
+    def _where_view(self):
+        return f"{ROW_COLUMN} >= {self.start} AND {ROW_COLUMN} < {self.stop}"
+
+    def _to_rows(self, values):
+        return (np.asarray(values, dtype=np.int64) - self.start).astype(np.intp)
+
+    def predicate_sql(self, col, ftype, value):
+        """
+        Traduce un predicado del plan de filtrado a SQL con la misma semántica que
+        predicate_mask en pandas (incluida la precisión float32 de los rangos).
+
+        Args:
+            col (str): Columna
+            ftype (str): Tipo de filtro
+            value: Valor del filtro
+
+        Returns:
+            tuple: (condición SQL, parámetros)
+        """
+        ident = quote_identifier(col)
+
+        if ftype == "text":
+            if col in TEXT_SEARCH_COLUMNS:
+                # Misma normalización que el índice de trigramas
+                query = fold_text(value).strip()
+                if not query:
+                    return "TRUE", []
+                return f"contains({quote_identifier(folded_column(col))}, ?)", [query]
+            # Igual que str.contains(case=False) sobre la columna convertida a texto
+            return f"regexp_matches(COALESCE(CAST({ident} AS VARCHAR), 'nan'), ?, 'i')", [str(value)]
+
+        if ftype == "range":
+            lo, hi = value
+            if self.backend.dtypes.get(col) == np.float32:
+                return f"{ident} >= CAST(? AS FLOAT) AND {ident} <= CAST(? AS FLOAT)", [float(lo), float(hi)]
+            return f"{ident} >= ? AND {ident} <= ?", [float(lo), float(hi)]
+
+        if ftype == "multiselect":
+            if not value:
+                return "FALSE", []
+            placeholders = ", ".join("?" for _ in value)
+            return f"{ident} IN ({placeholders})", list(value)
+
+        if ftype == "toggle":
+            return f"{ident} = TRUE", []
+
+        return "TRUE", []
+
+    def filter_rows(self, plan):
+        """
+        Ejecuta un plan de filtrado y devuelve las filas que cumplen todos los predicados.
+
+        Args:
+            plan (tuple): Plan generado con compile_filter_plan
+
+        Returns:
+            numpy.ndarray: Posiciones de fila en orden ascendente
+        """
+        conditions, params = [self._where_view()], []
+        for col, ftype, value in plan:
+            if col not in self.backend.dtypes:
+                continue
+            condition, condition_params = self.predicate_sql(col, ftype, value)
+            conditions.append(f"({condition})")
+            params.extend(condition_params)
+
+        sql = f"SELECT {ROW_COLUMN} FROM players WHERE {' AND '.join(conditions)} ORDER BY {ROW_COLUMN}"
+        rows = self.backend.cursor().execute(sql, params).fetchnumpy()[ROW_COLUMN]
+        return self._to_rows(rows)
+
+    def _cohort_sql(self, min_minutes, position):
+        conditions = [self._where_view(), f"{quote_identifier('min')} >= ?"]
+        params = [min_minutes]
+        if position and position != "Todas":
+            conditions.append(f"{quote_identifier('pos')} = ?")
+            params.append(position)
+        return " AND ".join(conditions), params
+
+    def top_n(self, metric, limit, min_minutes=0, position=None, ascending=False):
+        """
+        Devuelve el top de jugadores de una métrica, con el mismo desempate que
+        SortedColumnIndex.top_n y los nulos al final.
+
+        Args:
+            metric (str): Métrica
+            limit (int): Número de jugadores
+            min_minutes (int): Minutos mínimos jugados
+            position (str, optional): Posición
+            ascending (bool): Si se toman los valores más bajos en lugar de los más altos
+
+        Returns:
+            numpy.ndarray: Posiciones de fila del ranking
+        """
+        where, params = self._cohort_sql(min_minutes, position)
+        ident = quote_identifier(metric)
+        if ascending:
+            order_by = f"{ident} ASC NULLS LAST, {ROW_COLUMN}"
+        else:
+            order_by = (
+                f"{ident} DESC NULLS LAST, "
+                f"CASE WHEN {ident} IS NULL THEN {ROW_COLUMN} ELSE -{ROW_COLUMN} END"
+            )
+        sql = f"SELECT {ROW_COLUMN} FROM players WHERE {where} ORDER BY {order_by} LIMIT ?"
+        rows = self.backend.cursor().execute(sql, params + [int(limit)]).fetchnumpy()[ROW_COLUMN]
+        return self._to_rows(rows)
+
+    def player_percentiles(self, player_name, metrics, min_minutes=0, position=None):
+        """
+        Calcula los percentiles de un jugador en su cohorte (posición y minutos) como
+        la proporción de jugadores con un valor menor o igual, igual que
+        generate_player_percentiles.
+
+        Args:
+            player_name (str): Nombre del jugador
+            metrics (list): Métricas numéricas
+            min_minutes (int): Minutos mínimos jugados
+            position (str, optional): Posición; por defecto la del jugador
+
+        Returns:
+            tuple: (dict métrica -> percentil, dict métrica -> valor), o (None, None)
+        """
+        cursor = self.backend.cursor()
+        if not position or position == "Todas":
+            found = cursor.execute(
+                f"SELECT {quote_identifier('pos')} FROM players "
+                f"WHERE {self._where_view()} AND {quote_identifier('jugador')} = ? "
+                f"ORDER BY {ROW_COLUMN} LIMIT 1",
+                [player_name]
+            ).fetchone()
+            if found is None:
+                return None, None
+            position = found[0]
+
+        where, params = self._cohort_sql(min_minutes, position)
+        if not metrics:
+            return {}, {}
+        select = ["count(*) AS n"]
+        for i, metric in enumerate(metrics):
+            ident = quote_identifier(metric)
+            select.append(
+                f"CAST(sum(CASE WHEN c.{ident} <= p.{ident} THEN 1 ELSE 0 END) AS DOUBLE) / count(*) * 100 AS pct_{i}"
+            )
+            select.append(f"any_value(p.{ident}) AS val_{i}")
+        sql = (
+            f"WITH cohort AS (SELECT * FROM players WHERE {where}), "
+            f"player AS (SELECT * FROM cohort WHERE {quote_identifier('jugador')} = ? "
+            f"ORDER BY {ROW_COLUMN} LIMIT 1) "
+            f"SELECT {', '.join(select)} FROM cohort c, player p"
+        )
+        result = cursor.execute(sql, params + [player_name]).fetchone()
+        # Sin filas: el jugador no está en la cohorte (o la cohorte está vacía)
+        if result is None or result[0] == 0:
+            return None, None
+
+        percentiles = {metric: result[2 * i + 1] for i, metric in enumerate(metrics)}
+        values = {metric: result[2 * i + 2] for i, metric in enumerate(metrics)}
+        return percentiles, values
+
+    def make_export(self, view, fmt):
+        """
+        Devuelve una función que exporta las filas de la vista paginada, en su orden,
+        con un COPY de DuckDB a un fichero temporal que se lee por bloques. El
+        Parquet se escribe con el esquema de pandas (ver match_pandas_schema) para
+        conservar las categóricas y el CSV escribe los booleanos como pandas (ver
+        csv_select_columns). Los formatos que DuckDB no escribe se exportan
+        con pandas.
+
+        Args:
+            view (PagedView): Vista de las filas filtradas
+            fmt (str): Formato de EXPORT_FORMATS
+
+        Returns:
+            callable: Función que devuelve un ChunkStream con el fichero
+        """
+        if fmt not in SQL_EXPORT_FORMATS:
+            return make_pandas_export(view, fmt)
+
+        rows = np.asarray(view.rows, dtype=np.int64) + self.start
+        reference = view.take(np.empty(0, dtype=np.intp))
+        if fmt == "CSV":
+            columns = csv_select_columns(reference)
+        else:
+            columns = ", ".join(f"p.{quote_identifier(col)}" for col in view.columns)
+        backend = self.backend
+
+        def export():
+            import pyarrow as pa
+
+            logger.info("export backend=duckdb format=%s rows=%d cols=%d", fmt, len(rows), len(view.columns))
+            handle, tmp_name = tempfile.mkstemp(suffix=f".{fmt.lower()}")
+            os.close(handle)
+            cursor = backend.cursor()
+            selection = pa.table({ROW_COLUMN: rows, "_ord": np.arange(len(rows), dtype=np.int64)})
+            cursor.register("selection", selection)
+            query = f"SELECT {columns} FROM players p JOIN selection s USING ({ROW_COLUMN}) ORDER BY s._ord"
+            if fmt == "Parquet":
+                import pyarrow.parquet as pq
+
+                table = match_pandas_schema(pa.table(cursor.execute(query).arrow()), reference)
+                pq.write_table(table, tmp_name)
+            else:
+                cursor.execute(f"COPY ({query}) TO '{Path(tmp_name).as_posix()}' ({SQL_EXPORT_FORMATS[fmt]})")
+            return ChunkStream(iter_file_chunks(tmp_name))
+
+        return export
+
+
+# Función para crear el motor de consultas configurado
+def create_query_backend(name, dataset, data_dir):
+    """
+    Crea el motor de consultas indicado en la configuración. Con "pandas", sin
+    datos o si DuckDB no está instalado devuelve None y se usa el motor de pandas.
+
+    Args:
+        name (str): Motor de QUERY_BACKENDS
+        dataset (PlayerDataset): Conjunto de datos de jugadores
+        data_dir (Path): Carpeta de datos
+
+    Returns:
+        DuckDBBackend: Motor de consultas, o None
+    """
+    if name != "duckdb" or dataset.frame.empty:
+        return None
+    if not DUCKDB_AVAILABLE:
+        logger.warning("query_backend=duckdb unavailable=duckdb_not_installed fallback=pandas")
+        return None
+    try:
+        return DuckDBBackend(dataset, data_dir)
+    except Exception as exc:
+        logger.warning("query_backend=duckdb error=%r fallback=pandas", exc)
+        return None
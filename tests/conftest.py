@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Los módulos de la aplicación están en la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_utils import SCORING_PROFILES, VIZ_METRIC_GROUPS  # noqa: E402
+
+POSITIONS = ["DC", "MC", "DFC", "LD", "POR"]
+TEAMS = ["CA Cartagena", "Atlético Baleares", "Real Murcia", "Hércules CF", "UD Ibiza"]
+
+
+# Función para generar un DataFrame de jugadores con el formato de Wyscout
+def make_players(n_rows=300, seed=0):
+    """
+    Genera datos de jugadores sintéticos y reproducibles con las columnas
+    generales, las métricas de las visualizaciones y las de los perfiles de
+    puntuación. Algunos nombres se repiten y algunas métricas tienen nulos.
+
+    Args:
+        n_rows (int): Número de filas
+        seed (int): Semilla del generador aleatorio
+
+    Returns:
+        DataFrame: Datos de jugadores
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"Jugador {i}" for i in range(n_rows)]
+    # Algunos jugadores aparecen dos veces (cambio de equipo en la temporada)
+    for i in range(0, n_rows, 37):
+        names[i] = names[i + 1] if i + 1 < n_rows else names[i]
+    names[5] = "José Ñúñez"
+
+    df = pd.DataFrame({
+        "jugador": names,
+        "equipo": rng.choice(TEAMS, n_rows),
+        "pos": rng.choice(POSITIONS, n_rows),
+        "pj": rng.integers(0, 38, n_rows),
+        "min": rng.integers(0, 3400, n_rows),
+        "edad": rng.integers(17, 38, n_rows),
+        "pais_nat": rng.choice(["España", "Argentina", "Francia"], n_rows),
+        "pie": rng.choice(["derecho", "izquierdo", "ambos"], n_rows),
+        "valor_tm": rng.choice(["€ 50K", "€ 200K", "€ 1.5M", "€ 900K", "-"], n_rows),
+        "fin_contrato": rng.choice(["2025-06-30", "2026-06-30", "2027-06-30", "-"], n_rows),
+        "goles": rng.integers(0, 20, n_rows),
+    })
+
+    metrics = {m for group in VIZ_METRIC_GROUPS.values() for m in group}
+    metrics |= {m for weights in SCORING_PROFILES.values() for m in weights}
+    for metric in sorted(metrics):
+        values = rng.gamma(2.0, 1.5, n_rows)
+        values[rng.random(n_rows) < 0.03] = np.nan
+        df[metric] = values
+
+    return df
+
+
+@pytest.fixture
+def players():
+    return make_players()
+
+
+# Función para generar los datos de un informe de scouting
+def make_report(report_id=1, **fields):
+    """
+    Devuelve un informe con los campos que devuelve get_reports_from_db.
+
+    Args:
+        report_id (int): Id del informe
+        **fields: Campos que se sustituyen
+
+    Returns:
+        dict: Datos del informe
+    """
+    report = {
+        "id": report_id,
+        "player_name": "José Ñúñez",
+        "player_club": "CA Cartagena",
+        "position": "DC",
+        "match_date": "14/09/2024",
+        "local_team": "CA Cartagena",
+        "visitor_team": "Real Murcia",
+        "result": "2-1",
+        "minutes_played": 90,
+        "is_starter": 1,
+        "overall_rating": 7,
+        "technical_aspects": "Buen control orientado.",
+        "tactical_aspects": "Fija a los centrales.",
+        "physical_aspects": "Rápido en los primeros metros.",
+        "psychological_aspects": "Competitivo.",
+        "observations": "Seguir en los próximos partidos.",
+        "photo_path": None,
+        "report_date": "2024-09-15 10:00:00",
+        "scout_name": "admin",
+        "total_reports": 1,
+    }
+    report.update(fields)
+    return report
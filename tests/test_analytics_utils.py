@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics_utils import CompositeScorer, MetricStats, PercentileTable, SimilarityIndex, stats_for
+from data_utils import SCORING_PROFILES, VIZ_METRIC_GROUPS
+from visualization_utils import generate_advanced_radar_chart, generate_player_percentiles, generate_radar_chart
+
+METRICS = ["goles/90", "xg/90", "pases_pct", "interc/90"]
+
+
+def loop_percentiles(df, player_name, metrics, min_minutes):
+    # Cálculo directo de generate_player_percentiles, sin tabla precalculada
+    result, _ = generate_player_percentiles(df, player_name, metrics, min_minutes=min_minutes)
+    if result is None:
+        return None
+    return dict(zip(result["Métrica"], result["Percentil"]))
+
+
+@pytest.mark.parametrize("min_minutes", [0, 500, 1500])
+def test_percentile_table_matches_loop(players, min_minutes):
+    table = PercentileTable(players)
+    for name in players["jugador"].unique()[:60]:
+        expected = loop_percentiles(players, name, METRICS, min_minutes)
+        percentiles, _ = table.player_percentiles(name, METRICS, min_minutes)
+        if expected is None:
+            assert percentiles is None
+        else:
+            assert percentiles == pytest.approx(expected)
+
+
+def test_percentile_table_excludes_players_without_position(players):
+    players.loc[[3, 10, 42], "pos"] = np.nan
+    table = PercentileTable(players)
+
+    # Los jugadores sin posición no tienen cohorte...
+    assert table.player_row(players["jugador"].iloc[10], 0) is None
+    squad = table.squad_percentiles(np.array([3, 10, 42]), METRICS, 0)
+    assert np.isnan(squad).all()
+
+    # ...ni cuentan en la de los demás
+    name = players.loc[players["pos"] == "DC", "jugador"].iloc[0]
+    expected = loop_percentiles(players, name, METRICS, 0)
+    percentiles, _ = table.player_percentiles(name, METRICS, 0)
+    assert percentiles == pytest.approx(expected)
+
+
+def test_squad_percentiles_below_threshold_are_nan(players):
+    table = PercentileTable(players)
+    rows = np.flatnonzero(players["min"].to_numpy() < 900)[:5]
+    assert np.isnan(table.squad_percentiles(rows, METRICS, 900)).all()
+
+
+def test_empty_frame():
+    table = PercentileTable(pd.DataFrame(columns=["jugador", "pos", "min"]))
+    assert table.player_row("Nadie", 0) is None
+
+
+def reference_zscores(df, metric):
+    series = df[metric].astype(np.float64)
+    return ((series - series.mean()) / series.std()).fillna(0).to_numpy()
+
+
+def test_composite_scores_match_pandas(players):
+    lower_is_better = {"goles_rec/90"}
+    scorer = CompositeScorer(players, lower_is_better=lower_is_better)
+    scores = scorer.scores(SCORING_PROFILES)
+
+    for j, weights in enumerate(SCORING_PROFILES.values()):
+        expected = np.zeros(len(players))
+        for metric, weight in weights.items():
+            sign = -1 if metric in lower_is_better else 1
+            expected += sign * weight * reference_zscores(players, metric)
+        expected /= sum(weights.values())
+        np.testing.assert_allclose(scores[:, j], expected, rtol=1e-4, atol=1e-5)
+
+
+def test_composite_weights_ignore_unknown_and_negative_metrics(players):
+    scorer = CompositeScorer(players)
+    weights = scorer.weight_matrix({"p": {"goles/90": 3, "xg/90": 1, "no_existe": 5, "pases_pct": -2}})
+    assert weights.sum() == pytest.approx(1)
+    assert weights[scorer.metrics.index("goles/90"), 0] == pytest.approx(0.75)
+    assert weights[scorer.metrics.index("pases_pct"), 0] == 0
+    # Un perfil sin métricas válidas puntúa 0
+    assert not scorer.scores({"vacío": {"no_existe": 1}}).any()
+
+
+def test_metric_stats_match_pandas(players):
+    players.loc[[4, 8], "pos"] = np.nan
+    stats = MetricStats(players)
+    metrics = ["goles/90", "xg/90", "min"]
+
+    expected = players[metrics].astype(np.float64)
+    overall = stats.table()
+    np.testing.assert_allclose(overall.loc[metrics, "mean"], expected.mean())
+    np.testing.assert_allclose(overall.loc[metrics, "std"], expected.std())
+    np.testing.assert_allclose(overall.loc[metrics, "q25"], expected.quantile(0.25))
+
+    for pos, cohort in expected.groupby(players["pos"]):
+        table = stats.table(pos)
+        np.testing.assert_allclose(table.loc[metrics, "min"], cohort.min())
+        np.testing.assert_allclose(table.loc[metrics, "max"], cohort.max())
+        np.testing.assert_allclose(table.loc[metrics, "q95"], cohort.quantile(0.95))
+
+    assert np.isnan(stats.get("goles/90", "mean", position="No existe"))
+    lo, hi = stats.value_range("xg/90")
+    assert stats.normalize("xg/90", lo) == 0 and stats.normalize("xg/90", hi) == 1
+
+
+def test_stats_for_reuses_matching_stats(players):
+    stats = MetricStats(players)
+    assert stats_for(players, ["xg/90"], stats) is stats
+    assert stats_for(players.iloc[:50], ["xg/90"], stats) is not stats
+
+
+def test_radars_are_unchanged_by_shared_stats(players):
+    stats = MetricStats(players)
+    metrics = VIZ_METRIC_GROUPS["ATAQUE"]
+    names = players["jugador"].iloc[[3, 20, 41]].tolist()
+
+    with_stats = generate_advanced_radar_chart(players, metrics, names, metric_stats=stats)
+    assert with_stats.to_json() == generate_advanced_radar_chart(players, metrics, names).to_json()
+    with_stats = generate_radar_chart(players, metrics, names[0], metric_stats=stats)
+    assert with_stats.to_json() == generate_radar_chart(players, metrics, names[0]).to_json()
+
+
+def brute_force_similar(df, player_name, weights, k, position=None, min_minutes=0):
+    # Coseno ponderado fila a fila sobre los z-scores calculados con pandas
+    metrics = list(weights)
+    z = pd.DataFrame({m: reference_zscores(df, m) for m in metrics})
+    w = np.array([weights[m] for m in metrics])
+    target = z[df["jugador"].to_numpy() == player_name].iloc[0].to_numpy()
+    best = {}
+    for row in range(len(df)):
+        name = df["jugador"].iat[row]
+        if name == player_name or df["min"].iat[row] < min_minutes:
+            continue
+        if position and df["pos"].iat[row] != position:
+            continue
+        vector = z.iloc[row].to_numpy()
+        norm = np.sqrt((w * vector ** 2).sum() * (w * target ** 2).sum())
+        if norm > 0:
+            best[name] = max(best.get(name, -np.inf), (w * vector * target).sum() / norm)
+    return sorted(best.items(), key=lambda item: -item[1])[:k]
+
+
+@pytest.mark.parametrize("group_weights, position, min_minutes", [
+    (None, None, 0),
+    ({"ATAQUE": 2, "DEFENSA": 0}, "DC", 0),
+    ({"PASES": 0.5}, None, 900),
+])
+def test_most_similar_matches_brute_force(players, group_weights, position, min_minutes):
+    index = SimilarityIndex(players, VIZ_METRIC_GROUPS)
+    weights = {
+        metric: max((group_weights or {}).get(group, 1), 0)
+        for group, metrics in index.groups.items() for metric in metrics
+    }
+    for player_name in players["jugador"].iloc[[0, 5, 77]]:
+        rows, scores = index.most_similar(player_name, k=8, group_weights=group_weights,
+                                          position=position, min_minutes=min_minutes)
+        expected = brute_force_similar(players, player_name, weights, 8, position, min_minutes)
+        assert players["jugador"].iloc[rows].tolist() == [name for name, _ in expected]
+        np.testing.assert_allclose(scores, [score for _, score in expected], atol=1e-5)
+
+
+def test_most_similar_unknown_player(players):
+    index = SimilarityIndex(players, VIZ_METRIC_GROUPS)
+    assert index.most_similar("Nadie") == (None, None)
+    rows, scores = index.most_similar(players["jugador"].iloc[0], position="No existe")
+    assert len(rows) == 0 and len(scores) == 0
+
+
+def test_percentiles_of_cohorts_larger_than_int16():
+    n_rows = 40000
+    df = pd.DataFrame({
+        "jugador": [f"Jugador {i}" for i in range(n_rows)],
+        "pos": "DC",
+        "min": 1000,
+        "goles/90": np.arange(n_rows, dtype=np.float64),
+    })
+    table = PercentileTable(df, thresholds=(0,))
+    percentiles, _ = table.player_percentiles(f"Jugador {n_rows - 1}", ["goles/90"], 0)
+    assert percentiles == pytest.approx({"goles/90": 100.0})
+    percentiles, _ = table.player_percentiles("Jugador 19999", ["goles/90"], 0)
+    assert percentiles == pytest.approx({"goles/90": 50.0})
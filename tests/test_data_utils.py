@@ -0,0 +1,219 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_utils
+from data_utils import (
+    ALL_COMPETITIONS, COMPETITION_FILES, apply_schema, build_column_profile, build_competition_catalog,
+    get_competition_options, get_sidecar_paths, is_sidecar_valid, iter_player_files, load_player_dataset,
+    read_player_file, refresh_sidecars, remove_sidecar, select_competition
+)
+from conftest import make_players
+
+EXCEL_COLUMNS = ["jugador", "equipo", "pos", "min", "goles", "xg/90"]
+
+
+def write_excel(path, n_rows=40, seed=0):
+    df = make_players(n_rows, seed=seed)[EXCEL_COLUMNS]
+    df.to_excel(path, index=False)
+    return pd.read_excel(path)
+
+
+@pytest.fixture
+def excel_file(tmp_path):
+    path = tmp_path / "wyscout_1ra_RFEF_limpio.xlsx"
+    write_excel(path)
+    return path
+
+
+def forbid_excel(monkeypatch):
+    def read_excel(*args, **kwargs):
+        raise AssertionError("no debería leerse el Excel")
+    monkeypatch.setattr(data_utils.pd, "read_excel", read_excel)
+
+
+def test_sidecar_is_built_and_reused(excel_file, monkeypatch):
+    expected = pd.read_excel(excel_file)
+    pd.testing.assert_frame_equal(read_player_file(excel_file), expected)
+    assert all(path.exists() for path in get_sidecar_paths(excel_file))
+
+    forbid_excel(monkeypatch)
+    pd.testing.assert_frame_equal(read_player_file(excel_file), expected)
+
+
+def test_sidecar_is_invalidated_when_the_excel_changes(excel_file):
+    read_player_file(excel_file)
+    changed = write_excel(excel_file, n_rows=55, seed=1)
+    assert not is_sidecar_valid(excel_file)
+    pd.testing.assert_frame_equal(read_player_file(excel_file), changed)
+
+
+def test_touched_excel_is_validated_by_content(excel_file, monkeypatch):
+    expected = read_player_file(excel_file)
+    stat = excel_file.stat()
+    os.utime(excel_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    forbid_excel(monkeypatch)
+    assert is_sidecar_valid(excel_file)
+    pd.testing.assert_frame_equal(read_player_file(excel_file), expected)
+
+
+def test_corrupt_metadata_falls_back_to_the_excel(excel_file):
+    expected = read_player_file(excel_file)
+    _, meta_path = get_sidecar_paths(excel_file)
+    meta_path.write_text("{", encoding="utf-8")
+    assert not is_sidecar_valid(excel_file)
+    pd.testing.assert_frame_equal(read_player_file(excel_file), expected)
+
+
+def test_refresh_and_remove_sidecars(excel_file):
+    assert refresh_sidecars(excel_file.parent) == [excel_file.name]
+    assert refresh_sidecars(excel_file.parent) == []
+    remove_sidecar(excel_file)
+    assert not any(path.exists() for path in get_sidecar_paths(excel_file))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for seed, file_name in enumerate(COMPETITION_FILES.values()):
+        write_excel(tmp_path / file_name, n_rows=30 + 10 * seed, seed=seed)
+    return tmp_path
+
+
+def test_all_competitions_view_is_built_from_the_league_files(data_dir):
+    combined, ranges = build_competition_catalog(data_dir)
+    frames = [pd.read_excel(data_dir / file_name) for file_name in COMPETITION_FILES.values()]
+
+    assert list(ranges) == list(COMPETITION_FILES)
+    assert ranges["2da RFEF"] == (30, 70)
+    all_view = select_competition(combined, ranges, ALL_COMPETITIONS)
+    assert all_view is combined
+    pd.testing.assert_frame_equal(all_view[EXCEL_COLUMNS], apply_schema(pd.concat(frames, ignore_index=True)))
+
+    for (comp, (start, stop)), frame in zip(ranges.items(), frames):
+        view = select_competition(combined, ranges, comp)
+        assert view["competicion"].eq(comp).all()
+        assert view["jugador"].tolist() == frame["jugador"].tolist()
+        # La vista es un corte del DataFrame combinado, no una copia
+        assert np.shares_memory(view["min"].to_numpy(), combined["min"].to_numpy())
+
+
+def test_missing_league_file_is_skipped(data_dir):
+    (data_dir / COMPETITION_FILES["2da RFEF"]).unlink()
+    combined, ranges = build_competition_catalog(data_dir)
+    assert list(ranges) == ["1ra RFEF"]
+    assert len(combined) == 30
+
+
+def test_catalog_does_not_fragment_the_frame(data_dir, monkeypatch):
+    def read_fragmented(file_path):
+        # Un bloque por columna, como los DataFrame construidos columna a columna
+        return pd.concat([pd.DataFrame({f"m{i}": np.arange(20, dtype=np.float64)}) for i in range(120)], axis=1)
+
+    monkeypatch.setattr(data_utils, "read_player_file", read_fragmented)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", pd.errors.PerformanceWarning)
+        combined, _ = build_competition_catalog(data_dir)
+    assert combined["competicion"].tolist() == ["1ra RFEF"] * 20 + ["2da RFEF"] * 20
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_iter_player_files_keeps_order_and_reports_errors(tmp_path, parallel):
+    files = [tmp_path / f"liga_{i}.xlsx" for i in range(3)]
+    expected = [write_excel(path, n_rows=10 + i, seed=i) for i, path in enumerate(files)]
+    broken = tmp_path / "roto.xlsx"
+    broken.write_bytes(b"no es un Excel")
+    files.insert(1, broken)
+    expected.insert(1, None)
+
+    results = list(iter_player_files(files, parallel=parallel, max_workers=2))
+
+    assert [path for path, _, _ in results] == files
+    for (_, df, error), frame in zip(results, expected):
+        if frame is None:
+            assert df is None and error is not None
+        else:
+            assert error is None
+            pd.testing.assert_frame_equal(df, frame)
+
+
+def test_apply_schema_downcasts_without_changing_values(players):
+    players["columna_nueva"] = 1.5
+    players["pj"] = players["pj"].astype(np.int64)
+    result = apply_schema(players)
+
+    assert result["xg/90"].dtype == np.float32
+    assert result["pj"].dtype == np.int8
+    assert result["min"].dtype == np.int16
+    assert isinstance(result["equipo"].dtype, pd.CategoricalDtype)
+    assert result["jugador"].dtype == players["jugador"].dtype
+    assert result["columna_nueva"].dtype == np.float64
+    assert result.memory_usage(deep=True).sum() < players.memory_usage(deep=True).sum()
+
+    for col in players.columns:
+        if pd.api.types.is_float_dtype(players[col].dtype):
+            np.testing.assert_allclose(result[col].astype(np.float64), players[col], rtol=1e-6)
+        else:
+            assert result[col].astype(object).tolist() == players[col].astype(object).tolist()
+
+
+def test_apply_schema_leaves_unexpected_types_alone(players):
+    players["min"] = players["min"].astype(str)
+    assert apply_schema(players)["min"].dtype == players["min"].dtype
+
+
+def test_apply_schema_is_idempotent(players):
+    once = apply_schema(players)
+    assert apply_schema(once).dtypes.equals(once.dtypes)
+
+
+def test_dataset_version_follows_the_source_files(data_dir):
+    first = load_player_dataset(data_dir)
+    assert load_player_dataset(data_dir).version == first.version
+
+    write_excel(data_dir / COMPETITION_FILES["1ra RFEF"], n_rows=31, seed=7)
+    assert load_player_dataset(data_dir).version != first.version
+
+
+def test_dataset_structures_are_aligned_with_each_view(data_dir):
+    dataset = load_player_dataset(data_dir)
+    for comp in get_competition_options():
+        view = dataset.view(comp)
+        assert dataset.view_indexes(comp).n_rows == len(view)
+        assert dataset.percentile_table(comp).n_rows == len(view)
+        assert dataset.metric_stats(comp).n_rows == len(view)
+        assert set(dataset.column_profile(comp)) == set(view.columns)
+
+    # Una competición desconocida usa la vista completa
+    assert dataset.view("Otra") is dataset.frame
+    assert dataset.view_indexes("Otra") is dataset.view_indexes(ALL_COMPETITIONS)
+
+
+def test_column_profile_matches_pandas(players):
+    players["prestamo"] = np.arange(len(players)) % 4 == 0
+    players.loc[[2, 9], "pos"] = np.nan
+    players["vacía"] = np.nan
+    df = apply_schema(players)
+    profile = build_column_profile(df)
+
+    assert set(profile) == set(df.columns)
+    for col in df.columns:
+        series = df[col]
+        entry = profile[col]
+        assert entry["nulls"] == series.isna().sum()
+        assert entry["cardinality"] == series.nunique()
+        # Como en los filtros originales, las booleanas cuentan como numéricas
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            assert entry["kind"] == "numeric"
+            if series.notna().any():
+                assert entry["min"] == pytest.approx(float(series.min()))
+                assert entry["max"] == pytest.approx(float(series.max()))
+                assert entry["has_decimals"] == bool((series.dropna() % 1 != 0).any())
+            else:
+                assert entry["min"] is None and entry["max"] is None
+        else:
+            assert entry["kind"] == "text"
+            assert entry["unique"] == sorted(series.dropna().unique().tolist())
@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_utils import apply_schema
+from export_utils import make_export
+from filter_utils import PagedView
+
+COLUMNS = ["jugador", "equipo", "pos", "min", "goles/90", "xg/90"]
+
+
+@pytest.fixture
+def view(players):
+    df = apply_schema(players)
+    rows = np.flatnonzero(df["min"].to_numpy() >= 900)[::-1]
+    return PagedView(df, rows, COLUMNS)
+
+
+def expected_frame(view):
+    return view.df.iloc[view.rows][view.columns].reset_index(drop=True)
+
+
+def export_bytes(view, fmt, chunk_size):
+    return make_export(view, fmt, chunk_size=chunk_size)().read()
+
+
+@pytest.mark.parametrize("chunk_size", [7, 5000])
+def test_csv_export_matches_pandas(view, chunk_size):
+    expected = expected_frame(view).to_csv(index=False).encode("utf-8")
+    assert export_bytes(view, "CSV", chunk_size) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [7, 5000])
+def test_parquet_export_round_trips(view, chunk_size):
+    result = pd.read_parquet(io.BytesIO(export_bytes(view, "Parquet", chunk_size)))
+    pd.testing.assert_frame_equal(result, expected_frame(view))
+
+
+def test_xlsx_export_round_trips(view):
+    result = pd.read_excel(io.BytesIO(export_bytes(view, "Excel", 7)), sheet_name="Jugadores")
+    expected = expected_frame(view)
+    assert list(result.columns) == COLUMNS
+    assert result["jugador"].tolist() == expected["jugador"].tolist()
+    np.testing.assert_allclose(result["xg/90"], expected["xg/90"].astype(np.float64), rtol=1e-6)
+
+
+@pytest.mark.parametrize("fmt", ["CSV", "Parquet", "Excel"])
+def test_empty_export_keeps_the_header(players, fmt):
+    empty = PagedView(apply_schema(players), np.empty(0, dtype=np.intp), COLUMNS)
+    data = export_bytes(empty, fmt, 5000)
+    if fmt == "CSV":
+        assert data.decode("utf-8").strip() == ",".join(COLUMNS)
+    elif fmt == "Parquet":
+        assert list(pd.read_parquet(io.BytesIO(data)).columns) == COLUMNS
+    else:
+        assert list(pd.read_excel(io.BytesIO(data)).columns) == COLUMNS
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_utils import apply_schema
+import filter_utils
+from filter_utils import MaskCache, PagedView, compile_filter_plan, evaluate_filter_plan
+from index_utils import ViewIndexes
+
+
+@pytest.fixture
+def df(players):
+    return apply_schema(players)
+
+
+def reference_mask(df, plan):
+    # Filtrado encadenado con pandas, como hacía la sección Base de Datos
+    filtered = df
+    for col, ftype, value in plan:
+        if ftype == "text":
+            filtered = filtered[filtered[col].astype(str).str.contains(value, case=False, na=False)]
+        elif ftype == "range":
+            filtered = filtered[(filtered[col] >= value[0]) & (filtered[col] <= value[1])]
+        elif ftype == "multiselect":
+            filtered = filtered[filtered[col].isin(value)]
+        elif ftype == "toggle":
+            filtered = filtered[filtered[col] == True]
+    return df.index.isin(filtered.index)
+
+
+MULTISELECT_PLANS = [
+    (("equipo", "multiselect", ("CA Cartagena", "Real Murcia")), ("pos", "multiselect", ("DC", "MC"))),
+    (
+        ("equipo", "multiselect", ("UD Ibiza",)),
+        ("pos", "multiselect", ("POR", "No existe")),
+        ("pie", "multiselect", ("izquierdo",)),
+        ("pais_nat", "multiselect", ("España", "Francia")),
+    ),
+    (("pos", "multiselect", ("No existe",)), ("pie", "multiselect", ("derecho",))),
+]
+
+
+@pytest.mark.parametrize("plan", MULTISELECT_PLANS)
+def test_bitmap_intersection_matches_pandas(df, plan):
+    expected = reference_mask(df, plan)
+    np.testing.assert_array_equal(evaluate_filter_plan(df, plan, indexes=ViewIndexes(df)), expected)
+    np.testing.assert_array_equal(evaluate_filter_plan(df, plan), expected)
+
+
+def test_bitmap_intersection_combines_with_other_predicates(df):
+    plan = MULTISELECT_PLANS[0] + (("min", "range", (900, 3000)),)
+    expected = reference_mask(df, plan)
+    np.testing.assert_array_equal(evaluate_filter_plan(df, plan, indexes=ViewIndexes(df)), expected)
+
+
+FILTER_TYPES = {
+    "GENERAL": {
+        "jugador": {"type": "text"},
+        "equipo": {"type": "multiselect"},
+        "pos": {"type": "multiselect"},
+        "min": {"type": "range"},
+        "prestamo": {"type": "toggle"},
+    },
+    "FASE OFENSIVA": {
+        "xg/90": {"type": "range"},
+    },
+}
+
+
+def test_compile_drops_filters_without_effect():
+    plan = compile_filter_plan(
+        ["jugador", "equipo", "pos", "min", "prestamo", "no_existe"],
+        {"jugador": "", "equipo": [], "pos": ["DC"], "min": (0, 900), "prestamo": False},
+        FILTER_TYPES,
+    )
+    assert plan == (("pos", "multiselect", ("DC",)), ("min", "range", (0, 900)))
+
+
+def test_equivalent_states_compile_to_the_same_plan():
+    values = {"pos": ["DC"], "jugador": "", "min": (0, 900)}
+    assert compile_filter_plan(["pos", "jugador", "min"], values, FILTER_TYPES) == \
+        compile_filter_plan(["pos", "min"], {"pos": ["DC"], "min": (0, 900)}, FILTER_TYPES)
+
+
+@pytest.mark.parametrize("values", [
+    {"jugador": "jugador 1", "min": (500, 2500), "xg/90": (1.0, 4.0)},
+    {"equipo": ["CA Cartagena", "Hércules CF"], "prestamo": True, "xg/90": (0.5, 2.5)},
+    {"jugador": "ZZZ", "pos": ["DC"]},
+])
+def test_compiled_plan_matches_pandas(df, values):
+    df = df.assign(prestamo=np.arange(len(df)) % 3 == 0)
+    plan = compile_filter_plan(list(values), values, FILTER_TYPES)
+    expected = reference_mask(df, plan)
+    np.testing.assert_array_equal(evaluate_filter_plan(df, plan), expected)
+    np.testing.assert_array_equal(evaluate_filter_plan(df, plan, indexes=ViewIndexes(df)), expected)
+
+
+def test_mask_cache_recomputes_only_the_changed_predicate(df, monkeypatch):
+    calls = []
+    original = filter_utils.predicate_mask
+
+    def counting_mask(series, ftype, value, indexes=None):
+        calls.append(series.name)
+        return original(series, ftype, value, indexes=indexes)
+
+    monkeypatch.setattr(filter_utils, "predicate_mask", counting_mask)
+    cache = MaskCache()
+    plan = (("pos", "multiselect", ("DC",)), ("min", "range", (0, 900)), ("jugador", "text", "1"))
+    first = evaluate_filter_plan(df, plan, mask_cache=cache, data_key="v1")
+    assert sorted(calls) == ["jugador", "min", "pos"]
+
+    calls.clear()
+    changed = plan[:1] + (("min", "range", (0, 1800)),) + plan[2:]
+    second = evaluate_filter_plan(df, changed, mask_cache=cache, data_key="v1")
+    assert calls == ["min"]
+    np.testing.assert_array_equal(first, reference_mask(df, plan))
+    np.testing.assert_array_equal(second, reference_mask(df, changed))
+
+    # Otros datos no comparten máscaras
+    calls.clear()
+    evaluate_filter_plan(df, plan, mask_cache=cache, data_key="v2")
+    assert sorted(calls) == ["jugador", "min", "pos"]
+
+
+def test_mask_cache_evicts_least_recently_used(df):
+    cache = MaskCache(max_entries=2)
+    a = cache.get_mask("v1", df["min"], "range", (0, 100))
+    b = cache.get_mask("v1", df["min"], "range", (0, 200))
+    assert cache.get_mask("v1", df["min"], "range", (0, 100)) is a
+    cache.get_mask("v1", df["min"], "range", (0, 300))
+    assert cache.get_mask("v1", df["min"], "range", (0, 100)) is a
+    assert cache.get_mask("v1", df["min"], "range", (0, 200)) is not b
+    assert not a.flags.writeable
+
+
+def test_paged_view_pages_match_the_filtered_frame(df):
+    plan = (("pos", "multiselect", ("DC", "MC")),)
+    mask = evaluate_filter_plan(df, plan)
+    columns = ["jugador", "equipo", "min", "no_existe"]
+    view = PagedView(df, np.flatnonzero(mask), columns)
+    df_sel = df[mask][["jugador", "equipo", "min"]]
+
+    assert len(view) == len(df_sel)
+    assert view.columns == ["jugador", "equipo", "min"]
+    rows_per_page = 25
+    assert view.n_pages(rows_per_page) == -(-len(df_sel) // rows_per_page)
+    for page in range(1, view.n_pages(rows_per_page) + 1):
+        start = (page - 1) * rows_per_page
+        pd.testing.assert_frame_equal(view.page(page, rows_per_page), df_sel.iloc[start:start + rows_per_page])
+    pd.testing.assert_frame_equal(pd.concat(view.iter_chunks(40)), df_sel)
+
+
+def test_paged_view_clamps_pages(df):
+    view = PagedView(df, np.arange(30), ["jugador"])
+    assert view.clamp_page(0, 10) == 1
+    assert view.clamp_page(7, 10) == 3
+    empty = PagedView(df, np.empty(0, dtype=np.intp), ["jugador"])
+    assert empty.n_pages(10) == 1 and empty.page(1, 10).empty
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_utils import apply_schema
+from index_utils import (
+    SortedColumnIndex, TrigramIndex, ViewIndexes, date_key, fold_text, market_value_key, min_minutes_mask, sort_key,
+    top_k_rows,
+)
+from visualization_utils import generate_boxplot, generate_correlation_heatmap
+
+
+@pytest.fixture
+def df(players):
+    return apply_schema(players)
+
+
+@pytest.mark.parametrize("col, lo, hi", [
+    ("min", 500, 2000),
+    ("min", None, 900),
+    ("xg/90", 1.2, None),
+    ("xg/90", 0.3, 0.3),
+    ("goles", 25, 30),
+])
+def test_range_mask_matches_pandas(df, col, lo, hi):
+    index = SortedColumnIndex(df)
+    expected = df[col].between(-np.inf if lo is None else lo, np.inf if hi is None else hi).to_numpy()
+    np.testing.assert_array_equal(index.range_mask(col, lo, hi), expected)
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+def test_order_matches_sort_values_with_nulls_last(df, ascending):
+    index = SortedColumnIndex(df)
+    order = index.order("xg/90", ascending=ascending)
+    expected = df["xg/90"].reset_index(drop=True).sort_values(ascending=ascending, na_position="last")
+    assert sorted(order.tolist()) == list(range(len(df)))
+    np.testing.assert_array_equal(df["xg/90"].to_numpy()[order], expected.to_numpy())
+    if ascending:
+        np.testing.assert_array_equal(order, df["xg/90"].reset_index(drop=True).sort_values(kind="stable").index)
+
+
+def test_sort_rows_orders_a_subset(df):
+    index = SortedColumnIndex(df, sort_columns=["jugador"])
+    rows = np.flatnonzero(df["pos"].to_numpy() == "DC")
+    expected = df.iloc[rows].reset_index(drop=True).sort_values("min", kind="stable").index
+    np.testing.assert_array_equal(index.sort_rows("min", rows), rows[expected])
+    assert index.can_sort("jugador") and "jugador" not in index
+
+
+def test_min_minutes_mask_with_and_without_index(df):
+    index = SortedColumnIndex(df)
+    expected = (df["min"] >= 900).to_numpy()
+    np.testing.assert_array_equal(min_minutes_mask(df, 900, index), expected)
+    np.testing.assert_array_equal(min_minutes_mask(df, 900), expected)
+
+
+def test_visualizations_are_unchanged_by_the_index(df):
+    index = SortedColumnIndex(df)
+    metrics = ["goles/90", "xg/90", "pases_pct"]
+    with_index = generate_correlation_heatmap(df, metrics, min_minutes=900, sorted_index=index)
+    without_index = generate_correlation_heatmap(df, metrics, min_minutes=900)
+    assert with_index.to_json() == without_index.to_json()
+
+    with_index = generate_boxplot(df, "xg/90", min_minutes=900, sorted_index=index)
+    without_index = generate_boxplot(df, "xg/90", min_minutes=900)
+    assert with_index.to_json() == without_index.to_json()
+
+
+def brute_force_search(series, query):
+    # Subcadena sin distinguir mayúsculas ni acentos, fila a fila
+    query = fold_text(query).strip()
+    return np.array([
+        row for row, value in enumerate(series)
+        if pd.notna(value) and query in f" {fold_text(value)} "
+    ], dtype=np.int32)
+
+
+@pytest.mark.parametrize("query", [
+    "jugador 1", "JUGADOR 12", "nunez", "Ñúñ", "ez", "r", "  2  ", "hercules", "atlético bal", "zzz", "",
+])
+def test_trigram_search_matches_brute_force(players, query):
+    for col in ["jugador", "equipo"]:
+        index = TrigramIndex(players[col])
+        np.testing.assert_array_equal(index.search(query), brute_force_search(players[col], query))
+
+
+def test_trigram_search_skips_nulls(players):
+    players.loc[[0, 7], "equipo"] = np.nan
+    index = TrigramIndex(players["equipo"])
+    assert not index.mask("a")[[0, 7]].any()
+
+
+def test_fuzzy_search_tolerates_typos(players):
+    index = TrigramIndex(players["jugador"])
+    assert index.search("Jose Nuñes").size == 0
+    assert index.fuzzy_search("Jose Nuñes")[0] == 5
+
+
+def test_search_players_looks_in_name_and_team(df):
+    indexes = ViewIndexes(df)
+    expected = np.union1d(
+        brute_force_search(df["jugador"], "ibiza"), brute_force_search(df["equipo"], "ibiza")
+    )
+    np.testing.assert_array_equal(indexes.search_players("ibiza"), expected)
+
+
+def reference_sort(df, col, rows, ascending):
+    # sort_values de pandas sobre las filas, con los nulos al final
+    parse = {"valor_tm": market_value_key, "fin_contrato": date_key}.get(col)
+    subset = df.iloc[rows].reset_index(drop=True)
+    order = subset.sort_values(
+        col, ascending=ascending, kind="stable", na_position="last",
+        key=(lambda s: pd.Series(parse(s), index=s.index)) if parse else None,
+    ).index
+    return rows[order]
+
+
+@pytest.mark.parametrize("col", ["jugador", "equipo", "valor_tm", "fin_contrato", "min", "xg/90"])
+def test_sort_any_column_matches_pandas(df, col):
+    index = SortedColumnIndex(df, sort_columns=list(df.columns))
+    rows = np.flatnonzero(df["pos"].to_numpy() != "POR")
+    np.testing.assert_array_equal(index.sort_rows(col, rows), reference_sort(df, col, rows, True))
+    descending = index.sort_rows(col, rows, ascending=False)
+    keys = sort_key(df[col])[descending]
+    valid = keys[~np.isnan(keys)]
+    assert (np.diff(valid) <= 0).all() and np.isnan(keys[len(valid):]).all()
+
+
+def test_sort_keys_of_text_columns():
+    assert market_value_key(pd.Series(["€ 250K", "€ 1.5M", "-"])).tolist()[:2] == [250e3, 1.5e6]
+    assert np.isnan(market_value_key(pd.Series(["-"])))[0]
+    days = date_key(pd.Series(["2025-06-30", "2026-06-30", "-"]))
+    assert days[1] - days[0] == 365 and np.isnan(days[2])
+    np.testing.assert_array_equal(sort_key(pd.Series(["b", "a", None, "c"], name="jugador")), [1, 0, np.nan, 2])
+
+
+@pytest.mark.parametrize("col", ["goles", "xg/90"])
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("k", [0, 1, 10, 1000])
+def test_top_k_rows_matches_the_sorted_index(df, col, ascending, k):
+    index = SortedColumnIndex(df)
+    values = df[col].to_numpy(dtype=np.float64)
+    mask = df["min"].to_numpy() >= 900
+    for candidate_mask in (None, mask):
+        expected = index.top_n(col, k, mask=candidate_mask, ascending=ascending)
+        np.testing.assert_array_equal(top_k_rows(values, k, mask=candidate_mask, ascending=ascending), expected)
+
+    # Mismos valores que la cabeza de sort_values de pandas
+    top = top_k_rows(values, k, mask=mask, ascending=ascending)
+    head = df.loc[mask, col].sort_values(ascending=ascending, na_position="last").head(k)
+    np.testing.assert_array_equal(values[top], head.to_numpy(dtype=np.float64))
@@ -0,0 +1,238 @@
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image as PILImage
+from reportlab import rl_config
+
+import report_utils
+from report_utils import (
+    PDF_TEMPLATES, ZIP_EXPORT_MAX_AGE, PDFTemplateRegistry, ReportPDFCache, iter_report_pdfs, match_date_key,
+    new_reports_zip_path, remove_stale_zips, render_player_dossier, render_report_pdf, report_content_hash,
+    report_pdf_filename, write_reports_zip
+)
+from conftest import make_report
+
+
+def fake_render(report_data):
+    return io.BytesIO(f"PDF {report_data['id']} {report_data['overall_rating']}".encode())
+
+
+def test_content_hash_ignores_volatile_fields():
+    report = make_report()
+    assert report_content_hash(report) == report_content_hash(make_report(scout_name="otro", total_reports=40))
+    assert report_content_hash(report) != report_content_hash(make_report(overall_rating=8))
+    assert report_content_hash(report) != report_content_hash(make_report(observations="Descartado."))
+
+
+def test_content_hash_follows_the_photo(tmp_path):
+    photo = tmp_path / "foto.png"
+    photo.write_bytes(b"a")
+    report = make_report(photo_path=str(photo))
+    before = report_content_hash(report)
+    photo.write_bytes(b"bb")
+    assert report_content_hash(report) != before
+
+
+def test_cache_renders_once_per_content(tmp_path):
+    cache = ReportPDFCache(tmp_path)
+    calls = []
+
+    def render(report_data):
+        calls.append(report_data["id"])
+        return fake_render(report_data)
+
+    report = make_report()
+    assert cache.get_or_render(report, render) == b"PDF 1 7"
+    assert cache.get_or_render(make_report(scout_name="otro"), render) == b"PDF 1 7"
+    assert calls == [1]
+
+    # Una edición del informe genera un PDF nuevo y borra la versión anterior
+    edited = make_report(overall_rating=9)
+    assert cache.get_or_render(edited, render) == b"PDF 1 9"
+    assert calls == [1, 1]
+    assert [p.name for p in tmp_path.glob("1_*.pdf")] == [cache.path_for(edited).name]
+
+
+def test_cache_skips_unsaved_reports(tmp_path):
+    cache = ReportPDFCache(tmp_path)
+    report = make_report(report_id=None)
+    assert cache.get_or_render(report, fake_render) == b"PDF None 7"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ReportPDFCache(tmp_path, max_bytes=20)
+    first, second, third = (make_report(report_id=i) for i in (1, 2, 3))
+    cache.put(first, b"x" * 8)
+    cache.put(second, b"y" * 8)
+    os.utime(cache.path_for(first), ns=(1, 1))
+    os.utime(cache.path_for(second), ns=(2, 2))
+    cache.get(first)  # el primero pasa a ser el más reciente
+    cache.put(third, b"z" * 8)
+
+    assert cache.get(second) is None
+    assert cache.get(first) == b"x" * 8
+    assert cache.get(third) == b"z" * 8
+
+
+def test_cache_get_survives_concurrent_eviction(tmp_path, monkeypatch):
+    cache = ReportPDFCache(tmp_path)
+    report = make_report()
+    cache.put(report, b"pdf")
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get(report) == b"pdf"
+
+
+def pdf_pages_text(data):
+    pymupdf = pytest.importorskip("pymupdf")
+    with pymupdf.open(stream=data, filetype="pdf") as document:
+        return [page.get_text() for page in document]
+
+
+def test_report_pdf_contains_the_report(tmp_path):
+    photo = tmp_path / "foto.png"
+    PILImage.new("RGB", (60, 80), "red").save(photo)
+    report = make_report(photo_path=str(photo))
+
+    data = render_report_pdf(report).getvalue()
+    assert data.startswith(b"%PDF")
+    text = "\n".join(pdf_pages_text(data))
+    for field in ["player_name", "local_team", "technical_aspects", "observations"]:
+        assert report[field] in text
+    assert report_pdf_filename(report) == "informe_José_Ñúñez_14-09-2024.pdf"
+
+
+def test_report_pdf_errors_propagate():
+    report = make_report()
+    del report["overall_rating"]
+    with pytest.raises(KeyError):
+        render_report_pdf(report)
+
+
+def zip_entries(path):
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_reports_zip_is_the_same_with_and_without_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    reports = [make_report(report_id=i, overall_rating=i % 10) for i in range(1, 7)]
+    broken = make_report(report_id=99)
+    del broken["observations"]
+    reports.insert(3, broken)
+    progress = []
+
+    sequential_errors = write_reports_zip(reports, tmp_path / "a.zip", parallel=False)
+    pool_errors = write_reports_zip(
+        reports, tmp_path / "b.zip", parallel=True, max_workers=2,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert [report["id"] for report, _ in sequential_errors] == [99]
+    assert [report["id"] for report, _ in pool_errors] == [99]
+    assert progress[-1] == (len(reports), len(reports))
+    entries = zip_entries(tmp_path / "a.zip")
+    assert len(entries) == 6
+    assert entries == zip_entries(tmp_path / "b.zip")
+
+
+def test_reports_zip_reads_cached_pdfs(tmp_path, monkeypatch):
+    cache = ReportPDFCache(tmp_path / "cache")
+    reports = [make_report(report_id=i) for i in range(1, 4)]
+    write_reports_zip(reports, tmp_path / "a.zip", pdf_cache=cache, parallel=False)
+
+    def fail(report_data):
+        raise AssertionError("no debería generarse el PDF")
+
+    monkeypatch.setattr(report_utils, "_render_report_bytes", fail)
+    assert write_reports_zip(reports, tmp_path / "b.zip", pdf_cache=cache, parallel=False) == []
+    assert zip_entries(tmp_path / "a.zip") == zip_entries(tmp_path / "b.zip")
+
+
+def test_stale_zips_are_removed_by_age(tmp_path):
+    old_zip = new_reports_zip_path(tmp_path)
+    recent_zip = new_reports_zip_path(tmp_path)
+    other = tmp_path / "otro.zip"
+    other.write_bytes(b"")
+    for path in (old_zip, other):
+        os.utime(path, (time.time() - ZIP_EXPORT_MAX_AGE - 60,) * 2)
+
+    assert remove_stale_zips(tmp_path) == 1
+    assert not old_zip.exists() and recent_zip.exists() and other.exists()
+
+
+def test_dossier_is_chronological():
+    dates = ["03/01/2025", "14/09/2024", "28/02/2024", "01/10/2024"]
+    reports = [
+        make_report(report_id=i, match_date=date, overall_rating=rating, observations=f"Marcador {date}")
+        for i, (date, rating) in enumerate(zip(dates, [8, 6, 5, 7]), start=1)
+    ]
+    assert [match_date_key(report)[0] for report in sorted(reports, key=match_date_key)] == [
+        "2024-02-28", "2024-09-14", "2024-10-01", "2025-01-03"
+    ]
+
+    pages = pdf_pages_text(render_player_dossier(reports).getvalue())
+    assert len(pages) >= len(reports) + 1
+    assert "4 informes entre el 28/02/2024 y el 03/01/2025" in pages[0]
+    assert "Valoración media: 6.5/10" in pages[0]
+
+    first_page = {
+        date: next(i for i, text in enumerate(pages) if f"Marcador {date}" in text) for date in dates
+    }
+    assert sorted(dates, key=first_page.get) == ["28/02/2024", "14/09/2024", "01/10/2024", "03/01/2025"]
+    assert min(first_page.values()) > 0
+
+
+def test_pdf_styles_are_built_once():
+    registry = PDFTemplateRegistry()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        styles = list(pool.map(lambda _: registry.styles, range(32)))
+    assert all(style is styles[0] for style in styles)
+    assert PDF_TEMPLATES.styles is PDF_TEMPLATES.styles
+
+
+def test_concurrent_renders_match_sequential(monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    reports = [make_report(report_id=i, overall_rating=i, observations="Texto " * (20 * i)) for i in range(1, 9)]
+    sequential = [render_report_pdf(report).getvalue() for report in reports]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        concurrent = [buffer.getvalue() for buffer in pool.map(render_report_pdf, reports * 3)]
+
+    assert concurrent == sequential * 3
+    assert render_report_pdf(reports[0]).getvalue() == sequential[0]
+
+
+def test_cached_pdfs_are_read_when_yielded(tmp_path, monkeypatch):
+    cache = ReportPDFCache(tmp_path / "cache")
+    reports = [make_report(report_id=i) for i in range(1, 5)]
+    monkeypatch.setattr(report_utils, "_render_report_bytes", lambda report: (fake_render(report).getvalue(), 0.0))
+    for report in reports:
+        cache.put(report, fake_render(report).getvalue())
+
+    reads = []
+    original_get = cache.get
+    monkeypatch.setattr(cache, "get", lambda report: reads.append(report["id"]) or original_get(report))
+    pdfs = iter_report_pdfs(reports, pdf_cache=cache, parallel=False)
+
+    assert next(pdfs)[1] == b"PDF 1 7" and reads == [1]
+    # Un PDF expulsado después de la comprobación inicial se genera de nuevo
+    cache.path_for(reports[2]).unlink()
+    rest = list(pdfs)
+    assert reads == [1, 2, 3, 4]
+    assert [data for _, data, _ in rest] == [fake_render(report).getvalue() for report in reports[1:]]
+    assert cache.contains(reports[2])
+
+
+def test_dossier_without_reports():
+    pages = pdf_pages_text(render_player_dossier([], "José Ñúñez").getvalue())
+    assert len(pages) == 1
+    assert "DOSSIER DE SCOUTING - José Ñúñez" in pages[0]
+    assert "No hay informes de este jugador." in pages[0]
@@ -0,0 +1,76 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from data_utils import ALL_COMPETITIONS, PlayerDataset, apply_schema  # noqa: E402
+from export_utils import make_export  # noqa: E402
+from filter_utils import PagedView, evaluate_filter_plan  # noqa: E402
+from index_utils import top_k_rows  # noqa: E402
+from sql_utils import DuckDBBackend  # noqa: E402
+from conftest import make_players  # noqa: E402
+
+COMPETITIONS = [ALL_COMPETITIONS, "1ª RFEF", "2ª RFEF"]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    frame = make_players(400, seed=1)
+    frame["prestamo"] = np.arange(len(frame)) % 7 == 0
+    frame = apply_schema(frame)
+    return PlayerDataset(frame, {"1ª RFEF": (0, 180), "2ª RFEF": (180, 400)}, "test")
+
+
+@pytest.fixture(scope="module")
+def backend(dataset, tmp_path_factory):
+    return DuckDBBackend(dataset, tmp_path_factory.mktemp("data"))
+
+
+PLANS = [
+    (("pos", "multiselect", ("DC", "MC")), ("min", "range", (500, 2500))),
+    (("jugador", "text", "jugador 1"), ("xg/90", "range", (0.5, 3.5))),
+    (("equipo", "multiselect", ("Hércules CF",)), ("pie", "multiselect", ("izquierdo", "ambos"))),
+    (("equipo", "text", "atletico"),),
+]
+
+
+@pytest.mark.parametrize("comp", COMPETITIONS)
+@pytest.mark.parametrize("plan", PLANS)
+def test_filter_rows_match_pandas(dataset, backend, comp, plan):
+    df = dataset.view(comp)
+    expected = np.flatnonzero(evaluate_filter_plan(df, plan, indexes=dataset.view_indexes(comp)))
+    np.testing.assert_array_equal(backend.view(comp).filter_rows(plan), expected)
+
+
+@pytest.mark.parametrize("fmt", ["Parquet", "CSV"])
+def test_export_matches_pandas(dataset, backend, fmt):
+    comp = "2ª RFEF"
+    df = dataset.view(comp)
+    rows = np.flatnonzero(df["min"].to_numpy() >= 900)[::-1]
+    view = PagedView(df, rows, ["jugador", "equipo", "pos", "pie", "prestamo", "min", "goles", "xg/90"])
+
+    duckdb_bytes = backend.view(comp).make_export(view, fmt)().read()
+    pandas_bytes = make_export(view, fmt)().read()
+    if fmt == "Parquet":
+        result = pd.read_parquet(io.BytesIO(duckdb_bytes))
+        pd.testing.assert_frame_equal(result, pd.read_parquet(io.BytesIO(pandas_bytes)))
+        assert isinstance(result["equipo"].dtype, pd.CategoricalDtype)
+    else:
+        assert duckdb_bytes == pandas_bytes
+        assert b",True," in duckdb_bytes
+
+
+@pytest.mark.parametrize("comp", COMPETITIONS)
+@pytest.mark.parametrize("metric, ascending", [("goles", False), ("xg/90", False), ("xg/90", True)])
+@pytest.mark.parametrize("position", [None, "MC"])
+def test_top_n_matches_top_k_rows(dataset, backend, comp, metric, ascending, position):
+    df = dataset.view(comp)
+    mask = df["min"].to_numpy() >= 500
+    if position:
+        mask &= df["pos"].to_numpy() == position
+    expected = top_k_rows(df[metric].to_numpy(dtype=np.float64), 15, mask=mask, ascending=ascending)
+    result = backend.view(comp).top_n(metric, 15, min_minutes=500, position=position, ascending=ascending)
+    np.testing.assert_array_equal(result, expected)
@@ -9,6 +9,8 @@ from mplsoccer import Radar, grid
 import matplotlib.font_manager as fm
 from io import BytesIO
 import matplotlib as mpl
+from index_utils import min_minutes_mask
+from analytics_utils import stats_for
 # Configurar matplotlib para funcionar correctamente con Streamlit
 mpl.use('Agg')  # Usar el backend Agg para evitar problemas con Streamlit
 
@@ -40,7 +42,7 @@ def download_roboto_fonts():
         st.warning(f"Error al descargar fuentes: {e}")
 
 # Función para generar un radar chart avanzado
-def generate_advanced_radar_chart(player_data, metrics, player_names, normalize=True):
+def generate_advanced_radar_chart(player_data, metrics, player_names, normalize=True, metric_stats=None):
     """
     Genera un radar chart para comparar múltiples jugadores en base a métricas seleccionadas.
     
@@ -49,6 +51,7 @@ def generate_advanced_radar_chart(player_data, metrics, player_names, normalize=
         metrics (list): Lista de métricas a visualizar
         player_names (list): Lista de nombres de jugadores a comparar
         normalize (bool): Si se normalizan los valores entre 0 y 1
+        metric_stats (MetricStats): Estadísticas de normalización de player_data (opcional)
         
     Returns:
         plotly.graph_objects.Figure: Figura con el radar chart
@@ -56,21 +59,24 @@ def generate_advanced_radar_chart(player_data, metrics, player_names, normalize=
     if not player_names or not metrics:
         return None
     
-    # Filtrar jugadores
-    filtered_data = player_data[player_data['jugador'].isin(player_names)]
-    if filtered_data.empty:
-        return None
-    
     # Verificar que las métricas existen en el dataframe
-    available_metrics = [m for m in metrics if m in filtered_data.columns]
+    available_metrics = [m for m in metrics if m in player_data.columns and m != 'jugador']
     if not available_metrics:
         return None
     
+    # Filtrar jugadores (solo con las columnas de las métricas)
+    filtered_data = player_data.loc[player_data['jugador'].isin(player_names), ['jugador'] + available_metrics]
+    if filtered_data.empty:
+        return None
+    
+    # Estadísticas de normalización (mínimo y máximo de cada métrica)
+    stats = stats_for(player_data, available_metrics, metric_stats)
+    
     # Preparar la figura
     fig = go.Figure()
     
-    # Colores para los diferentes jugadores
-    colors = ['white', 'yellow', 'red', 'blue', 'green', 'purple', 'orange']
+    # Colores más visibles para los diferentes jugadores (no usar blanco)
+    colors = ['#00FFFF', '#FFFF00', '#FF4500', '#1E90FF', '#32CD32', '#FF00FF', '#FFA500']
     
     # Agregar cada jugador al radar chart
     for i, player in enumerate(player_names):
@@ -87,27 +93,12 @@ def generate_advanced_radar_chart(player_data, metrics, player_names, normalize=
                 
                 # Normalizar si es necesario
                 if normalize:
-                    min_val = player_data[metric].min()
-                    max_val = player_data[metric].max()
-                    
-                    if max_val > min_val:
-                        value = (value - min_val) / (max_val - min_val)
-                    else:
-                        value = 0.5
+                    value = stats.normalize(metric, value)
                 
                 values.append(value)
             else:
                 values.append(0)
         
-        # Colores más visibles para los diferentes jugadores (no usar blanco)
-    colors = ['#00FFFF', '#FFFF00', '#FF4500', '#1E90FF', '#32CD32', '#FF00FF', '#FFA500']
-    
-    # [resto del código sin cambios hasta la parte donde se agregan los jugadores]
-    
-    # Agregar cada jugador al radar chart
-    for i, player in enumerate(player_names):
-        # [código igual hasta la parte de color]
-        
         color = colors[i % len(colors)]  # Usar la nueva paleta de colores
         
         # Usar valores de opacidad directamente
@@ -224,7 +215,7 @@ def generate_bar_comparison(player_data, metric, player_names, sort=True):
     return fig
 
 # Función para crear una matriz de dispersión para análisis multivariable
-def create_scatter_matrix(player_data, metrics, min_minutes=0, position=None, highlighted_players=None):
+def create_scatter_matrix(player_data, metrics, min_minutes=0, position=None, highlighted_players=None, sorted_index=None):
     """
     Crea una matriz de dispersión para analizar múltiples métricas simultáneamente.
     
@@ -234,6 +225,7 @@ def create_scatter_matrix(player_data, metrics, min_minutes=0, position=None, hi
         min_minutes (int): Minutos mínimos jugados para filtrar jugadores
         position (str): Posición para filtrar jugadores (opcional)
         highlighted_players (list): Lista de jugadores a destacar
+        sorted_index (SortedColumnIndex): Índice de columnas ordenadas de player_data (opcional)
         
     Returns:
         plotly.graph_objects.Figure: Figura con la matriz de dispersión
@@ -242,7 +234,7 @@ def create_scatter_matrix(player_data, metrics, min_minutes=0, position=None, hi
         return None
     
     # Filtrar por minutos jugados
-    filtered_data = player_data[player_data['min'] >= min_minutes].copy()
+    filtered_data = player_data[min_minutes_mask(player_data, min_minutes, sorted_index)].copy()
     
     # Filtrar por posición si se especifica
     if position and position != "Todas":
@@ -400,7 +392,7 @@ def generate_evolution_chart(player_data, player_name, metrics, seasons):
     return fig
 
 # Función para generar un mapa de calor de correlaciones
-def generate_correlation_heatmap(player_data, metrics, min_minutes=0, position=None):
+def generate_correlation_heatmap(player_data, metrics, min_minutes=0, position=None, sorted_index=None):
     """
     Genera un mapa de calor de correlaciones entre diversas métricas.
     
@@ -409,6 +401,7 @@ def generate_correlation_heatmap(player_data, metrics, min_minutes=0, position=N
         metrics (list): Lista de métricas a analizar
         min_minutes (int): Minutos mínimos jugados para filtrar jugadores
         position (str): Posición para filtrar jugadores (opcional)
+        sorted_index (SortedColumnIndex): Índice de columnas ordenadas de player_data (opcional)
         
     Returns:
         plotly.graph_objects.Figure: Figura con el mapa de calor
@@ -417,7 +410,7 @@ def generate_correlation_heatmap(player_data, metrics, min_minutes=0, position=N
         return None
     
     # Filtrar por minutos jugados
-    filtered_data = player_data[player_data['min'] >= min_minutes].copy()
+    filtered_data = player_data[min_minutes_mask(player_data, min_minutes, sorted_index)].copy()
     
     # Filtrar por posición si se especifica
     if position and position != "Todas":
@@ -456,7 +449,7 @@ def generate_correlation_heatmap(player_data, metrics, min_minutes=0, position=N
     return fig
 
 # Función para generar un gráfico de diagrama de caja
-def generate_boxplot(player_data, metric, group_by='pos', min_minutes=0):
+def generate_boxplot(player_data, metric, group_by='pos', min_minutes=0, sorted_index=None):
     """
     Genera un diagrama de caja para comparar distribuciones de una métrica agrupada por una variable.
     
@@ -465,6 +458,7 @@ def generate_boxplot(player_data, metric, group_by='pos', min_minutes=0):
         metric (str): Métrica a visualizar
         group_by (str): Variable para agrupar (por defecto: 'pos')
         min_minutes (int): Minutos mínimos jugados para filtrar jugadores
+        sorted_index (SortedColumnIndex): Índice de columnas ordenadas de player_data (opcional)
         
     Returns:
         plotly.graph_objects.Figure: Figura con el diagrama de caja
@@ -473,7 +467,7 @@ def generate_boxplot(player_data, metric, group_by='pos', min_minutes=0):
         return None
     
     # Filtrar por minutos jugados
-    filtered_data = player_data[player_data['min'] >= min_minutes].copy()
+    filtered_data = player_data[min_minutes_mask(player_data, min_minutes, sorted_index)].copy()
     
     if filtered_data.empty:
         return None
@@ -499,7 +493,7 @@ def generate_boxplot(player_data, metric, group_by='pos', min_minutes=0):
     return fig
 
 # Función para generar percentiles de jugador
-def generate_player_percentiles(player_data, player_name, metrics, min_minutes=0, position=None):
+def generate_player_percentiles(player_data, player_name, metrics, min_minutes=0, position=None, query_view=None, percentile_table=None):
     """
     Calcula y visualiza los percentiles de un jugador en comparación con otros.
     
@@ -509,49 +503,75 @@ def generate_player_percentiles(player_data, player_name, metrics, min_minutes=0
         metrics (list): Lista de métricas a analizar
         min_minutes (int): Minutos mínimos jugados para filtrar jugadores
         position (str): Posición para filtrar jugadores (opcional)
+        query_view (SQLView): Consultas SQL alineadas con player_data (opcional)
+        percentile_table (PercentileTable): Percentiles precalculados de player_data (opcional)
         
     Returns:
         tuple: (DataFrame con percentiles, plotly.graph_objects.Figure con gráfico)
     """
-    if player_name not in player_data['jugador'].values:
+    use_table = (
+        percentile_table is not None and percentile_table.n_rows == len(player_data)
+        and percentile_table.has_threshold(min_minutes)
+    )
+    if not use_table and player_name not in player_data['jugador'].values:
         return None, None
     
-    # Filtrar por minutos jugados
-    filtered_data = player_data[player_data['min'] >= min_minutes].copy()
-    
-    # Filtrar por posición si se especifica
-    if position and position != "Todas":
-        filtered_data = filtered_data[filtered_data['pos'] == position]
+    if use_table:
+        # Percentiles leídos de la tabla precalculada, sin recorrer los datos
+        available_metrics = [m for m in metrics if m in percentile_table.metrics]
+        if not available_metrics:
+            return None, None
+        percentiles, row = percentile_table.player_percentiles(player_name, available_metrics, min_minutes, position)
+        if percentiles is None:
+            return None, None
+        values = {m: player_data[m].iloc[row] for m in available_metrics}
+    elif query_view is not None:
+        # Percentiles calculados en SQL por el motor configurado
+        available_metrics = [m for m in metrics if m in player_data.columns and pd.api.types.is_numeric_dtype(player_data[m])]
+        if not available_metrics:
+            return None, None
+        percentiles, values = query_view.player_percentiles(player_name, available_metrics, min_minutes, position)
+        if percentiles is None:
+            return None, None
     else:
-        # Si no se especifica posición, filtrar por la posición del jugador
-        player_pos = player_data[player_data['jugador'] == player_name]['pos'].iloc[0]
-        filtered_data = filtered_data[filtered_data['pos'] == player_pos]
-    
-    if filtered_data.empty:
-        return None, None
-    
-    # Verificar que las métricas existen en el dataframe
-    available_metrics = [m for m in metrics if m in filtered_data.columns and pd.api.types.is_numeric_dtype(filtered_data[m])]
-    if not available_metrics:
-        return None, None
-    
-    # Obtener datos del jugador
-    player_df = filtered_data[filtered_data['jugador'] == player_name]
-    if player_df.empty:
-        return None, None
-    
-    # Calcular percentiles
-    percentiles = {}
-    for metric in available_metrics:
-        player_value = player_df[metric].iloc[0]
-        percentile = (filtered_data[metric] <= player_value).mean() * 100
-        percentiles[metric] = percentile
+        # Filtrar por minutos jugados
+        filtered_data = player_data[player_data['min'] >= min_minutes].copy()
+        
+        # Filtrar por posición si se especifica
+        if position and position != "Todas":
+            filtered_data = filtered_data[filtered_data['pos'] == position]
+        else:
+            # Si no se especifica posición, filtrar por la posición del jugador
+            player_pos = player_data[player_data['jugador'] == player_name]['pos'].iloc[0]
+            filtered_data = filtered_data[filtered_data['pos'] == player_pos]
+        
+        if filtered_data.empty:
+            return None, None
+        
+        # Verificar que las métricas existen en el dataframe
+        available_metrics = [m for m in metrics if m in filtered_data.columns and pd.api.types.is_numeric_dtype(filtered_data[m])]
+        if not available_metrics:
+            return None, None
+        
+        # Obtener datos del jugador
+        player_df = filtered_data[filtered_data['jugador'] == player_name]
+        if player_df.empty:
+            return None, None
+        
+        # Calcular percentiles
+        percentiles = {}
+        values = {}
+        for metric in available_metrics:
+            player_value = player_df[metric].iloc[0]
+            percentile = (filtered_data[metric] <= player_value).mean() * 100
+            percentiles[metric] = percentile
+            values[metric] = player_value
     
     # Crear DataFrame de percentiles
     percentile_df = pd.DataFrame({
         'Métrica': list(percentiles.keys()),
         'Percentil': list(percentiles.values()),
-        'Valor': [player_df[m].iloc[0] for m in percentiles.keys()]
+        'Valor': [values[m] for m in percentiles.keys()]
     })
     
     # Ordenar por percentil
@@ -600,7 +620,7 @@ def generate_player_percentiles(player_data, player_name, metrics, min_minutes=0
     
     return percentile_df, fig
 
-def generate_mplsoccer_radar(player_data, metrics, player_name, show_title=True):
+def generate_mplsoccer_radar(player_data, metrics, player_name, show_title=True, metric_stats=None):
     """
     Genera un radar chart para un jugador utilizando mplsoccer.
     
@@ -609,6 +629,7 @@ def generate_mplsoccer_radar(player_data, metrics, player_name, show_title=True)
         metrics (list): Lista de métricas a visualizar
         player_name (str): Nombre del jugador a mostrar
         show_title (bool): Si se muestra el título del gráfico
+        metric_stats (MetricStats): Estadísticas de normalización de player_data (opcional)
         
     Returns:
         matplotlib.figure.Figure: Figura con el radar chart o None si hay error
@@ -636,14 +657,14 @@ def generate_mplsoccer_radar(player_data, metrics, player_name, show_title=True)
         params = clean_metrics
         values = []
         
-        # Calcular rangos (mínimo y máximo) para cada métrica
+        # Rangos (mínimo y máximo) de cada métrica, leídos de las estadísticas
+        stats = stats_for(player_data, available_metrics, metric_stats)
         min_ranges = []
         max_ranges = []
         
         for clean_metric, original_metric in metrics_map.items():
             if pd.api.types.is_numeric_dtype(player_data[original_metric]):
-                min_val = player_data[original_metric].min()
-                max_val = player_data[original_metric].max()
+                min_val, max_val = stats.value_range(original_metric)
                 
                 # Añadir un pequeño margen al máximo
                 margin = (max_val - min_val) * 0.05
@@ -735,7 +756,7 @@ def generate_mplsoccer_radar(player_data, metrics, player_name, show_title=True)
         st.error(traceback.format_exc())
         return None
 
-def generate_mplsoccer_radar_compare(player_data, metrics, player_name1, player_name2):
+def generate_mplsoccer_radar_compare(player_data, metrics, player_name1, player_name2, metric_stats=None):
     """
     Genera un radar chart comparativo entre dos jugadores utilizando mplsoccer.
     
@@ -744,6 +765,7 @@ def generate_mplsoccer_radar_compare(player_data, metrics, player_name1, player_
         metrics (list): Lista de métricas a visualizar
         player_name1 (str): Nombre del primer jugador
         player_name2 (str): Nombre del segundo jugador
+        metric_stats (MetricStats): Estadísticas de normalización de player_data (opcional)
         
     Returns:
         matplotlib.figure.Figure: Figura con el radar chart o None si hay error
@@ -776,14 +798,14 @@ def generate_mplsoccer_radar_compare(player_data, metrics, player_name1, player_
         values1 = []
         values2 = []
         
-        # Calcular rangos (mínimo y máximo) para cada métrica
+        # Rangos (mínimo y máximo) de cada métrica, leídos de las estadísticas
+        stats = stats_for(player_data, available_metrics, metric_stats)
         min_ranges = []
         max_ranges = []
         
         for clean_metric, original_metric in metrics_map.items():
             if pd.api.types.is_numeric_dtype(player_data[original_metric]):
-                min_val = player_data[original_metric].min()
-                max_val = player_data[original_metric].max()
+                min_val, max_val = stats.value_range(original_metric)
                 
                 # Añadir un pequeño margen al máximo
                 margin = (max_val - min_val) * 0.05
@@ -884,7 +906,7 @@ def generate_mplsoccer_radar_compare(player_data, metrics, player_name1, player_
         return None
     
 # Función mejorada para generar radar chart
-def generate_radar_chart(player_data, metrics, player_name=None):
+def generate_radar_chart(player_data, metrics, player_name=None, metric_stats=None):
     """
     Genera un radar chart para el jugador seleccionado según las métricas proporcionadas.
     
@@ -892,6 +914,7 @@ def generate_radar_chart(player_data, metrics, player_name=None):
         player_data (DataFrame): DataFrame con los datos de los jugadores
         metrics (list): Lista de métricas a visualizar
         player_name (str, optional): Nombre del jugador a mostrar
+        metric_stats (MetricStats, optional): Estadísticas de normalización de player_data
         
     Returns:
         plotly.graph_objects.Figure: Figura con el radar chart o None si hay error
@@ -932,6 +955,9 @@ def generate_radar_chart(player_data, metrics, player_name=None):
         st.error("No hay métricas válidas para generar el radar chart")
         return None
     
+    # Estadísticas de normalización (mínimo y máximo de todos los jugadores)
+    stats = stats_for(player_data, available_metrics, metric_stats)
+    
     # Obtener los valores para cada métrica
     values = []
     for metric in available_metrics:
@@ -940,8 +966,7 @@ def generate_radar_chart(player_data, metrics, player_name=None):
             value = filtered_data[metric].iloc[0]
             
             # Normalizar al rango 0-1 basado en min-max de todos los jugadores
-            min_val = player_data[metric].min()
-            max_val = player_data[metric].max()
+            min_val, max_val = stats.value_range(metric)
             
             if pd.isna(value):
                 # Valor nulo, usar 0 como valor predeterminado